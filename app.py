@@ -4,10 +4,16 @@ from pathlib import Path
 import sys
 import json
 import shutil
+import threading
 import time
 
 # Import settings handler
 from core.settings_handler import settings
+from core.collection_refresh import CollectionRefresher
+from core.cache_store import cache_store
+from core.search_cache import search_index
+from core.metrics import metrics
+from core.atomic_write import atomic_write_json
 
 # Import screens
 from ui.screens.home_screen import HomeScreen
@@ -417,6 +423,51 @@ class App(ctk.CTk):
         )
         refresh_cache_button.pack(side="left", padx=5)
         
+        # Network metrics section
+        metrics_frame = ctk.CTkFrame(settings_scroll)
+        metrics_frame.pack(fill="x", padx=20, pady=20)
+        
+        metrics_label = ctk.CTkLabel(
+            metrics_frame, 
+            text="Network Metrics",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        metrics_label.pack(anchor="w", padx=10, pady=5)
+        
+        metrics_desc = ctk.CTkLabel(
+            metrics_frame,
+            text="Requests, connections and bytes per host since the app started,\nand how long connecting, waiting, downloading and formatting took.",
+            justify="left"
+        )
+        metrics_desc.pack(anchor="w", padx=10, pady=5)
+        
+        self.metrics_text = ctk.CTkTextbox(
+            metrics_frame,
+            height=240,
+            wrap="none",
+            font=ctk.CTkFont(family="Courier", size=12)
+        )
+        self.metrics_text.pack(fill="x", padx=10, pady=5)
+        
+        metrics_buttons_frame = ctk.CTkFrame(metrics_frame, fg_color="transparent")
+        metrics_buttons_frame.pack(fill="x", padx=10, pady=10)
+        
+        refresh_metrics_button = ctk.CTkButton(
+            metrics_buttons_frame,
+            text="Refresh Metrics",
+            command=self._show_metrics
+        )
+        refresh_metrics_button.pack(side="left", padx=5)
+        
+        reset_metrics_button = ctk.CTkButton(
+            metrics_buttons_frame,
+            text="Reset Metrics",
+            command=self._reset_metrics
+        )
+        reset_metrics_button.pack(side="left", padx=5)
+        
+        self._show_metrics()
+        
         # Data Export section
         export_frame = ctk.CTkFrame(settings_scroll)
         export_frame.pack(fill="x", padx=20, pady=20)
@@ -853,13 +904,19 @@ class App(ctk.CTk):
                 
             settings.set_offline_cache_size(cache_size)
             
+            # Evict what no longer fits now rather than over the next saves
+            evicted = cache_store.enforce()
+            message = f"Cache size set to {cache_size} items."
+            if evicted:
+                message += f" {evicted} cached items evicted."
+            
             # Show status message
             self.cache_status.configure(
-                text=f"Cache size set to {cache_size} items.",
+                text=message,
                 fg_color=("#c3e6cb", "#285b2a")
             )
             
-            self.show_status(f"Cache size set to {cache_size} items.", "success")
+            self.show_status(message, "success")
         except ValueError as e:
             self.cache_status.configure(
                 text=f"Invalid cache size: {str(e)}",
@@ -870,12 +927,10 @@ class App(ctk.CTk):
     def _clear_cache(self):
         """Clear the offline cache"""
         try:
-            # Create or clear the cache directory
-            cache_dir = Path("data/cache")
-            if cache_dir.exists():
-                import shutil
-                shutil.rmtree(cache_dir)
-            os.makedirs(cache_dir, exist_ok=True)
+            # Cached entries only; the collection's pins and the refresh
+            # watermarks are kept
+            cache_store.clear()
+            search_index.clear()
             
             # Show status message
             self.cache_status.configure(
@@ -892,25 +947,164 @@ class App(ctk.CTk):
             self.show_status(f"Error clearing cache: {str(e)}", "error")
     
     def _refresh_cache(self):
-        """Refresh the offline cache with latest data"""
-        try:
-            # Create the cache directory if it doesn't exist
-            cache_dir = Path("data/cache")
-            os.makedirs(cache_dir, exist_ok=True)
-            
-            # Show message that this is a placeholder
+        """Refresh cached details for the collection titles that changed on TMDB"""
+        if settings.is_offline_mode():
             self.cache_status.configure(
-                text="Cache refresh will be implemented in a future update.",
+                text="Disable offline mode to refresh the cache.",
                 fg_color=("#fff3cd", "#856404")
             )
-            
-            self.show_status("Cache refresh will be implemented in a future update.", "warning")
-        except Exception as e:
-            self.cache_status.configure(
-                text=f"Error refreshing cache: {str(e)}",
-                fg_color=("#f8d7da", "#691c22")
+            self.show_status("Disable offline mode to refresh the cache.", "warning")
+            return
+        
+        self.cache_status.configure(
+            text="Checking TMDB for changes...",
+            fg_color=("#d1ecf1", "#0c5460")
+        )
+        
+        def run_refresh():
+            try:
+                summary = CollectionRefresher().refresh()
+            except Exception as e:
+                # e is unbound once the except block ends, before the callback runs
+                self.after(0, lambda error=e: self._show_refresh_error(error))
+                return
+            self.after(0, lambda: self._show_refresh_summary(summary))
+        
+        # Network calls must not block the UI thread
+        threading.Thread(target=run_refresh, daemon=True).start()
+    
+    def _show_refresh_summary(self, summary):
+        """Report the outcome of an incremental cache refresh"""
+        movies = summary["movie"]
+        series = summary["tv"]
+        message = (
+            f"Refreshed {movies['refreshed']} of {movies['tracked']} movies and "
+            f"{series['refreshed']} of {series['tracked']} series."
+        )
+        
+        unlinked = movies["unlinked"] + series["unlinked"]
+        if unlinked:
+            message += f" {unlinked} older titles have no TMDB ID and were skipped."
+        
+        failed = movies["failed"] + series["failed"]
+        if failed:
+            message += f" {failed} failed and will be retried next time."
+            self.cache_status.configure(text=message, fg_color=("#fff3cd", "#856404"))
+            self.show_status(message, "warning")
+        else:
+            self.cache_status.configure(text=message, fg_color=("#c3e6cb", "#285b2a"))
+            self.show_status(message, "success")
+    
+    def _show_refresh_error(self, error):
+        """Report a cache refresh that could not run"""
+        self.cache_status.configure(
+            text=f"Error refreshing cache: {str(error)}",
+            fg_color=("#f8d7da", "#691c22")
+        )
+        self.show_status(f"Error refreshing cache: {str(error)}", "error")
+    
+    def _show_metrics(self):
+        """Fill the metrics box from the shared metrics registry"""
+        stats = metrics.stats()
+        counters = stats["counters"]
+        
+        lines = [f"{'Host':<24} {'Requests':>8} {'Opened':>7} {'Reused':>7} {'Wire KiB':>9} {'Data KiB':>9} {'Saved':>6}"]
+        for host, requests in sorted(counters.get("http.requests", {}).items()):
+            opened = counters.get("http.connections_opened", {}).get(host, 0)
+            wire = counters.get("http.bytes_wire", {}).get(host, 0)
+            decoded = counters.get("http.bytes_decoded", {}).get(host, 0)
+            saved = f"{100 * (1 - wire / decoded):.0f}%" if decoded else "-"
+            lines.append(
+                f"{host:<24} {requests:>8} {opened:>7} {max(requests - opened, 0):>7} "
+                f"{wire / 1024:>9.1f} {decoded / 1024:>9.1f} {saved:>6}"
+            )
+        if len(lines) == 1:
+            lines.append("No requests yet")
+        
+        # Details prefetched for search results, and how many were opened
+        for kind, scheduled in sorted(counters.get("prefetch.scheduled", {}).items()):
+            hits = counters.get("prefetch.hits", {}).get(kind, 0)
+            misses = counters.get("prefetch.misses", {}).get(kind, 0)
+            cancelled = counters.get("prefetch.cancelled", {}).get(kind, 0)
+            lines.append(
+                f"Prefetch {kind}: {scheduled} scheduled, {cancelled} cancelled, "
+                f"{hits} of {hits + misses} details opened were prefetched"
             )
-            self.show_status(f"Error refreshing cache: {str(e)}", "error")
+        
+        # Searches as you type, and how many were answered locally
+        for kind, requests in sorted(counters.get("search.requests", {}).items()):
+            cached = counters.get("search.cache_hits", {}).get(kind, 0)
+            prefix = counters.get("search.prefix_hits", {}).get(kind, 0)
+            superseded = counters.get("search.superseded", {}).get(kind, 0)
+            lines.append(
+                f"Search {kind}: {requests} requests, {superseded} superseded, "
+                f"{cached} from the query cache, {prefix} shown early from a prefix"
+            )
+        index = counters.get("search.index", {})
+        if index:
+            lines.append(
+                f"Search cache: {index.get('memory', 0)} from memory, {index.get('disk', 0)} from disk, "
+                f"{index.get('prefix', 0)} answered from a prefix, {index.get('miss', 0)} searched upstream"
+            )
+        # Offline cache lookups, and what was evicted to keep it within its size
+        hits = sum(counters.get("cache.hits", {}).values())
+        misses = sum(counters.get("cache.misses", {}).values())
+        evictions = sum(counters.get("cache.evictions", {}).values())
+        if hits or misses or evictions:
+            entries, size = cache_store.totals()
+            ratio = f"{100 * hits / (hits + misses):.0f}%" if hits or misses else "-"
+            lines.append(
+                f"Offline cache: {entries} items, {size / 1024:.1f} KiB, {hits} hits, {misses} misses "
+                f"({ratio} hit ratio), {evictions} evicted"
+            )
+        memory = counters.get("cache.memory", {})
+        if memory:
+            entries, size = cache_store.memory.totals()
+            memory_hits, memory_misses = memory.get("hit", 0), memory.get("miss", 0)
+            lines.append(
+                f"Cache in memory: {entries} items, {size / 1024:.1f} KiB, {memory_hits} hits, "
+                f"{memory_misses} misses ({100 * memory_hits / (memory_hits + memory_misses):.0f}% hit ratio, "
+                f"the rest read from disk)"
+            )
+        negative = counters.get("cache.negative", {})
+        if negative:
+            lines.append(
+                f"Known misses: {negative.get('movie', 0) + negative.get('tv', 0)} TMDB and "
+                f"{negative.get('omdb', 0)} OMDB calls saved on titles they don't have"
+            )
+        freshness = counters.get("cache.freshness", {})
+        if freshness:
+            lines.append(
+                f"Served from cache: {freshness.get('fresh', 0)} fresh, {freshness.get('stale', 0)} stale "
+                f"and refreshed in the background, {freshness.get('expired', 0)} too old to show"
+            )
+        pages = counters.get("search.pages", {})
+        if pages:
+            lines.append(
+                f"Search pages: {pages.get('ahead', 0)} fetched ahead, {pages.get('ready', 0)} ready "
+                f"and {pages.get('waited', 0)} still loading when scrolled to"
+            )
+        
+        lines.append("")
+        lines.append(f"{'Timing (ms)':<16} {'For':<24} {'Count':>6} {'p50':>8} {'p95':>8} {'Max':>8}")
+        # In the order a lookup goes through them
+        for name in ("http.connect", "http.tls", "http.headers", "http.transfer", "fetcher.format", "fetcher.search",
+                     "search.to_render"):
+            for label, timing in sorted(stats["timings"].get(name, {}).items()):
+                lines.append(
+                    f"{name:<16} {label:<24} {timing['count']:>6} {timing['p50_ms']:>8.1f} "
+                    f"{timing['p95_ms']:>8.1f} {timing['max_ms']:>8.1f}"
+                )
+        
+        self.metrics_text.configure(state="normal")
+        self.metrics_text.delete("1.0", "end")
+        self.metrics_text.insert("1.0", "\n".join(lines))
+        self.metrics_text.configure(state="disabled")
+    
+    def _reset_metrics(self):
+        """Clear the collected network metrics"""
+        metrics.reset()
+        self._show_metrics()
     
     def _export_movies_to_csv(self):
         """Export movies data to a CSV file"""
@@ -1050,12 +1244,10 @@ class App(ctk.CTk):
             series_file = data_dir / "series.json"
             
             if not movies_file.exists():
-                with open(movies_file, "w") as f:
-                    json.dump([], f)
+                atomic_write_json(movies_file, [], lock=True)
             
             if not series_file.exists():
-                with open(series_file, "w") as f:
-                    json.dump([], f)
+                atomic_write_json(series_file, [], lock=True)
             
             # Copy files
             shutil.copy2(movies_file, backup_folder)
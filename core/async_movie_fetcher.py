@@ -0,0 +1,665 @@
+import asyncio
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from core.settings_handler import settings
+from core.movie_fetcher import MovieFetcher
+from core.http_client import RETRYABLE_STATUSES
+from core.json_stream import response_json, should_stream, load_trimmed_async
+from core.fetch_plan import MOVIE_DETAIL_FIELDS, plan_movie, plan_series, series_fields
+from core.search_cache import SEARCH_MAX_PAGE, SEARCH_PAGE_SIZE, search_cache_key, search_index
+from core.singleflight import singleflight
+from core.metrics import metrics
+from core.tracing import tracer
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Runs the cache reads and writes of coroutines (see AsyncMovieFetcher._cache)
+_cache_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="async-cache")
+
+def _metered_trace_config():
+    """
+    aiohttp hooks reporting requests, new connections and time to headers
+    to core.metrics like the pooled client's MeteredAdapter; aiohttp times
+    connect and TLS together, so both land in http.connect
+    """
+    async def request_start(session, context, params):
+        context.host = params.url.host or ""
+        context.start = time.perf_counter()
+        metrics.incr("http.requests", label=context.host)
+
+    async def connection_start(session, context, params):
+        context.connect_start = time.perf_counter()
+
+    async def connection_end(session, context, params):
+        connect_seconds = time.perf_counter() - context.connect_start
+        metrics.incr("http.connections_opened", label=context.host)
+        metrics.observe("http.connect", connect_seconds, context.host)
+        tracer.stage("http.connect", connect_seconds)
+
+    async def request_end(session, context, params):
+        metrics.observe("http.headers", time.perf_counter() - context.start, context.host)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(request_start)
+    trace_config.on_connection_create_start.append(connection_start)
+    trace_config.on_connection_create_end.append(connection_end)
+    trace_config.on_request_end.append(request_end)
+    return trace_config
+
+class _MeteredReader:
+    """Wraps an aiohttp response stream, counting the decoded bytes read and the time spent waiting for them"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.decoded = 0
+        self.transfer = 0.0
+
+    async def read(self, size=-1):
+        start = time.perf_counter()
+        chunk = await self.reader.read(size)
+        self.transfer += time.perf_counter() - start
+        self.decoded += len(chunk)
+        return chunk
+
+class AsyncMovieFetcher:
+    """
+    Coroutine version of MovieFetcher.
+
+    Exposes the same lookups as MovieFetcher, but as coroutines that share one
+    event loop, so a details view can pipeline the TMDB call into the
+    dependent OMDB call and many titles can be fetched at once without an OS
+    thread per request. Request building, formatting and caching are delegated
+    to a regular MovieFetcher so both fetchers return identical results.
+
+    Uses aiohttp when it is installed and the transport is live, and otherwise
+    runs the blocking pooled HTTP client in the loop's executor. Cache reads
+    and writes go to SQLite and wait for the store's write lock, so they run
+    on a small thread pool of their own rather than on the loop.
+    """
+
+    def __init__(self, http=None, tmdb_base_url=None, omdb_base_url=None, max_concurrency=None):
+        self.fetcher = MovieFetcher(http=http, tmdb_base_url=tmdb_base_url, omdb_base_url=omdb_base_url)
+        self.max_concurrency = max_concurrency or settings.get_http_pool_settings()[1]
+
+        # aiohttp sessions and semaphores are bound to the loop that made them
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        # Exact searches running behind prefix candidates, kept so they are not collected
+        self._revalidations = set()
+
+    @property
+    def network_errors(self):
+        """Exception types that mean the request itself failed"""
+        if aiohttp is not None:
+            return (aiohttp.ClientError, asyncio.TimeoutError, requests.RequestException)
+        return (asyncio.TimeoutError, requests.RequestException)
+
+    async def _bind_loop(self):
+        """(Re)create the loop-bound session and semaphore for the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            await self._close_session(self._loop, self._session)
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._session = None
+            # Recording and replaying happen in the pooled client's transport
+            if aiohttp is not None and self.fetcher.http.transport.mode == "live":
+                connect_timeout, read_timeout = settings.get_http_timeout()
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit_per_host=self.max_concurrency),
+                    timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                    trace_configs=[_metered_trace_config()]
+                )
+
+    @staticmethod
+    async def _close_session(loop, session):
+        """
+        Close a session made on an earlier loop. It is closed on its own loop
+        while that still runs; a loop that has ended can no longer close its
+        sockets, so they are left to the garbage collector, but aiohttp still
+        releases the connections. Call close() before a loop ends to avoid that.
+        """
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+        else:
+            await session.close()
+
+    async def _cache(self, method, *args):
+        """Run a blocking cache method of the sync fetcher off the loop, in this call's context"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_cache_executor, contextvars.copy_context().run, method, *args)
+
+    async def _get_json(self, url, params=None):
+        """
+        Send a GET request and return (status_code, payload).
+
+        Network errors and 5xx responses are retried with backoff like the
+        pooled client does. The payload is {} for error statuses; network
+        failures, including an open circuit breaker, raise one of
+        network_errors.
+        """
+        status, payload, _ = await self._request(url, params)
+        return status, payload
+
+    async def _request(self, url, params=None, headers=None, trim=None):
+        """
+        Like _get_json, but sends extra headers, applies a json_stream trim
+        spec to large bodies and also returns the response headers
+        """
+        await self._bind_loop()
+        async with self._semaphore:
+            if self._session is None:
+                # The pooled client already applies the rate limiters, retries and breakers
+                loop = asyncio.get_running_loop()
+
+                def fetch():
+                    response = self.fetcher.http.get(url, params=params, headers=headers, stream=True)
+                    if response.status_code >= 300:
+                        # Reading the short body hands the connection back to the pool
+                        response.content
+                        return response.status_code, {}, response.headers
+                    return response.status_code, response_json(response, trim), response.headers
+                # In this call's context, so the request shows up in its trace
+                return await loop.run_in_executor(None, contextvars.copy_context().run, fetch)
+
+            # The same retry, backoff and breaker policy as the pooled client
+            attempts = self.fetcher.http.attempts(url)
+            while True:
+                attempts.before_send()
+                try:
+                    status, payload, response_headers = await self._send(url, params, headers, trim, attempts.limiter)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    delay = attempts.failed(e)
+                else:
+                    delay = attempts.answered(status)
+                    if delay is None:
+                        return status, payload, response_headers
+                if delay:
+                    await asyncio.sleep(delay)
+
+    async def _send(self, url, params, headers, trim, limiter):
+        """Send one aiohttp request and return (status_code, payload, headers)"""
+        if limiter is not None:
+            await self._acquire_limiter(limiter)
+        host = urlsplit(url).hostname or ""
+        try:
+            with tracer.span("http", host=host, path=urlsplit(url).path):
+                start = time.perf_counter()
+                async with self._session.get(url, params=params, headers=headers) as response:
+                    # aiohttp does not report connect and TLS apart from the headers
+                    tracer.stage("http.headers", time.perf_counter() - start)
+                    status = response.status
+                    tracer.set(status=status)
+                    streamed = status < 300 and should_stream(response.headers, trim)
+                    reader = _MeteredReader(response.content)
+                    invalid = None
+                    with tracer.span("json.decode", streamed=streamed):
+                        if status >= 300:
+                            payload = {}
+                        elif streamed:
+                            payload = await load_trimmed_async(reader, trim)
+                        else:
+                            try:
+                                payload = json.loads(await reader.read())
+                            except ValueError as e:
+                                invalid = e
+                    headers = response.headers
+                    self._meter_body(host, headers, reader)
+        finally:
+            if limiter is not None:
+                limiter.release()
+        if limiter is not None:
+            limiter.record_response(status, headers)
+        if invalid is not None:
+            # An HTML or empty page, say from a captive portal: fail the way response.json() does
+            raise requests.exceptions.JSONDecodeError(f"Invalid JSON in response body: {invalid}", "", 0) from invalid
+        return status, payload, headers
+
+    @staticmethod
+    def _meter_body(host, headers, reader):
+        """Count the wire and decoded bytes and the transfer time of a body read through reader"""
+        if not reader.decoded:
+            return
+        # aiohttp decompresses as it reads; Content-Length is what came over the wire
+        wire = int(headers.get("Content-Length") or reader.decoded)
+        metrics.incr("http.bytes_wire", wire, host)
+        metrics.incr("http.bytes_decoded", reader.decoded, host)
+        metrics.observe("http.transfer", reader.transfer, host)
+        tracer.stage("http.transfer", reader.transfer, host=host, bytes=wire)
+
+    async def _acquire_limiter(self, limiter):
+        """Wait for a concurrency slot and a token without blocking the loop"""
+        while not limiter.try_acquire_slot():
+            await asyncio.sleep(0.01)
+        wait = limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def close(self):
+        """Close the aiohttp session, if one was opened"""
+        if self._session is not None:
+            await self._session.close()
+        self._loop = None
+        self._session = None
+
+    # Public lookups share in-flight calls with every other fetcher in the process
+
+    async def search_media(self, query, media_type=None, candidates=True, page=1):
+        """
+        Search for movies or TV shows based on query
+        media_type: 'movie', 'tv', or None (for both)
+        (see MovieFetcher.search_media for the caching, candidates and pages)
+        """
+        cache_type, key = search_cache_key(query, media_type, page)
+        with metrics.timer("fetcher.search", media_type or "multi"), \
+                tracer.span("search_media", query=key, media_type=media_type or "multi", page=page):
+            cached = await self._cache(
+                self.fetcher._cached_search, cache_type, key, page,
+                lambda: self.fetcher._fetch_search_media(query, media_type, page)
+            )
+            if cached is not None:
+                return cached
+
+            if candidates and page == 1:
+                found = search_index.candidates(cache_type, key)
+                if found:
+                    metrics.incr("search.index", label="prefix")
+                    tracer.set(source="prefix")
+                    task = asyncio.ensure_future(self.search_media(query, media_type, False))
+                    self._revalidations.add(task)
+                    task.add_done_callback(self._revalidations.discard)
+                    return found
+
+            metrics.incr("search.index", label="miss")
+            tracer.set(source="network")
+            return await singleflight.do_async(
+                self.fetcher._flight_key("search", cache_type, key),
+                lambda: self._fetch_search_media(query, media_type, page)
+            )
+
+    async def search_pages(self, query, media_type=None, max_pages=None):
+        """Yield the pages of a search's results one at a time (see MovieFetcher.search_pages)"""
+        last_page = min(max_pages or SEARCH_MAX_PAGE, SEARCH_MAX_PAGE)
+        page = 1
+        ahead = None
+        while True:
+            results = await ahead if ahead else await self.search_media(query, media_type, False, page)
+            if not results:
+                return
+            ahead = None
+            if len(results) >= SEARCH_PAGE_SIZE and page < last_page:
+                ahead = asyncio.ensure_future(self.search_media(query, media_type, False, page + 1))
+            yield results
+            if ahead is None:
+                return
+            page += 1
+
+    async def get_movie_details(self, movie_id, fields=None, use_cache=True):
+        """Get detailed information about a movie from TMDB and OMDB (see MovieFetcher.get_movie_details)"""
+        plan = plan_movie(fields)
+        flight_key = self.fetcher._flight_key("movie_details", str(movie_id), plan.fields, use_cache)
+        with tracer.span("get_movie_details", id=movie_id):
+            # Stale entries are refreshed on the sync fetcher's background threads
+            if use_cache and plan.covers(MOVIE_DETAIL_FIELDS):
+                cached = await self._cache(
+                    self.fetcher._cached_details, "movie_details", movie_id, "movie",
+                    self.fetcher._movie_request(movie_id, plan), flight_key,
+                    lambda: self.fetcher._fetch_movie_details(movie_id, plan)
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and await self._cache(self.fetcher._known_missing, "movie", movie_id):
+                return {}
+            return await singleflight.do_async(
+                flight_key, lambda: self._fetch_movie_details(movie_id, plan, fallback=use_cache)
+            )
+
+    async def get_omdb_details(self, imdb_id):
+        """Get detailed information from OMDB API using IMDb ID"""
+        if not settings.get("OMDB_API_KEY", "") or not imdb_id:
+            return {}
+
+        with tracer.span("get_omdb_details", imdb_id=imdb_id):
+            if await self._cache(self.fetcher._known_missing, "omdb", imdb_id):
+                return {}
+            return await singleflight.do_async(
+                self.fetcher._flight_key("omdb", imdb_id),
+                lambda: self._fetch_omdb_details(imdb_id)
+            )
+
+    async def get_series_details(self, tv_id, include_cast=False, include_external=False, fields=None, use_cache=True):
+        """Get detailed information about a TV series (see MovieFetcher.get_series_details)"""
+        plan = plan_series(series_fields(include_cast, include_external) if fields is None else fields)
+        flight_key = self.fetcher._flight_key("series_details", str(tv_id), plan.fields, use_cache)
+        with tracer.span("get_series_details", id=tv_id):
+            if use_cache and fields is None:
+                cached = await self._cache(
+                    self.fetcher._cached_details, "series_details", tv_id, f"series:{plan.omdb}",
+                    self.fetcher._series_request(tv_id, plan), flight_key,
+                    lambda: self.fetcher._fetch_series_details(tv_id, plan)
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and await self._cache(self.fetcher._known_missing, "tv", tv_id):
+                return {}
+            return await singleflight.do_async(
+                flight_key, lambda: self._fetch_series_details(tv_id, plan, cache=fields is None, fallback=use_cache)
+            )
+
+    async def get_series_upcoming_episodes(self, tv_id):
+        """Get more detailed information about upcoming episodes for a series"""
+        if not settings.get("TMDB_API_KEY", ""):
+            return {}
+
+        with tracer.span("get_series_upcoming_episodes", id=tv_id):
+            return await singleflight.do_async(
+                self.fetcher._flight_key("upcoming", str(tv_id)),
+                lambda: self._fetch_series_upcoming_episodes(tv_id)
+            )
+
+    async def get_series_detail_bundle(self, tv_id, include_cast=True, use_cache=True):
+        """Get the series details view's data in as few calls as possible (see MovieFetcher.get_series_detail_bundle)"""
+        plan = plan_series(series_fields(include_cast, include_external=True, episodes=True))
+        flight_key = self.fetcher._flight_key("series_bundle", str(tv_id), plan.fields, use_cache)
+        with tracer.span("get_series_detail_bundle", id=tv_id):
+            if use_cache:
+                cached = await self._cache(
+                    self.fetcher._cached_details, "series_details", tv_id, "series_bundle",
+                    self.fetcher._series_request(tv_id, plan), flight_key,
+                    lambda: self.fetcher._fetch_series_detail_bundle(tv_id, plan)
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and await self._cache(self.fetcher._known_missing, "tv", tv_id):
+                return {}
+            return await singleflight.do_async(
+                flight_key, lambda: self._fetch_series_detail_bundle(tv_id, plan, fallback=use_cache)
+            )
+
+    async def _fetch_search_media(self, query, media_type=None, page=1):
+        """Search TMDB without coalescing (see search_media)"""
+        cache_type, key = search_cache_key(query, media_type, page)
+        if settings.is_offline_mode():
+            return await self._cache(self.fetcher._load_from_cache, cache_type, key) or []
+
+        if not settings.get("TMDB_API_KEY", ""):
+            tracer.event("TMDB API key is missing")
+            return []
+
+        endpoint, params = self.fetcher._search_request(query, media_type, page)
+        try:
+            status, response_data = await self._get_json(endpoint, params)
+        except self.network_errors as e:
+            tracer.event(f"Error searching for media: {e}")
+            return await self._cache(self.fetcher._load_fallback, cache_type, key, [])
+
+        if status >= 400:
+            tracer.event(f"Search failed with status {status}")
+            return await self._cache(self.fetcher._load_fallback, cache_type, key, []) if status in RETRYABLE_STATUSES else []
+
+        if 'success' in response_data and response_data['success'] is False:
+            tracer.event(f"API Error: {response_data.get('status_message', 'Unknown API error')}")
+            return []
+
+        with metrics.timer("fetcher.format", "search"), tracer.span("format", kind="search"):
+            formatted_results = self.fetcher._format_search_results(response_data.get("results", []), media_type)
+        await self._cache(self.fetcher._save_search, cache_type, key, formatted_results, page)
+        return formatted_results
+
+    async def _fetch_omdb_details(self, imdb_id):
+        """Fetch OMDB details without coalescing (see get_omdb_details)"""
+        try:
+            status, omdb_data = await self._get_json(self.fetcher.omdb_base_url, self.fetcher._omdb_params(imdb_id))
+        except self.network_errors as e:
+            tracer.event(f"Error fetching from OMDB: {e}")
+            return {}
+
+        if status >= 400:
+            tracer.event(f"OMDB request failed with status {status}")
+            if status == 404:
+                await self._cache(self.fetcher._remember_missing, "omdb", imdb_id, "OMDB 404")
+            return {}
+        return await self._cache(self.fetcher._check_omdb_data, omdb_data, imdb_id)
+
+    async def _fetch_movie_details(self, movie_id, plan, fallback=True):
+        """Fetch movie details without coalescing (see get_movie_details)"""
+        if settings.is_offline_mode():
+            return await self._cache(self.fetcher._load_from_cache, "movie_details", str(movie_id)) or {}
+
+        cache = plan.covers(MOVIE_DETAIL_FIELDS)
+        tmdb_endpoint, params = self.fetcher._movie_request(movie_id, plan)
+        try:
+            status, tmdb_data, validators, cache_entry = await self._get_revalidated(
+                "movie_details", str(movie_id), "movie", tmdb_endpoint, params, self.fetcher._movie_trim(plan), cache
+            )
+        except self.network_errors as e:
+            tracer.event(f"Error fetching movie details: {e}")
+            return await self._cache(self.fetcher._load_fallback, "movie_details", str(movie_id), {}, fallback)
+
+        if status == 304:
+            return await self._cache(self.fetcher._revalidated, "movie_details", str(movie_id), cache_entry)
+
+        if status >= 400:
+            tracer.event(f"Movie details for ID {movie_id} failed with status {status}")
+            if status == 404:
+                await self._cache(self.fetcher._remember_missing, "movie", str(movie_id), "TMDB 404")
+            if status in RETRYABLE_STATUSES:
+                return await self._cache(self.fetcher._load_fallback, "movie_details", str(movie_id), {}, fallback)
+            return {}
+
+        # The OMDB lookup depends on the IMDb ID from the TMDB response
+        omdb_data = await self.get_omdb_details(tmdb_data.get("imdb_id")) if plan.omdb else {}
+
+        with metrics.timer("fetcher.format", "movie"), tracer.span("format", kind="movie"):
+            result = self.fetcher._format_movie_details(tmdb_data, omdb_data)
+        if cache:
+            await self._cache(self.fetcher._save_to_cache, "movie_details", str(movie_id), result, validators)
+        return result
+
+    async def _fetch_series_details(self, tv_id, plan, cache=True, fallback=True):
+        """Fetch series details without coalescing (see get_series_details)"""
+        if settings.is_offline_mode():
+            return await self._cache(self.fetcher._load_from_cache, "series_details", str(tv_id)) or {}
+
+        tmdb_endpoint, params = self.fetcher._series_request(tv_id, plan)
+        try:
+            status, tmdb_data, validators, cache_entry = await self._get_revalidated(
+                "series_details", str(tv_id), f"series:{plan.omdb}", tmdb_endpoint, params,
+                self.fetcher._series_trim(plan), cache
+            )
+        except self.network_errors as e:
+            tracer.event(f"Error fetching TV details: {e}")
+            return await self._cache(self.fetcher._load_fallback, "series_details", str(tv_id), {}, fallback)
+
+        if status == 304:
+            return await self._cache(self.fetcher._revalidated, "series_details", str(tv_id), cache_entry)
+
+        if status >= 400:
+            tracer.event(f"TV details for ID {tv_id} failed with status {status}")
+            if status == 404:
+                await self._cache(self.fetcher._remember_missing, "tv", str(tv_id), "TMDB 404")
+            if status in RETRYABLE_STATUSES:
+                return await self._cache(self.fetcher._load_fallback, "series_details", str(tv_id), {}, fallback)
+            return {}
+
+        omdb_data = {}
+        if plan.omdb:
+            omdb_data = await self.get_omdb_details(tmdb_data.get("external_ids", {}).get("imdb_id"))
+
+        with metrics.timer("fetcher.format", "series"), tracer.span("format", kind="series"):
+            result = self.fetcher._format_series_details(tmdb_data, omdb_data, "cast" in plan.fields)
+        if cache:
+            await self._cache(self.fetcher._save_to_cache, "series_details", str(tv_id), result, validators)
+        return result
+
+    async def _fetch_series_upcoming_episodes(self, tv_id):
+        """Fetch upcoming episodes without coalescing (see get_series_upcoming_episodes)"""
+        try:
+            series_endpoint = f"{self.fetcher.tmdb_base_url}/tv/{tv_id}"
+            # next_episode_to_air is part of the base resource
+            params = {"api_key": settings.get("TMDB_API_KEY", "")}
+            status, series_data = await self._get_json(series_endpoint, params)
+            next_episode = series_data.get("next_episode_to_air")
+            current_season = next_episode.get("season_number") if next_episode else None
+        except self.network_errors as e:
+            tracer.event(f"Error fetching upcoming episodes: {e}")
+            return {}
+
+        if status >= 400:
+            return {}
+        return await self._fetch_season_upcoming(tv_id, current_season)
+
+    async def _fetch_series_detail_bundle(self, tv_id, plan, fallback=True):
+        """Fetch the series detail bundle without coalescing (see get_series_detail_bundle)"""
+        if settings.is_offline_mode():
+            return await self._cache(self.fetcher._load_from_cache, "series_details", str(tv_id)) or {}
+
+        tmdb_endpoint, params = self.fetcher._series_request(tv_id, plan)
+        try:
+            status, tmdb_data, validators, cache_entry = await self._get_revalidated(
+                "series_details", str(tv_id), "series_bundle", tmdb_endpoint, params,
+                self.fetcher._series_trim(plan)
+            )
+        except self.network_errors as e:
+            tracer.event(f"Error fetching TV details: {e}")
+            return await self._cache(self.fetcher._load_fallback, "series_details", str(tv_id), {}, fallback)
+
+        # An unchanged series payload means the cached bundle is still current
+        if status == 304:
+            return await self._cache(self.fetcher._revalidated, "series_details", str(tv_id), cache_entry)
+
+        if status >= 400:
+            tracer.event(f"TV details for ID {tv_id} failed with status {status}")
+            if status == 404:
+                await self._cache(self.fetcher._remember_missing, "tv", str(tv_id), "TMDB 404")
+            if status in RETRYABLE_STATUSES:
+                return await self._cache(self.fetcher._load_fallback, "series_details", str(tv_id), {}, fallback)
+            return {}
+
+        # OMDB and the season in progress only depend on the series payload
+        imdb_id = tmdb_data.get("external_ids", {}).get("imdb_id")
+        current_season = (tmdb_data.get("next_episode_to_air") or {}).get("season_number")
+        omdb_data, upcoming = await asyncio.gather(
+            self.get_omdb_details(imdb_id if plan.omdb else None),
+            self._fetch_season_upcoming(tv_id, current_season if plan.season else None)
+        )
+
+        with metrics.timer("fetcher.format", "series"), tracer.span("format", kind="series"):
+            result = self.fetcher._format_series_details(tmdb_data, omdb_data, "cast" in plan.fields)
+        result.update(upcoming)
+        await self._cache(self.fetcher._save_to_cache, "series_details", str(tv_id), result, validators)
+        return result
+
+    async def _get_revalidated(self, cache_type, query, variant, endpoint, params, trim=None, cache=True):
+        """
+        GET a TMDB resource, revalidating its cache entry if it has validators
+
+        Returns (status_code, payload, validators, cache_entry); a 304 status
+        means the cache entry is still current. With cache=False the entry is
+        neither read nor revalidated.
+        """
+        cache_entry = await self._cache(self.fetcher._load_cache_entry, cache_type, query) if cache else None
+        validator_key = self.fetcher._validator_key(variant, endpoint, params)
+        headers = self.fetcher._conditional_headers(cache_entry, validator_key)
+        status, payload, response_headers = await self._request(endpoint, params, headers, trim)
+        validators = self.fetcher._response_validators(response_headers, validator_key)
+        return status, payload, validators, cache_entry
+
+    async def _fetch_season_upcoming(self, tv_id, season_number):
+        """Upcoming episode summary for one season, or {} if there is none"""
+        if not season_number:
+            return {}
+
+        season_endpoint = f"{self.fetcher.tmdb_base_url}/tv/{tv_id}/season/{season_number}"
+        try:
+            status, season_data = await self._get_json(season_endpoint, {"api_key": settings.get("TMDB_API_KEY", "")})
+        except self.network_errors as e:
+            tracer.event(f"Error fetching upcoming episodes: {e}")
+            return {}
+        if status >= 400:
+            return {}
+        return self.fetcher._format_upcoming_episodes(season_data, season_number)
+
+    async def gather_movie_details(self, movie_ids):
+        """Fetch details for many movies concurrently, in input order"""
+        return await asyncio.gather(*(self.get_movie_details(movie_id) for movie_id in movie_ids))
+
+    async def gather_series_details(self, tv_ids, include_cast=False, include_external=False):
+        """Fetch details for many series concurrently, in input order"""
+        return await asyncio.gather(*(
+            self.get_series_details(tv_id, include_cast, include_external) for tv_id in tv_ids
+        ))
+
+class BackgroundFetcher:
+    """
+    Synchronous facade over AsyncMovieFetcher for the Tk screens.
+
+    Runs one event loop on a daemon thread. submit() and run() schedule
+    coroutines on it and hand back concurrent.futures.Future objects, while
+    the blocking methods mirror MovieFetcher's API.
+    """
+
+    def __init__(self, fetcher=None):
+        self.fetcher = fetcher or AsyncMovieFetcher()
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        """Start the background event loop on first use"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="fetcher-loop")
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine):
+        """Schedule a coroutine on the background loop and return its Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+
+    def submit(self, method_name, *args, **kwargs):
+        """Schedule an AsyncMovieFetcher method by name and return its Future"""
+        return self.run(getattr(self.fetcher, method_name)(*args, **kwargs))
+
+    def search_media(self, query, media_type=None, candidates=True, page=1):
+        return self.submit("search_media", query, media_type, candidates, page).result()
+
+    def get_movie_details(self, movie_id, fields=None):
+        return self.submit("get_movie_details", movie_id, fields).result()
+
+    def get_omdb_details(self, imdb_id):
+        return self.submit("get_omdb_details", imdb_id).result()
+
+    def get_series_details(self, tv_id, include_cast=False, include_external=False, fields=None):
+        return self.submit("get_series_details", tv_id, include_cast, include_external, fields).result()
+
+    def get_series_upcoming_episodes(self, tv_id):
+        return self.submit("get_series_upcoming_episodes", tv_id).result()
+
+    def get_series_detail_bundle(self, tv_id, include_cast=True):
+        return self.submit("get_series_detail_bundle", tv_id, include_cast).result()
+
+    def shutdown(self):
+        """Close the async fetcher and stop the background loop"""
+        with self._lock:
+            loop = self._loop
+            self._loop = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.fetcher.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+
+# Shared background loop used by the screens
+background_fetcher = BackgroundFetcher()
@@ -0,0 +1,129 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# os.replace fails on Windows while another process has the target open
+REPLACE_ATTEMPTS = 20
+
+# Per path locks for the threads of this process
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _thread_lock(path):
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Hold the lock for path until the block ends
+
+    Other threads of this process and other processes using file_lock on
+    the same path wait for it. The lock is taken on a path + ".lock" file
+    next to it, so it doesn't matter that writes replace the file itself.
+    """
+    path = os.path.abspath(path)
+    with _thread_lock(path):
+        with open(path + ".lock", "a+b") as f:
+            if os.name == "nt":
+                f.seek(0)
+                while True:
+                    try:
+                        # Gives up after about ten seconds; keep waiting
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        pass
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == "nt":
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _fsync_directory(directory):
+    """Make a rename in directory durable; Windows has no directory handles to sync"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(source, target):
+    for attempt in range(REPLACE_ATTEMPTS):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if os.name != "nt" or attempt == REPLACE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.01 * (attempt + 1))
+
+
+def _remove_leftovers(directory, prefix):
+    """
+    Remove the temporary files of writes that were killed before the rename
+
+    Only safe while holding the file lock, when no other write to the
+    same path can be in progress.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith(".tmp"):
+                with contextlib.suppress(OSError):
+                    os.unlink(entry.path)
+
+
+def atomic_write(path, text, lock=False, encoding="utf-8"):
+    """
+    Replace the contents of path with text, all at once
+
+    The text is written to a temporary file in the same directory, synced
+    to disk and renamed over path, so readers and a crash at any point see
+    either the old contents or the new ones, never a truncated file. With
+    lock, writers to the same path also wait for each other (see file_lock)
+    and the temporary files of writers killed mid-write are cleaned up.
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    prefix = f".{os.path.basename(path)}."
+    with file_lock(path) if lock else contextlib.nullcontext():
+        if lock:
+            _remove_leftovers(directory, prefix)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=prefix, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding=encoding, newline="") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            _replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(temp_path)
+            raise
+        _fsync_directory(directory)
+
+
+def atomic_write_json(path, data, lock=False, **dump_args):
+    """Save data as JSON to path with atomic_write; dump_args go to json.dumps"""
+    atomic_write(path, json.dumps(data, **dump_args), lock=lock)
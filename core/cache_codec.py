@@ -0,0 +1,159 @@
+"""
+Compression of the values kept in the offline cache.
+
+Details entries are JSON with long cast lists and overviews, and most of
+them compress to a fraction of their size. A value is stored either as
+the JSON text itself or as bytes: a one byte tag naming the codec, then
+the compressed JSON. The tag travels with the value, so changing
+CACHE_CODEC only affects new writes and every older entry still decodes.
+
+Codecs: "none", "zlib", "gzip", "zstd" and "zstd-dict". zstd-dict
+compresses with a zstd dictionary trained on a namespace's own entries
+(see CacheStore.train_dictionary), which is what makes thousands of small,
+similar blobs compress well; its values carry the ID of the dictionary
+they need. Uses zstandard when it is installed; without it, the zstd
+codecs fall back to zlib.
+"""
+
+import gzip
+import json
+import struct
+import threading
+import zlib
+from core.settings_handler import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ("none", "zlib", "gzip", "zstd", "zstd-dict")
+
+_ZLIB = b"z"
+_GZIP = b"g"
+_ZSTD = b"s"
+# Followed by the 4 byte ID of the dictionary, then the zstd frame
+_ZSTD_DICT = b"d"
+_DICT_ID = struct.Struct(">I")
+
+class CacheCodec:
+    """
+    Encodes cache values with the configured codec and decodes any of them.
+
+    zstd compressors and decompressors are not thread safe, and a prepared
+    dictionary is costly to load, so each thread keeps its own per level
+    and dictionary.
+    """
+
+    def __init__(self, codec=None, level=None):
+        self._codec = codec
+        self._level = level
+        # Dictionary ID -> trained dictionary bytes
+        self.dictionaries = {}
+        self._local = threading.local()
+
+    @property
+    def codec(self):
+        """The codec new values are written with, zlib standing in for zstd when it isn't installed"""
+        codec = self._codec or settings.get_cache_compression()[0]
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache codec: {codec}")
+        if codec.startswith("zstd") and zstandard is None:
+            return "zlib"
+        return codec
+
+    @property
+    def level(self):
+        return self._level or settings.get_cache_compression()[1]
+
+    def encode(self, data, dictionary_id=None):
+        """
+        data as it is stored: its JSON text, or the codec tag and the
+        compressed JSON; dictionary_id is used by zstd-dict, which works
+        like zstd without one. Values compression would not shrink are
+        stored as text.
+        """
+        text = json.dumps(data)
+        codec = self.codec
+        if codec == "none":
+            return text
+
+        raw = text.encode("utf-8")
+        level = self.level
+        if codec == "zlib":
+            stored = _ZLIB + zlib.compress(raw, level)
+        elif codec == "gzip":
+            stored = _GZIP + gzip.compress(raw, level, mtime=0)
+        elif codec == "zstd-dict" and dictionary_id is not None:
+            stored = _ZSTD_DICT + _DICT_ID.pack(dictionary_id) + self._compressor(level, dictionary_id).compress(raw)
+        else:
+            stored = _ZSTD + self._compressor(level).compress(raw)
+        return stored if len(stored) < len(raw) else text
+
+    def decode_raw(self, stored):
+        """The JSON bytes of a stored value"""
+        if isinstance(stored, str):
+            return stored.encode("utf-8")
+
+        tag, body = stored[:1], stored[1:]
+        if tag == _ZLIB:
+            return zlib.decompress(body)
+        if tag == _GZIP:
+            return gzip.decompress(body)
+        if tag not in (_ZSTD, _ZSTD_DICT):
+            raise ValueError(f"Unknown cache value tag: {tag!r}")
+        if zstandard is None:
+            raise ValueError("Cache value is zstd compressed but zstandard is not installed")
+        if tag == _ZSTD:
+            return self._decompressor().decompress(body)
+        dictionary_id, = _DICT_ID.unpack_from(body)
+        if dictionary_id not in self.dictionaries:
+            raise ValueError(f"Cache value needs zstd dictionary {dictionary_id}, which is gone")
+        return self._decompressor(dictionary_id).decompress(body[_DICT_ID.size:])
+
+    def decode(self, stored):
+        """The data of a stored value"""
+        return json.loads(self.decode_raw(stored))
+
+    def train(self, samples, size):
+        """A zstd dictionary of about size bytes trained on samples (JSON bytes), or None if they don't suffice"""
+        if zstandard is None:
+            return None
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError:
+            return None
+
+    @staticmethod
+    def size(stored):
+        """Bytes a stored value takes"""
+        return len(stored) if isinstance(stored, bytes) else len(stored.encode("utf-8"))
+
+    @staticmethod
+    def codec_of(stored):
+        """The codec a stored value was written with"""
+        if isinstance(stored, str):
+            return "none"
+        return {_ZLIB: "zlib", _GZIP: "gzip", _ZSTD: "zstd", _ZSTD_DICT: "zstd-dict"}.get(stored[:1], "unknown")
+
+    def _compressor(self, level, dictionary_id=None):
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        compressor = compressors.get((level, dictionary_id))
+        if compressor is None:
+            dict_data = None
+            if dictionary_id is not None:
+                dict_data = zstandard.ZstdCompressionDict(self.dictionaries[dictionary_id])
+            compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+            compressors[(level, dictionary_id)] = compressor
+        return compressor
+
+    def _decompressor(self, dictionary_id=None):
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        decompressor = decompressors.get(dictionary_id)
+        if decompressor is None:
+            dict_data = None
+            if dictionary_id is not None:
+                dict_data = zstandard.ZstdCompressionDict(self.dictionaries[dictionary_id])
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            decompressors[dictionary_id] = decompressor
+        return decompressor
@@ -0,0 +1,585 @@
+import atexit
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from core.settings_handler import settings
+from core.metrics import metrics
+from core.memory_cache import MemoryCache
+from core.cache_codec import CacheCodec
+
+# Namespaces of the file-per-key cache whose keys survive in the file names
+# (IDs); searches were saved under mangled queries and are not imported
+_LEGACY_NAMESPACES = ("movie_details", "series_details")
+
+# SQLite allows a limited number of parameters per statement
+_BATCH = 500
+
+# Most entries a single write evicts; a lowered limit is worked down over
+# the next writes, or at once by CacheStore.enforce
+EVICT_BATCH = 32
+
+# With the zstd-dict codec, a namespace gets a dictionary of about
+# DICT_SIZE bytes once it has DICT_TRAIN_ENTRIES entries, or a quarter of
+# the entry limit when that is fewer (but at least DICT_MIN_ENTRIES),
+# trained on up to DICT_SAMPLES of its latest ones
+DICT_SIZE = 32 * 1024
+DICT_TRAIN_ENTRIES = 256
+DICT_MIN_ENTRIES = 16
+DICT_SAMPLES = 2000
+
+# Victims first, per eviction policy
+_EVICTION_ORDER = {
+    "lru": "accessed_at",
+    "lfu": "hits, accessed_at",
+    "size": "size DESC, accessed_at"
+}
+
+# Bookkeeping columns come before the data, so sizing or expiring the cache
+# never reads the (often overflowing) data pages
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    validators TEXT,
+    -- JSON text, or compressed JSON bytes (see core/cache_codec.py)
+    data TEXT NOT NULL,
+    UNIQUE (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS pins (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+class CacheStore:
+    """
+    The offline cache as one SQLite database instead of a file per key.
+
+    Entries are keyed by (namespace, key), the cache_type and query the
+    fetchers already use, and keep the JSON data, the HTTP validators it was
+    served with, when it was saved, its size and how often it was read, so
+    the cache can be listed, sized and expired with a query.
+
+    The database runs in WAL mode: readers never wait for the writer, and
+    each thread gets its own connection. Hits are counted in memory and
+    written in batches, so a read stays a single SELECT.
+
+    The cache is kept within OFFLINE_CACHE_SIZE entries and, if set,
+    OFFLINE_CACHE_MAX_BYTES: every write that takes it past a limit evicts
+    a few entries, chosen by OFFLINE_CACHE_POLICY. Pinned keys, the titles
+    in the collection, are never evicted.
+
+    Entries read one at a time are also kept in a MemoryCache, so reading
+    the same entry again skips SQLite and JSON parsing. Writes go through
+    to both tiers and deletes and evictions drop the memory copy; batch
+    reads use the memory tier but don't fill it, so loading a whole
+    collection doesn't push out what the screens are using.
+
+    Values are compressed with CACHE_CODEC at CACHE_COMPRESSION_LEVEL (see
+    CacheCodec), and entry sizes and the byte limit count the compressed
+    bytes. The zstd dictionaries of the zstd-dict codec are kept in the
+    database too.
+    """
+
+    def __init__(self, path=None, flush_every=512, max_entries=None, max_bytes=None, policy=None, memory=None,
+                 codec=None):
+        self._path = path
+        self.memory = memory or MemoryCache()
+        self.codec = codec or CacheCodec()
+        self.flush_every = flush_every
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Writes go one at a time, so the running totals stay exact and
+        # threads queue here rather than in SQLite's sleeping busy handler
+        self._write_lock = threading.RLock()
+        self._ready = False
+        # (namespace, key) -> hits not yet written, and when the last one was
+        self._hits = Counter()
+        self._accessed = {}
+        # Entries and bytes in the database
+        self._entries = 0
+        self._bytes = 0
+        # Writes so far; a read only fills the memory tier if none happened meanwhile
+        self._writes = 0
+        # Namespace -> ID of its latest zstd dictionary, and writes toward
+        # training one for namespaces without
+        self._dictionary_ids = {}
+        self._untrained = {}
+
+    @property
+    def path(self):
+        """Absolute path of the database, fixed once it is first opened"""
+        if self._path is None:
+            self._path = settings.get_cache_db_path()
+        return os.path.abspath(self._path)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        path = self.path
+        with self._lock:
+            self._path = path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            if not self._ready:
+                conn.executescript(_SCHEMA)
+                self._ready = True
+                for dictionary_id, namespace, dictionary in conn.execute(
+                    "SELECT id, namespace, data FROM dictionaries ORDER BY id"
+                ):
+                    self.codec.dictionaries[dictionary_id] = dictionary
+                    self._dictionary_ids[namespace] = dictionary_id
+                self._import_files(conn, Path(path).parent)
+                self._entries, self._bytes = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()
+        self._local.conn = conn
+        return conn
+
+    def _entry(self, data, validators, created_at):
+        entry = {
+            "timestamp": datetime.datetime.fromtimestamp(created_at).isoformat(),
+            "data": self.codec.decode(data)
+        }
+        if validators:
+            entry["validators"] = json.loads(validators)
+        return entry
+
+    def _hit(self, namespace, key):
+        with self._lock:
+            self._hits[(namespace, key)] += 1
+            self._accessed[(namespace, key)] = time.time()
+            due = len(self._hits) >= self.flush_every
+        if due:
+            self.flush()
+
+    def limits(self):
+        """The (policy, max entries, max bytes) the cache is kept within; 0 means no limit"""
+        policy, max_bytes = settings.get_cache_eviction_settings()
+        return (
+            self.policy or policy,
+            self.max_entries or settings.get_offline_cache_size(),
+            self.max_bytes or max_bytes
+        )
+
+    def get(self, namespace, key):
+        """The entry (timestamp, data and validators) for key, or None"""
+        entry = self.memory.get(namespace, key)
+        if entry is not None:
+            self._hit(namespace, key)
+            return entry
+
+        writes = self._writes
+        row = self._connect().execute(
+            "SELECT data, validators, created_at FROM entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        if row is None:
+            metrics.incr("cache.misses", label=namespace)
+            return None
+        metrics.incr("cache.hits", label=namespace)
+        self._hit(namespace, key)
+        entry = self._entry(*row)
+        with self._write_lock:
+            # A write since the SELECT may have put a newer entry in memory
+            if self._writes == writes:
+                self.memory.put(namespace, key, entry)
+        return entry
+
+    def get_many(self, namespace, keys):
+        """The entries for every key in keys that is cached, by key"""
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self.memory.get(namespace, key)
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = entry
+                self._hit(namespace, key)
+        keys = missing
+
+        conn = self._connect()
+        from_disk = {}
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            rows = conn.execute(
+                f"SELECT key, data, validators, created_at FROM entries "
+                f"WHERE namespace = ? AND key IN ({','.join('?' * len(batch))})",
+                [namespace, *batch]
+            )
+            for key, data, validators, created_at in rows:
+                from_disk[key] = self._entry(data, validators, created_at)
+        metrics.incr("cache.hits", len(from_disk), label=namespace)
+        metrics.incr("cache.misses", len(keys) - len(from_disk), label=namespace)
+        for key in from_disk:
+            self._hit(namespace, key)
+        found.update(from_disk)
+        return found
+
+    def present(self, namespace, keys):
+        """The keys among keys that are cached, without counting a hit"""
+        keys = list(keys)
+        present = set()
+        conn = self._connect()
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            rows = conn.execute(
+                f"SELECT key FROM entries WHERE namespace = ? AND key IN ({','.join('?' * len(batch))})",
+                [namespace, *batch]
+            )
+            present.update(key for key, in rows)
+        return present
+
+    def put(self, namespace, key, data, validators=None, timestamp=None):
+        """
+        Save data for key, replacing any entry it had, and evict what the
+        limits no longer leave room for; returns its size in bytes
+        """
+        encoded = self.codec.encode(data, self._dictionary_ids.get(namespace))
+        size = CacheCodec.size(encoded)
+        now = time.time()
+        created_at = timestamp or now
+        conn = self._connect()
+        with self._write_lock:
+            self._writes += 1
+            old = conn.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO entries (namespace, key, data, validators, created_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET data = excluded.data, "
+                "validators = excluded.validators, created_at = excluded.created_at, size = excluded.size",
+                (
+                    namespace, key, encoded, json.dumps(validators) if validators else None,
+                    created_at, now, size
+                )
+            )
+            self.memory.put(namespace, key, {
+                "timestamp": datetime.datetime.fromtimestamp(created_at).isoformat(),
+                "data": data,
+                "validators": validators
+            })
+            if old is None:
+                self._entries += 1
+                self._bytes += size
+            else:
+                self._bytes += size - old[0]
+            self._evict(conn, EVICT_BATCH, keep=(namespace, key))
+            train = self._count_untrained(conn, namespace)
+        # Training takes a while, and other writers need not wait for it
+        if train:
+            self.train_dictionary(namespace)
+        return size
+
+    def delete(self, namespace, key):
+        """Forget the entry for key"""
+        with self._lock:
+            self._hits.pop((namespace, key), None)
+            self._accessed.pop((namespace, key), None)
+        conn = self._connect()
+        with self._write_lock:
+            self._writes += 1
+            self.memory.delete(namespace, key)
+            row = conn.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._entries -= 1
+                self._bytes -= row[0]
+
+    def clear(self, namespace=None):
+        """Forget every entry, or those of one namespace; pins are kept"""
+        with self._lock:
+            self._hits.clear()
+            self._accessed.clear()
+        conn = self._connect()
+        with self._write_lock:
+            self._writes += 1
+            self.memory.clear(namespace)
+            if namespace is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+            self._entries, self._bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+
+    def set_pinned(self, namespace, keys):
+        """Make keys the pinned keys of namespace: they are never evicted, cached yet or not"""
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM pins WHERE namespace = ?", (namespace,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO pins (namespace, key) VALUES (?, ?)",
+                    [(namespace, key) for key in keys]
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _count_untrained(self, conn, namespace):
+        """
+        Count a write to namespace; True once it has enough entries to train
+        a zstd dictionary on, if zstd-dict is in use. Call with the write lock held.
+        """
+        if self.codec.codec != "zstd-dict" or namespace in self._dictionary_ids:
+            return False
+        count = self._untrained.get(namespace)
+        if count is None:
+            count = conn.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+        else:
+            count += 1
+        self._untrained[namespace] = count
+        max_entries = self.limits()[1]
+        needed = min(DICT_TRAIN_ENTRIES, max(DICT_MIN_ENTRIES, max_entries // 4)) if max_entries else DICT_TRAIN_ENTRIES
+        if count < needed:
+            return False
+        # If the entries don't make a dictionary, try again as many writes later
+        self._untrained[namespace] = 0
+        return True
+
+    def train_dictionary(self, namespace, size=DICT_SIZE):
+        """
+        Train a zstd dictionary on the latest entries of namespace, which
+        the zstd-dict codec compresses its entries with from now on; older
+        entries keep the dictionary they were written with. Returns the
+        dictionary's ID, or None if zstandard is missing or the entries
+        are too few to train on.
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT data FROM entries WHERE namespace = ? ORDER BY created_at DESC LIMIT ?",
+            (namespace, DICT_SAMPLES)
+        ).fetchall()
+        samples = []
+        for stored, in rows:
+            try:
+                samples.append(self.codec.decode_raw(stored))
+            except Exception as e:
+                print(f"Error reading cache entry for training: {e}")
+        dictionary = self.codec.train(samples, size)
+        if dictionary is None:
+            return None
+
+        with self._write_lock:
+            dictionary_id = conn.execute(
+                "INSERT INTO dictionaries (namespace, created_at, data) VALUES (?, ?, ?)",
+                (namespace, time.time(), dictionary)
+            ).lastrowid
+            self.codec.dictionaries[dictionary_id] = dictionary
+            self._dictionary_ids[namespace] = dictionary_id
+        return dictionary_id
+
+    def recompress(self, namespace=None):
+        """
+        Write every entry, or those of one namespace, again with the current
+        codec, level and dictionaries; returns (entries, bytes before, bytes after)
+        """
+        conn = self._connect()
+        query = "SELECT rowid FROM entries"
+        args = ()
+        if namespace is not None:
+            query += " WHERE namespace = ?"
+            args = (namespace,)
+        rowids = [rowid for rowid, in conn.execute(query, args).fetchall()]
+
+        before = after = 0
+        for start in range(0, len(rowids), _BATCH):
+            batch = rowids[start:start + _BATCH]
+            # Read and rewrite under the write lock, so a concurrent save isn't overwritten
+            with self._write_lock:
+                updates = []
+                for rowid, entry_namespace, stored, size in conn.execute(
+                    f"SELECT rowid, namespace, data, size FROM entries WHERE rowid IN ({','.join('?' * len(batch))})",
+                    batch
+                ):
+                    encoded = self.codec.encode(self.codec.decode(stored), self._dictionary_ids.get(entry_namespace))
+                    updates.append((encoded, CacheCodec.size(encoded), rowid))
+                    before += size
+                    after += CacheCodec.size(encoded)
+                    self._bytes += CacheCodec.size(encoded) - size
+                conn.executemany("UPDATE entries SET data = ?, size = ? WHERE rowid = ?", updates)
+        return len(rowids), before, after
+
+    def enforce(self):
+        """Evict until the cache is within its limits, e.g. after they were lowered; returns the entries evicted"""
+        conn = self._connect()
+        evicted = 0
+        with self._write_lock:
+            while True:
+                batch = self._evict(conn, _BATCH)
+                evicted += batch
+                if not batch:
+                    return evicted
+
+    def _evict(self, conn, most, keep=None):
+        """Evict up to most unpinned entries while the cache is over a limit; returns how many"""
+        policy, max_entries, max_bytes = self.limits()
+        over_entries = self._entries - max_entries if max_entries else 0
+        over_bytes = self._bytes - max_bytes if max_bytes else 0
+        if over_entries <= 0 and over_bytes <= 0:
+            return 0
+
+        order = _EVICTION_ORDER.get(policy)
+        if order is None:
+            raise ValueError(f"Unknown cache eviction policy: {policy}")
+        if policy != "size":
+            # Recent hits decide the order too
+            self.flush()
+
+        keep_namespace, keep_key = keep or (None, None)
+        candidates = conn.execute(
+            f"SELECT rowid, namespace, key, size FROM entries AS e "
+            f"WHERE NOT EXISTS (SELECT 1 FROM pins AS p WHERE p.namespace = e.namespace AND p.key = e.key) "
+            f"AND NOT (namespace IS ? AND key IS ?) "
+            f"ORDER BY {order} LIMIT ?",
+            (keep_namespace, keep_key, most)
+        ).fetchall()
+
+        victims = []
+        freed = 0
+        for rowid, namespace, key, size in candidates:
+            if len(victims) >= over_entries and freed >= over_bytes:
+                break
+            victims.append((rowid,))
+            freed += size
+            self.memory.delete(namespace, key)
+        if not victims:
+            return 0
+
+        self._writes += 1
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", victims)
+        self._entries -= len(victims)
+        self._bytes -= freed
+        metrics.incr("cache.evictions", len(victims), label=policy)
+        return len(victims)
+
+    def entries(self, namespace=None):
+        """(namespace, key, entry) for every entry, or those of one namespace"""
+        query = "SELECT namespace, key, data, validators, created_at FROM entries"
+        args = ()
+        if namespace is not None:
+            query += " WHERE namespace = ?"
+            args = (namespace,)
+        for entry_namespace, key, data, validators, created_at in self._connect().execute(query, args).fetchall():
+            yield entry_namespace, key, self._entry(data, validators, created_at)
+
+    def stored(self, namespace=None):
+        """(namespace, key, value) for every entry, or those of one namespace, the value as kept on disk"""
+        query = "SELECT namespace, key, data FROM entries"
+        args = ()
+        if namespace is not None:
+            query += " WHERE namespace = ?"
+            args = (namespace,)
+        yield from self._connect().execute(query, args).fetchall()
+
+    def stats(self):
+        """Entries, bytes, hits and pinned entries per namespace"""
+        self.flush()
+        rows = self._connect().execute(
+            "SELECT namespace, COUNT(*), SUM(size), SUM(hits), "
+            "SUM(EXISTS (SELECT 1 FROM pins AS p WHERE p.namespace = e.namespace AND p.key = e.key)) "
+            "FROM entries AS e GROUP BY namespace ORDER BY namespace"
+        )
+        return {
+            namespace: {"entries": count, "bytes": size, "hits": hits, "pinned": pinned}
+            for namespace, count, size, hits, pinned in rows
+        }
+
+    def totals(self):
+        """(entries, bytes) in the whole cache"""
+        self._connect()
+        return self._entries, self._bytes
+
+    def flush(self):
+        """Write the hits counted since the last flush"""
+        with self._lock:
+            if not self._hits:
+                return
+            updates = [
+                (count, self._accessed[entry], entry[0], entry[1])
+                for entry, count in self._hits.items()
+            ]
+            self._hits.clear()
+            self._accessed.clear()
+        try:
+            conn = self._connect()
+            with self._write_lock:
+                # One transaction; on its own each update commits, which costs as much as a put
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(
+                        "UPDATE entries SET hits = hits + ?, accessed_at = MAX(accessed_at, ?) "
+                        "WHERE namespace = ? AND key = ?",
+                        updates
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            # Hit counts are bookkeeping; losing some must not fail a read
+            print(f"Error saving cache hits: {e}")
+
+    def _import_files(self, conn, cache_dir):
+        """Move details cached by the old file-per-key cache into the database"""
+        imported = 0
+        for namespace in _LEGACY_NAMESPACES:
+            for path in cache_dir.glob(f"{namespace}_*.json"):
+                key = path.stem[len(namespace) + 1:]
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                    created_at = datetime.datetime.fromisoformat(entry["timestamp"]).timestamp()
+                    encoded = self.codec.encode(entry.get("data", []))
+                    validators = entry.get("validators")
+                    conn.execute(
+                        "INSERT OR IGNORE INTO entries "
+                        "(namespace, key, data, validators, created_at, accessed_at, size) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            namespace, key, encoded, json.dumps(validators) if validators else None,
+                            created_at, created_at, CacheCodec.size(encoded)
+                        )
+                    )
+                    path.unlink()
+                    imported += 1
+                except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                    print(f"Error importing cache file {path.name}: {e}")
+        if imported:
+            print(f"Imported {imported} cached details into {self.path}")
+
+# Shared by every fetcher and the collection refresher
+cache_store = CacheStore()
+atexit.register(cache_store.flush)
@@ -0,0 +1,125 @@
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from core.settings_handler import settings
+from core.tracing import tracer
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while a host's breaker is open"""
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After failure_threshold consecutive failures (network errors or 5xx
+    responses) the breaker opens and requests fail immediately instead of
+    waiting for a timeout. Once reset_timeout has passed a single probe
+    request is let through: success closes the breaker, failure opens it
+    for another reset_timeout.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30.0):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = float(reset_timeout)
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_started = 0.0
+
+        # Monitoring counters
+        self.rejected = 0
+        self.trips = 0
+
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_started = now
+                return
+
+            # Let another probe through if the last one never reported back
+            if self.state == self.HALF_OPEN and now - self._probe_started >= self.reset_timeout:
+                self._probe_started = now
+                return
+
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (now - self.opened_at))
+            raise CircuitOpenError(f"Circuit open for {self.host}, retrying in {retry_in:.0f}s")
+
+    def is_open(self):
+        """Whether requests are currently being rejected"""
+        with self._lock:
+            return self.state == self.OPEN
+
+    def record_success(self):
+        """Close the breaker after a successful response"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Count a failure and open the breaker once the threshold is reached"""
+        with self._lock:
+            self.failures += 1
+            failures = self.failures
+            tripped = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    tripped = True
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+        if tripped:
+            tracer.event(f"Circuit opened for {self.host} after {failures} failures")
+
+    def snapshot(self):
+        """Current breaker state for monitoring"""
+        with self._lock:
+            return {
+                "host": self.host,
+                "state": self.state,
+                "failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected
+            }
+
+class CircuitBreakerRegistry:
+    """Process-wide circuit breakers, one per upstream host"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        """Get (or lazily create) the breaker for the host of a URL"""
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                failure_threshold, reset_timeout = settings.get_circuit_breaker_settings()
+                breaker = CircuitBreaker(host, failure_threshold, reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def stats(self):
+        """Snapshot of every breaker created so far"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.host: breaker.snapshot() for breaker in breakers}
+
+# Shared by every fetcher in the process
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,151 @@
+import datetime
+import json
+from pathlib import Path
+from core.settings_handler import settings
+from core.atomic_write import atomic_write_json
+from core.movie_fetcher import MovieFetcher
+
+# TMDB's /changes endpoints accept at most 14 days per query
+CHANGES_WINDOW_DAYS = 14
+
+class CollectionRefresher:
+    """
+    Incremental refresh of the cached details for the titles in the collection.
+
+    Instead of one details call per tracked title, TMDB's /movie/changes and
+    /tv/changes are asked which IDs changed since the last sync watermark and
+    only the tracked IDs among them are fetched again, along with tracked
+    titles that have no cache entry yet. When there is no watermark, or it
+    is older than the /changes window, every tracked title is refreshed.
+
+    The watermark for a media type only advances when all of its fetches
+    succeeded, so titles that failed are picked up again next time.
+    """
+
+    def __init__(self, fetcher=None, data_dir=None, state_path=None):
+        self.fetcher = fetcher or MovieFetcher()
+        data_dir = Path(data_dir or "data")
+        self.data_files = {
+            "movie": data_dir / "movies.json",
+            "tv": data_dir / "series.json"
+        }
+        self.state_path = Path(state_path or self.fetcher.cache_dir / "refresh_state.json")
+
+    def _load_state(self):
+        """Load the per media type watermarks"""
+        try:
+            if self.state_path.exists():
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading refresh state: {e}")
+        return {}
+
+    def _save_state(self, state):
+        """Persist the per media type watermarks"""
+        try:
+            atomic_write_json(self.state_path, state, indent=2)
+        except Exception as e:
+            print(f"Error saving refresh state: {e}")
+
+    def tracked_ids(self, media_type):
+        """
+        Get the TMDB IDs of the titles in the collection
+
+        Returns (ids, unlinked) where unlinked counts entries saved without a
+        TMDB ID, which can't be refreshed
+        """
+        data_file = self.data_files[media_type]
+        try:
+            with open(data_file, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return [], 0
+
+        ids = []
+        unlinked = 0
+        for item in items:
+            tmdb_id = item.get("tmdb_id")
+            if tmdb_id is None:
+                unlinked += 1
+            elif tmdb_id not in ids:
+                ids.append(tmdb_id)
+        return ids, unlinked
+
+    def _cache_type(self, media_type):
+        return "movie_details" if media_type == "movie" else "series_details"
+
+    def plan(self, media_type, tracked, watermark, now):
+        """
+        Decide which tracked IDs to fetch again
+
+        Returns (ids, full) where full is True when the whole collection is
+        refreshed because there is no usable watermark
+        """
+        since = datetime.datetime.fromisoformat(watermark) if watermark else None
+        if since is None or now - since > datetime.timedelta(days=CHANGES_WINDOW_DAYS):
+            return list(tracked), True
+
+        # Titles added since the last refresh have nothing cached yet
+        cache_type = self._cache_type(media_type)
+        cached = self.fetcher.cache.present(cache_type, [str(tmdb_id) for tmdb_id in tracked])
+        missing = {tmdb_id for tmdb_id in tracked if str(tmdb_id) not in cached}
+
+        changed = self.fetcher.get_changed_ids(media_type, since.date(), now.date())
+        return [tmdb_id for tmdb_id in tracked if tmdb_id in changed or tmdb_id in missing], False
+
+    def _fetch(self, media_type, ids):
+        """
+        Fetch details for ids from TMDB; returns the number that failed
+
+        With use_cache False the fetchers neither answer from the cache nor
+        fall back to it when TMDB can't be reached, so an outage counts as
+        failures and the watermark stays put
+        """
+        if media_type == "movie":
+            results = self.fetcher.get_movie_details_many(ids, ordered=False, use_cache=False)
+        else:
+            results = self.fetcher.get_series_details_many(
+                ids, include_cast=True, ordered=False, use_cache=False, bundle=True
+            )
+
+        failed = 0
+        for _, details, error in results:
+            if error is not None or not details:
+                failed += 1
+        return failed
+
+    def refresh(self):
+        """
+        Refresh the cached details of changed titles
+
+        Returns a summary per media type: tracked, unlinked, refreshed and
+        failed counts, and whether a full refresh was needed
+        """
+        if settings.is_offline_mode():
+            raise RuntimeError("Cache refresh is not available in offline mode")
+        if not settings.get("TMDB_API_KEY", ""):
+            raise RuntimeError("TMDB API key is missing")
+
+        state = self._load_state()
+        summary = {}
+        for media_type in ("movie", "tv"):
+            # Take the watermark before asking for changes, so anything that
+            # changes while this refresh runs is picked up next time
+            started_at = datetime.datetime.now(datetime.timezone.utc)
+            tracked, unlinked = self.tracked_ids(media_type)
+            ids, full = self.plan(media_type, tracked, state.get(media_type), started_at)
+            failed = self._fetch(media_type, ids) if ids else 0
+
+            if failed == 0:
+                state[media_type] = started_at.isoformat()
+                self._save_state(state)
+
+            summary[media_type] = {
+                "tracked": len(tracked),
+                "unlinked": unlinked,
+                "refreshed": len(ids) - failed,
+                "failed": failed,
+                "full": full
+            }
+        return summary
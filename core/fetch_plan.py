@@ -0,0 +1,142 @@
+"""
+Request planning for TMDB details.
+
+Every field of the movie and series details dictionaries comes from the base
+TMDB resource, an append_to_response sub-resource, OMDB, or the season
+endpoint. Callers name the fields they need and plan_movie / plan_series
+return the smallest set of appends and extra calls that supplies them, so
+nothing is downloaded that no field reads.
+"""
+
+# Sources a field needs beyond the base resource. "omdb" and "season" are
+# separate calls; anything else is an append_to_response name.
+OMDB = "omdb"
+SEASON = "season"
+
+MOVIE_FIELD_SOURCES = {
+    "title": (),
+    "runtime": (),
+    "duration": (),
+    "release_date": (),
+    "imdb_id": (),
+    "tagline": (),
+    "budget": (),
+    "revenue": (),
+    # OMDB fills in a second genre when TMDB lists only one
+    "genres": (OMDB,),
+    # Both fall back to OMDB when TMDB credits are empty
+    "director": ("credits", OMDB),
+    "cast": ("credits", OMDB),
+    "imdb_rating": (OMDB,),
+    "rt_rating": (OMDB,),
+    "combined_rating": (OMDB,)
+}
+
+# Series genres, creator and cast use OMDB as a fallback only when it was
+# fetched for the ratings anyway; next_episode_to_air and last_episode_to_air
+# are part of the base /tv/{id} resource, not appends
+SERIES_FIELD_SOURCES = {
+    "title": (),
+    "name": (),
+    "number_of_seasons": (),
+    "number_of_episodes": (),
+    "genres": (),
+    "creator": (),
+    "first_air_date": (),
+    "poster_path": (),
+    "overview": (),
+    "status": (),
+    "is_finished": (),
+    "upcoming_episode": (),
+    "upcoming_date": (),
+    "last_episode": (),
+    "network": (),
+    "imdb_id": ("external_ids",),
+    # aggregate_credits covers every season, so credits adds nothing to it
+    "cast": ("aggregate_credits",),
+    "imdb_rating": ("external_ids", OMDB),
+    "rt_rating": ("external_ids", OMDB),
+    "days_until": (SEASON,),
+    "future_episodes": (SEASON,),
+    "season_in_progress": (SEASON,),
+    "upcoming_episodes": (SEASON,)
+}
+
+MOVIE_DETAIL_FIELDS = frozenset(MOVIE_FIELD_SOURCES)
+
+# What get_series_details returns without cast or OMDB data
+SERIES_BASE_FIELDS = frozenset(
+    field for field, sources in SERIES_FIELD_SOURCES.items()
+    if set(sources) <= {"external_ids"}
+)
+SERIES_RATING_FIELDS = frozenset({"imdb_rating", "rt_rating"})
+SERIES_EPISODE_FIELDS = frozenset(
+    field for field, sources in SERIES_FIELD_SOURCES.items() if SEASON in sources
+)
+SERIES_DETAIL_FIELDS = frozenset(SERIES_FIELD_SOURCES)
+
+class FetchPlan:
+    """The appends and extra calls needed to produce a set of detail fields"""
+
+    def __init__(self, fields, appends, omdb=False, season=False):
+        self.fields = frozenset(fields)
+        self.appends = frozenset(appends)
+        self.omdb = omdb
+        self.season = season
+
+    @property
+    def append_to_response(self):
+        """The append_to_response parameter, in a stable order so it can key validators"""
+        return ",".join(sorted(self.appends))
+
+    def endpoints(self):
+        """Names of the calls the plan makes, the TMDB details resource first"""
+        endpoints = ["tmdb"]
+        if self.omdb:
+            endpoints.append(OMDB)
+        if self.season:
+            endpoints.append(SEASON)
+        return endpoints
+
+    def covers(self, fields):
+        """Whether the plan fetches everything fields need"""
+        return self.fields >= frozenset(fields)
+
+    def __repr__(self):
+        return f"FetchPlan(append_to_response={self.append_to_response!r}, endpoints={self.endpoints()})"
+
+def _plan(sources, fields):
+    unknown = set(fields) - set(sources)
+    if unknown:
+        raise ValueError(f"Unknown details fields: {', '.join(sorted(unknown))}")
+
+    needed = set()
+    for field in fields:
+        needed.update(sources[field])
+    omdb = OMDB in needed
+    season = SEASON in needed
+    needed -= {OMDB, SEASON}
+    return FetchPlan(fields, needed, omdb, season)
+
+def plan_movie(fields=None):
+    """Plan a movie details fetch for fields (all of them by default)"""
+    return _plan(MOVIE_FIELD_SOURCES, MOVIE_DETAIL_FIELDS if fields is None else fields)
+
+def plan_series(fields=None):
+    """Plan a series details fetch for fields (all of them by default)"""
+    plan = _plan(SERIES_FIELD_SOURCES, SERIES_DETAIL_FIELDS if fields is None else fields)
+    if plan.omdb:
+        # OMDB is looked up by the IMDb ID, which only external_ids has
+        plan.appends |= {"external_ids"}
+    return plan
+
+def series_fields(include_cast=False, include_external=False, episodes=False):
+    """The series fields the include_cast / include_external style flags stand for"""
+    fields = set(SERIES_BASE_FIELDS)
+    if include_cast:
+        fields.add("cast")
+    if include_external:
+        fields |= SERIES_RATING_FIELDS
+    if episodes:
+        fields |= SERIES_EPISODE_FIELDS
+    return frozenset(fields)
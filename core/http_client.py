@@ -0,0 +1,182 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from urllib3.util.request import ACCEPT_ENCODING
+from core.settings_handler import settings
+from core.transport import Transport
+from core.rate_limiter import rate_limiters
+from core.circuit_breaker import circuit_breakers
+from core.tracing import tracer
+
+# Server errors worth retrying; anything else is returned as-is
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+class RequestAttempts:
+    """
+    The retry policy of one GET, shared by HttpClient and AsyncMovieFetcher.
+
+    The caller sends the request however it likes, in a loop: before_send()
+    before each attempt, then failed(error) after a network error or
+    answered(status_code) after a response. Both return the seconds to wait
+    before the next attempt, or answered returns None when the response is
+    final; failed re-raises the error once retries are used up.
+    """
+
+    def __init__(self, client, url):
+        self.client = client
+        self.limiter = rate_limiters.get(url)
+        self.breaker = circuit_breakers.get(url)
+        self.retries = 0
+        self.throttles = 0
+
+    def before_send(self):
+        """Raise CircuitOpenError unless the host's breaker lets a request through"""
+        self.breaker.before_request()
+
+    def failed(self, error):
+        """Count a network error; the backoff before retrying, or raise error if out of retries"""
+        self.breaker.record_failure()
+        if self.retries >= self.client.max_retries or self.breaker.is_open():
+            raise error
+        tracer.event(f"Request to {self.breaker.host} failed ({type(error).__name__}), retrying")
+        return self._backoff()
+
+    def answered(self, status_code):
+        """None if a response with status_code is final, otherwise the seconds to wait before resending"""
+        # Throttled upstream: the limiter has already paused, just resend
+        if status_code == 429 and self.limiter is not None:
+            if self.throttles >= self.client.max_throttle_retries:
+                return None
+            self.throttles += 1
+            tracer.event(f"Rate limited by {self.limiter.host} (attempt {self.throttles})")
+            return 0.0
+
+        if status_code not in RETRYABLE_STATUSES:
+            self.breaker.record_success()
+            return None
+
+        self.breaker.record_failure()
+        if self.retries >= self.client.max_retries or self.breaker.is_open():
+            return None
+        tracer.event(f"Request to {self.breaker.host} returned {status_code}, retrying")
+        return self._backoff()
+
+    def _backoff(self):
+        delay = self.client.backoff_delay(self.retries)
+        self.retries += 1
+        return delay
+
+class HttpClient:
+    """
+    Shared HTTP transport that keeps one pooled keep-alive session per host.
+
+    Every request to the same scheme://host pair reuses an open connection
+    instead of paying for a new TCP and TLS handshake each time. Network
+    errors and 5xx responses are retried with exponential backoff and full
+    jitter, and each host has a circuit breaker so an unreachable upstream
+    fails fast instead of timing out on every call.
+    
+    What sits under the sessions is up to the transport: the live network,
+    the network with every response recorded, or a replay of recorded
+    fixtures (see core/transport.py). It defaults to the one in the settings.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, timeout=None, max_throttle_retries=3,
+                 max_retries=None, backoff=None, backoff_max=None, transport=None):
+        default_connections, default_maxsize = settings.get_http_pool_settings()
+        self.pool_connections = pool_connections or default_connections
+        self.pool_maxsize = pool_maxsize or default_maxsize
+        self.timeout = timeout or settings.get_http_timeout()
+        self.max_throttle_retries = max_throttle_retries
+
+        default_retries, default_backoff, default_backoff_max = settings.get_retry_settings()
+        self.max_retries = default_retries if max_retries is None else max_retries
+        self.backoff = default_backoff if backoff is None else backoff
+        self.backoff_max = default_backoff_max if backoff_max is None else backoff_max
+        self.transport = transport or Transport.from_settings(settings)
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _host_key(self, url):
+        """Get the scheme://host key a URL is pooled under"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _create_session(self, host_key):
+        """Create a session with a keep-alive connection pool for one host"""
+        session = requests.Session()
+        adapter = self.transport.create_adapter(self.pool_connections, self.pool_maxsize)
+        session.mount(host_key, adapter)
+        # Offer every encoding urllib3 can decode: gzip and deflate, plus br
+        # when brotli is installed
+        session.headers.update({"Connection": "keep-alive", "Accept-Encoding": ACCEPT_ENCODING})
+        return session
+
+    def get_session(self, url):
+        """Get (or lazily create) the pooled session for the host of a URL"""
+        host_key = self._host_key(url)
+        with self._lock:
+            session = self._sessions.get(host_key)
+            if session is None:
+                session = self._create_session(host_key)
+                self._sessions[host_key] = session
+            return session
+
+    def backoff_delay(self, retry):
+        """Seconds to wait before a retry (full jitter over an exponential ceiling)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** retry)))
+
+    def _send(self, session, limiter, url, params, timeout, kwargs):
+        """Send one request, taking a token from the host's rate limiter if it has one"""
+        if limiter is None:
+            return session.get(url, params=params, timeout=timeout, **kwargs)
+
+        limiter.acquire()
+        try:
+            response = session.get(url, params=params, timeout=timeout, **kwargs)
+        finally:
+            limiter.release()
+        limiter.record_response(response.status_code, response.headers)
+        return response
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """
+        Send a GET request through the pooled session for the URL's host
+
+        Raises CircuitOpenError (a requests.ConnectionError) without sending
+        anything while the host's circuit breaker is open.
+        """
+        session = self.get_session(url)
+        attempts = self.attempts(url)
+        timeout = timeout or self.timeout
+
+        while True:
+            attempts.before_send()
+            try:
+                response = self._send(session, attempts.limiter, url, params, timeout, kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = attempts.failed(e)
+            else:
+                delay = attempts.answered(response.status_code)
+                if delay is None:
+                    return response
+                response.close()
+            if delay:
+                time.sleep(delay)
+
+    def attempts(self, url):
+        """The retry policy for one GET of url (see RequestAttempts)"""
+        return RequestAttempts(self, url)
+
+    def close(self):
+        """Close all pooled sessions and their connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+# Shared transport used by every MovieFetcher and the poster loaders
+http_client = HttpClient()
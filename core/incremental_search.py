@@ -0,0 +1,129 @@
+import time
+from core.settings_handler import settings
+from core.async_movie_fetcher import background_fetcher
+from core.search_cache import search_cache_key, search_index
+from core.metrics import metrics
+
+class IncrementalSearch:
+    """
+    Search as you type for one search box.
+
+    Keystrokes are debounced, so a search only starts once typing pauses,
+    and Enter searches straight away. Every search takes a new generation
+    number; a result that comes back after a newer search started is
+    dropped instead of replacing what is on screen. The upstream call itself
+    is left to finish rather than cancelled, as singleflight may be sharing
+    it with another caller.
+
+    Results come from the shared search index first (see search_cache). A
+    query searched before is rendered from it without a request, and a
+    query extending a cached one ("ali" -> "alien") first renders the
+    cached results whose titles still match, until the exact results arrive.
+
+    The time from the keystroke that led to a render until the render is
+    done is recorded as "search.to_render", labelled with where the results
+    came from.
+
+    widget is any Tk widget, used for after(); get_query returns the text
+    in the search box. All callbacks run on the Tk thread.
+    """
+
+    def __init__(self, widget, get_query, media_type, on_results, on_error, on_searching=None,
+                 fetcher=None, debounce=None, min_chars=None):
+        self.widget = widget
+        self.get_query = get_query
+        self.media_type = media_type
+        self.on_results = on_results
+        self.on_error = on_error
+        self.on_searching = on_searching
+        self.background = fetcher or background_fetcher
+        default_debounce, default_min_chars = settings.get_search_settings()
+        self.debounce = default_debounce if debounce is None else debounce
+        self.min_chars = default_min_chars if min_chars is None else min_chars
+
+        self.generation = 0
+        self._pending = None
+        self._keystroke = None
+        self._fired_query = None
+
+    def on_key(self, event=None):
+        """Key release in the search box: search once typing pauses"""
+        if event is not None and event.keysym == "Return":
+            return
+        self._keystroke = time.perf_counter()
+        self._cancel_pending()
+        query = self._query()
+        if query == self._fired_query:
+            # Arrow keys, modifiers, or typed and deleted back again
+            return
+        if len(query) < self.min_chars:
+            # Nothing worth searching; also drops a search still in flight
+            self._fired_query = None
+            self.generation += 1
+            return
+        self._pending = self.widget.after(int(self.debounce * 1000), self._fire)
+
+    def submit(self, event=None):
+        """Enter or the search button: search now"""
+        self._keystroke = time.perf_counter()
+        self._cancel_pending()
+        if self._query():
+            self._fire()
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            self.widget.after_cancel(self._pending)
+            self._pending = None
+
+    def _query(self):
+        return self.get_query().strip()
+
+    def _fire(self):
+        self._pending = None
+        query = self._query()
+        self._fired_query = query
+        self.generation += 1
+        generation = self.generation
+        started = self._keystroke or time.perf_counter()
+        cache_type, key = search_cache_key(query, self.media_type)
+
+        cached = search_index.get(cache_type, key, settings.get_search_cache_ttl())
+        if cached is not None:
+            metrics.incr("search.cache_hits", label=self.media_type)
+            self._render(cached, query, started, "cache")
+            return
+
+        provisional = search_index.candidates(cache_type, key)
+        if provisional:
+            metrics.incr("search.prefix_hits", label=self.media_type)
+            self._render(provisional, query, started, "prefix")
+        elif self.on_searching is not None:
+            self.on_searching(query)
+
+        metrics.incr("search.requests", label=self.media_type)
+        # Candidates are already on screen if there are any; wait for the exact results
+        future = self.background.submit("search_media", query, self.media_type, candidates=False)
+
+        def done(future):
+            self.widget.after(0, lambda: self._finish(future, query, generation, started))
+
+        future.add_done_callback(done)
+
+    def _finish(self, future, query, generation, started):
+        try:
+            results = future.result()
+        except Exception as e:
+            if generation == self.generation:
+                print(f"Error searching online: {e}")
+                self.on_error(str(e))
+            return
+
+        if generation != self.generation:
+            # A newer search started while this one was in flight
+            metrics.incr("search.superseded", label=self.media_type)
+            return
+        self._render(results, query, started, "network")
+
+    def _render(self, results, query, started, source):
+        self.on_results(list(results), query)
+        metrics.observe("search.to_render", time.perf_counter() - started, f"{self.media_type} {source}")
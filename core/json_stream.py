@@ -0,0 +1,167 @@
+"""
+Streaming JSON parsing for large API responses.
+
+TMDB payloads with credits appended can run to megabytes, most of it cast
+and crew lists the formatters cut down to a handful of names. The parsers
+here walk the JSON token stream as it arrives and only build the parts that
+are kept, so the full document never exists in memory.
+
+A trim spec maps the dotted path of an array (ijson prefix syntax, e.g.
+"aggregate_credits.cast") to either a number, the count of leading items to
+keep, or a predicate deciding item by item. Everything else is kept.
+
+Uses ijson when it is installed and otherwise falls back to parsing the
+whole body.
+"""
+
+import requests
+from core.tracing import tracer
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Streaming costs two to three times the CPU of json.loads, so bodies
+# smaller than this, whose parsed form is only a few MiB, are parsed in one
+# go, and so are bodies of unknown size (chunked), which TMDB sends often
+STREAM_THRESHOLD = 1024 * 1024
+
+CHUNK_SIZE = 64 * 1024
+
+_STARTS = ("start_map", "start_array")
+_ENDS = ("end_map", "end_array")
+
+class _ChunkReader:
+    """File-like view of an iterator of byte chunks, for ijson"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def read(self, size=-1):
+        # ijson probes with read(0) to tell bytes from str
+        if size == 0:
+            return b""
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+class _Trimmer:
+    """Builds a JSON value from ijson parse events, dropping trimmed items"""
+
+    def __init__(self, trim):
+        self.trim = trim or {}
+        self.value = None
+        self._stack = []
+        self._key = None
+        self._counts = {}
+        self._skip = 0
+        # (stack depth of the list, predicate) for items being built to be tested
+        self._checks = []
+
+    def _add(self, value):
+        if not self._stack:
+            self.value = value
+        elif isinstance(self._stack[-1], list):
+            self._stack[-1].append(value)
+        else:
+            self._stack[-1][self._key] = value
+
+    def event(self, prefix, event, value):
+        if self._skip:
+            if event in _STARTS:
+                self._skip += 1
+            elif event in _ENDS:
+                self._skip -= 1
+            return
+
+        if event == "map_key":
+            self._key = value
+            return
+
+        if event in _ENDS:
+            self._stack.pop()
+            if self._checks and self._checks[-1][0] == len(self._stack):
+                _, predicate = self._checks.pop()
+                if not predicate(self._stack[-1][-1]):
+                    self._stack[-1].pop()
+            return
+
+        # Anything else starts a value; see if it is an item of a trimmed array
+        rule = None
+        if prefix == "item" or prefix.endswith(".item"):
+            rule = self.trim.get(prefix[:-5])
+
+        if isinstance(rule, int):
+            count = self._counts.get(prefix, 0) + 1
+            self._counts[prefix] = count
+            if count > rule:
+                if event in _STARTS:
+                    self._skip = 1
+                return
+            rule = None
+
+        if event in _STARTS:
+            container = {} if event == "start_map" else []
+            self._add(container)
+            if rule is not None:
+                self._checks.append((len(self._stack), rule))
+            self._stack.append(container)
+            return
+
+        self._add(value)
+        if rule is not None and not rule(value):
+            self._stack[-1].pop()
+
+def _decode_error(error):
+    """
+    A malformed or truncated streamed body as the error requests raises for
+    one it parses, so callers' RequestException handling covers both
+    """
+    return requests.exceptions.JSONDecodeError(f"Invalid JSON in streamed body: {error}", "", 0)
+
+def load_trimmed(chunks, trim=None):
+    """
+    Parse a JSON document from an iterable of byte chunks, applying a trim
+    spec; raises requests.exceptions.JSONDecodeError if it is malformed
+    """
+    trimmer = _Trimmer(trim)
+    try:
+        for prefix, event, value in ijson.parse(_ChunkReader(chunks), use_float=True):
+            trimmer.event(prefix, event, value)
+    except ijson.JSONError as e:
+        raise _decode_error(e) from e
+    return trimmer.value
+
+async def load_trimmed_async(reader, trim=None):
+    """Like load_trimmed, reading from an object with an async read(size) method"""
+    trimmer = _Trimmer(trim)
+    try:
+        async for prefix, event, value in ijson.parse_async(reader, use_float=True):
+            trimmer.event(prefix, event, value)
+    except ijson.JSONError as e:
+        raise _decode_error(e) from e
+    return trimmer.value
+
+def should_stream(headers, trim):
+    """Whether a response is worth streaming: something to trim and a known size of at least STREAM_THRESHOLD"""
+    if ijson is None or not trim:
+        return False
+    length = headers.get("Content-Length")
+    return length is not None and int(length) >= STREAM_THRESHOLD
+
+def response_json(response, trim=None):
+    """
+    Parse a requests response body, streaming it through load_trimmed when
+    it is large. Send the request with stream=True so the body is read as
+    it is parsed rather than buffered first.
+    """
+    streamed = should_stream(response.headers, trim)
+    try:
+        with tracer.span("json.decode", streamed=streamed):
+            if streamed:
+                return load_trimmed(response.iter_content(chunk_size=CHUNK_SIZE), trim)
+            return response.json()
+    finally:
+        response.close()
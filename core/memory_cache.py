@@ -0,0 +1,95 @@
+import marshal
+import threading
+from collections import OrderedDict
+from core.settings_handler import settings
+from core.metrics import metrics
+
+class MemoryCache:
+    """
+    The most recently read cache entries, kept in memory in front of the
+    cache store.
+
+    Bounded by entry count and by approximate bytes, least recently used
+    out first. Entries are kept decoded, as marshal snapshots rather than
+    JSON: every hit unmarshals its own copy, which takes about half the
+    time of parsing the JSON and means a screen editing its details can't
+    change what the next caller gets.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        # (namespace, key) -> (timestamp, validators, snapshot), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        return self._max_entries or settings.get_memory_cache_settings()[0]
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or settings.get_memory_cache_settings()[1]
+
+    def get(self, namespace, key):
+        """The entry (timestamp, data and validators) for key, or None"""
+        with self._lock:
+            cached = self._entries.get((namespace, key))
+            if cached is not None:
+                self._entries.move_to_end((namespace, key))
+        if cached is None:
+            metrics.incr("cache.memory", label="miss")
+            return None
+
+        metrics.incr("cache.memory", label="hit")
+        timestamp, validators, snapshot = cached
+        entry = {"timestamp": timestamp, "data": marshal.loads(snapshot)}
+        if validators:
+            entry["validators"] = dict(validators)
+        return entry
+
+    def put(self, namespace, key, entry):
+        """Keep a copy of entry for key, replacing what was kept for it"""
+        try:
+            snapshot = marshal.dumps(entry["data"])
+        except ValueError:
+            # Not plain JSON data; leave it to the store
+            self.delete(namespace, key)
+            return
+        max_entries, max_bytes = self.max_entries, self.max_bytes
+        if len(snapshot) > max_bytes:
+            self.delete(namespace, key)
+            return
+
+        with self._lock:
+            previous = self._entries.pop((namespace, key), None)
+            if previous is not None:
+                self._bytes -= len(previous[2])
+            self._entries[(namespace, key)] = (entry["timestamp"], entry.get("validators"), snapshot)
+            self._bytes += len(snapshot)
+            while len(self._entries) > max_entries or self._bytes > max_bytes:
+                _, (_, _, dropped) = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+
+    def delete(self, namespace, key):
+        """Forget what is kept for key"""
+        with self._lock:
+            previous = self._entries.pop((namespace, key), None)
+            if previous is not None:
+                self._bytes -= len(previous[2])
+
+    def clear(self, namespace=None):
+        """Forget every entry, or those of one namespace"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for cached in [cached for cached in self._entries if cached[0] == namespace]:
+                self._bytes -= len(self._entries.pop(cached)[2])
+
+    def totals(self):
+        """(entries, bytes) kept in memory"""
+        with self._lock:
+            return len(self._entries), self._bytes
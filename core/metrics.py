@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+class _Timing:
+    """Running totals plus a window of recent samples for percentiles"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+
+        def percentile(share):
+            return ordered[min(len(ordered) - 1, int(share * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max * 1000
+        }
+
+class MetricsRegistry:
+    """
+    Process-wide counters and timings.
+
+    Every metric has a name such as "http.bytes_wire" and is kept per label,
+    usually the upstream host or the kind of payload, so the settings screen
+    can show where time and bytes go without any extra dependency.
+    """
+
+    def __init__(self, window=512):
+        self.window = window
+        self._counters = defaultdict(Counter)
+        self._timings = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1, label=""):
+        """Add amount to a counter"""
+        with self._lock:
+            self._counters[name][label] += amount
+
+    def observe(self, name, seconds, label=""):
+        """Record one duration"""
+        with self._lock:
+            timing = self._timings[name].get(label)
+            if timing is None:
+                timing = self._timings[name][label] = _Timing(self.window)
+            timing.add(seconds)
+
+    @contextmanager
+    def timer(self, name, label=""):
+        """Record how long the with block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, label)
+
+    def stats(self):
+        """
+        Snapshot of everything recorded: {"counters": {name: {label: value}},
+        "timings": {name: {label: {count, mean_ms, p50_ms, p95_ms, max_ms}}}}
+        """
+        with self._lock:
+            return {
+                "counters": {name: dict(values) for name, values in self._counters.items()},
+                "timings": {
+                    name: {label: timing.summary() for label, timing in labels.items()}
+                    for name, labels in self._timings.items()
+                }
+            }
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+# Shared by the HTTP transport, the fetchers and the settings screen
+metrics = MetricsRegistry()
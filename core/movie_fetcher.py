@@ -1,233 +1,366 @@
 import requests
 import datetime
-import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from core.settings_handler import settings
+from core.http_client import http_client
+from core.singleflight import singleflight
+from core.metrics import metrics
+from core.tracing import tracer
+from core.cache_store import cache_store
+from core.json_stream import response_json
+from core.fetch_plan import MOVIE_DETAIL_FIELDS, plan_movie, plan_series, series_fields
+from core.search_cache import SEARCH_MAX_PAGE, SEARCH_PAGE_SIZE, search_cache_key, search_index
+
+# Exact searches run behind prefix candidates and next pages fetched ahead
+# (see MovieFetcher.search_media and search_pages)
+_search_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-background")
+
+# Refreshes of stale cache entries served meanwhile (see MovieFetcher._serve_cached),
+# by flight key so an entry is only refreshed once at a time
+_revalidate_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-revalidate")
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+# Cache namespace of lookups upstream answered as not found (see MovieFetcher._known_missing)
+NOT_FOUND_NAMESPACE = "not_found"
+# OMDB answers 200 with Response "False" for these, and for bad keys and exhausted quotas too
+_OMDB_NOT_FOUND_ERRORS = ("not found", "incorrect imdb id")
 
 class MovieFetcher:
-    def __init__(self):
-        self.tmdb_base_url = "https://api.themoviedb.org/3"
-        self.omdb_base_url = "http://www.omdbapi.com/"
+    def __init__(self, http=None, tmdb_base_url=None, omdb_base_url=None, cache=None):
+        self.tmdb_base_url = tmdb_base_url or "https://api.themoviedb.org/3"
+        self.omdb_base_url = omdb_base_url or "http://www.omdbapi.com/"
+        
+        # Pooled keep-alive transport shared by all fetchers
+        self.http = http or http_client
         
-        # Create cache directory if it doesn't exist
+        # Revalidations answered with 304 Not Modified (served from cache)
+        self.not_modified = 0
+        
+        # Offline cache, kept in one SQLite database under the cache directory
+        self.cache = cache or cache_store
         self.cache_dir = Path("data/cache")
         os.makedirs(self.cache_dir, exist_ok=True)
         
-    def _get_cache_path(self, cache_type, query):
-        """Get the path to a cache file"""
-        # Create a safe filename from the query
-        safe_query = "".join(c if c.isalnum() else "_" for c in query)
-        return self.cache_dir / f"{cache_type}_{safe_query}.json"
-        
-    def _save_to_cache(self, cache_type, query, data):
-        """Save data to cache file"""
-        try:
-            cache_path = self._get_cache_path(cache_type, query)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "timestamp": datetime.datetime.now().isoformat(),
-                    "data": data
-                }, f)
-            return True
-        except Exception as e:
-            print(f"Error saving to cache: {e}")
-            return False
+    def _save_to_cache(self, cache_type, query, data, validators=None):
+        """Save data to the cache, with the HTTP validators it was served with"""
+        with tracer.span("cache.save", namespace=cache_type):
+            try:
+                size = self.cache.put(cache_type, query, data, validators)
+                tracer.set(bytes=size)
+                return True
+            except Exception as e:
+                tracer.event(f"Error saving to cache: {e}")
+                return False
+            
+    def _load_cache_entry(self, cache_type, query):
+        """Load the whole cache entry (timestamp, data and validators)"""
+        with tracer.span("cache.lookup", namespace=cache_type):
+            try:
+                entry = self.cache.get(cache_type, query)
+                if entry is not None:
+                    tracer.set(hit=True)
+                return entry
+            except Exception as e:
+                tracer.event(f"Error loading from cache: {e}")
+                return None
             
     def _load_from_cache(self, cache_type, query):
         """Load data from cache file"""
+        cached_data = self._load_cache_entry(cache_type, query)
+        if cached_data is None:
+            return None
+        return cached_data.get("data", [])
+    
+    def _validator_key(self, variant, endpoint, params):
+        """Identify the request (minus the API key) a cache entry's validators belong to"""
+        return f"{variant}:{endpoint}|{params.get('append_to_response', '')}"
+    
+    def _conditional_headers(self, entry, validator_key):
+        """If-None-Match / If-Modified-Since headers for revalidating a cache entry"""
+        validators = (entry or {}).get("validators")
+        if not validators or validators.get("key") != validator_key or not entry.get("data"):
+            return {}
+        
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+    
+    def _response_validators(self, headers, validator_key):
+        """
+        Validators to store with a cache entry; the key is kept even when the
+        response had no ETag or Last-Modified, as it tells which request (and
+        so which shape of details) the entry came from
+        """
+        return {"key": validator_key, "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+    
+    def _revalidated(self, cache_type, query, entry):
+        """Serve a cache entry the upstream answered 304 Not Modified for"""
+        self.not_modified += 1
+        tracer.event(f"{cache_type} for '{query}' not modified, using cache")
+        self._save_to_cache(cache_type, query, entry["data"], entry.get("validators"))
+        return entry["data"]
+    
+    def _cache_ttl(self, cache_type, data):
+        """Seconds an entry of cache_type holding data is served without asking upstream"""
+        if cache_type.startswith("search_"):
+            return settings.get_search_cache_ttl()
+        movie_ttl, series_ttl, upcoming_ttl = settings.get_details_cache_ttls()
+        if cache_type == "movie_details":
+            return movie_ttl
+        if not data.get("upcoming_episode"):
+            return series_ttl
+        # Once the next episode has aired the entry no longer says what is next
         try:
-            cache_path = self._get_cache_path(cache_type, query)
-            if cache_path.exists():
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                return cached_data.get("data", [])
+            air_date = datetime.datetime.strptime(data.get("upcoming_date") or "", "%b %d, %Y").date()
+        except ValueError:
+            return upcoming_ttl
+        return upcoming_ttl if air_date >= datetime.date.today() else 0
+    
+    def _entry_timestamp(self, entry):
+        """When a cache entry was saved, in seconds since the epoch, or None if unknown"""
+        try:
+            return datetime.datetime.fromisoformat(entry["timestamp"]).timestamp()
+        except (KeyError, TypeError, ValueError):
             return None
-        except Exception as e:
-            print(f"Error loading from cache: {e}")
+    
+    def _serve_cached(self, cache_type, query, flight_key, revalidate, validator_key=None, entry=None):
+        """
+        Cached entry to answer with without waiting for the network, or None
+        
+        Entries younger than their TTL (see _cache_ttl) are fresh. Entries
+        past it by at most CACHE_MAX_STALE are served too, while revalidate
+        runs in the background under flight_key to refresh them. When
+        validator_key is given, only an entry saved from that request counts,
+        as other requests cache differently shaped details under the same key.
+        entry is the cache entry for query when the caller already loaded it.
+        Offline mode does not use TTLs and is handled by the callers.
+        """
+        if settings.is_offline_mode():
             return None
+        if entry is None:
+            entry = self._load_cache_entry(cache_type, query)
+        if not entry or not entry.get("data"):
+            return None
+        if validator_key is not None and (entry.get("validators") or {}).get("key") != validator_key:
+            return None
+        timestamp = self._entry_timestamp(entry)
+        if timestamp is None:
+            return None
+        
+        age = datetime.datetime.now().timestamp() - timestamp
+        ttl = self._cache_ttl(cache_type, entry["data"])
+        if age <= ttl:
+            metrics.incr("cache.freshness", label="fresh")
+            tracer.set(source="fresh")
+            return entry
+        if age <= ttl + settings.get_cache_max_stale():
+            metrics.incr("cache.freshness", label="stale")
+            tracer.set(source="stale")
+            self._revalidate_later(flight_key, revalidate)
+            return entry
+        metrics.incr("cache.freshness", label="expired")
+        return None
+    
+    def _cached_details(self, cache_type, item_id, variant, request, flight_key, revalidate, entry=None):
+        """Cached details saved from request (endpoint, params) to show right away, or None (see _serve_cached)"""
+        entry = self._serve_cached(
+            cache_type, str(item_id), flight_key, revalidate, self._validator_key(variant, *request), entry
+        )
+        return entry["data"] if entry is not None else None
+    
+    def _revalidate_later(self, flight_key, revalidate):
+        """Run revalidate in the background unless the same refresh is already queued"""
+        with _revalidating_lock:
+            if flight_key in _revalidating:
+                return
+            _revalidating.add(flight_key)
         
-    def search_media(self, query, media_type=None):
+        def run():
+            try:
+                with tracer.span("revalidate", kind=flight_key[0], args=[str(arg) for arg in flight_key[3:]]):
+                    singleflight.do(flight_key, revalidate)
+            except Exception as e:
+                tracer.event(f"Error refreshing stale cache entry: {e}")
+            finally:
+                with _revalidating_lock:
+                    _revalidating.discard(flight_key)
+        
+        _revalidate_background.submit(run)
+    
+    def _known_missing(self, kind, key):
         """
-        Search for movies or TV shows based on query
-        media_type: 'movie', 'tv', or None (for both)
+        Whether upstream recently answered the lookup of key as not found
+        
+        kind is "movie" or "tv" for TMDB details and "omdb" for OMDB. Misses
+        are remembered for NOT_FOUND_TTL (OMDB_NOT_FOUND_TTL for OMDB), and
+        every lookup answered from them counts as an upstream call saved.
         """
-        # Check if offline mode is enabled
         if settings.is_offline_mode():
-            cache_key = f"search_{media_type}" if media_type else "search_multi"
-            cached_results = self._load_from_cache(cache_key, query)
-            if cached_results:
-                print(f"Using cached results for '{query}'")
-                return cached_results
-            else:
-                print(f"No cached results for '{query}' in offline mode")
-                return []
+            return False
+        entry = self._load_cache_entry(NOT_FOUND_NAMESPACE, f"{kind}:{key}")
+        timestamp = self._entry_timestamp(entry) if entry else None
+        if timestamp is None:
+            return False
+        tmdb_ttl, omdb_ttl = settings.get_not_found_ttls()
+        if datetime.datetime.now().timestamp() - timestamp > (omdb_ttl if kind == "omdb" else tmdb_ttl):
+            return False
+        metrics.incr("cache.negative", label=kind)
+        tracer.set(source="not_found")
+        return True
+    
+    def _remember_missing(self, kind, key, reason):
+        """Remember that upstream has nothing for key (see _known_missing)"""
+        self._save_to_cache(NOT_FOUND_NAMESPACE, f"{kind}:{key}", {"reason": reason})
+    
+    def _load_fallback(self, cache_type, query, empty, fallback=True):
+        """
+        Serve the offline cache when the upstream is failing or its breaker is
+        open; with fallback False (fetches that must come from upstream,
+        like the collection refresh) the failure is returned as empty
+        """
+        if not fallback:
+            tracer.event(f"Upstream unavailable, no {cache_type} for '{query}'")
+            return empty
+        cached = self._load_from_cache(cache_type, query)
+        if cached:
+            tracer.event(f"Upstream unavailable, using cached {cache_type} for '{query}'")
+            return cached
+        return empty
         
-        tmdb_api_key = settings.get("TMDB_API_KEY", "")
-        if not tmdb_api_key:
-            print("TMDB API key is missing")
-            return []
-            
+    def _search_request(self, query, media_type=None, page=1):
+        """Build the endpoint and query parameters for a TMDB search"""
         if media_type:
             endpoint = f"{self.tmdb_base_url}/search/{media_type}"
         else:
             endpoint = f"{self.tmdb_base_url}/search/multi"
             
         params = {
-            "api_key": tmdb_api_key,
+            "api_key": settings.get("TMDB_API_KEY", ""),
             "query": query,
             "include_adult": "false"
         }
-        
-        try:
-            print(f"Searching for '{query}' using endpoint: {endpoint}")
-            response = requests.get(endpoint, params=params, timeout=10)
-            
-            # Print response details for debugging
-            print(f"Response status: {response.status_code}")
-            
-            # Check for API specific errors
-            if response.status_code == 401:
-                print("API key invalid or expired")
-                return []
-                
-            if response.status_code == 404:
-                print("Resource not found")
-                return []
-            
-            response.raise_for_status()
-            
-            # Get and parse JSON response
-            response_data = response.json()
-            
-            # Check for API error messages
-            if 'success' in response_data and response_data['success'] is False:
-                error_message = response_data.get('status_message', 'Unknown API error')
-                print(f"API Error: {error_message}")
-                return []
-                
-            results = response_data.get("results", [])
-            
-            # Log search results for debugging
-            print(f"Search found {len(results)} results for '{query}'")
-            
-            # Format the results
-            formatted_results = []
-            for item in results:
-                # For multi search
-                media_type_value = item.get("media_type", media_type)
-                
-                if media_type_value == "movie" or media_type == "movie":
-                    formatted_results.append({
-                        "id": item.get("id"),
-                        "title": item.get("title"),
-                        "name": item.get("title"),  # Add name for consistency
-                        "type": "movie",
-                        "release_date": item.get("release_date"),
-                        "poster_path": item.get("poster_path"),
-                        "overview": item.get("overview", "")
-                    })
-                elif media_type_value == "tv" or media_type == "tv":
-                    formatted_results.append({
-                        "id": item.get("id"),
-                        "title": item.get("name"),  # Add title for consistency
-                        "name": item.get("name"),
-                        "type": "tv",
-                        "first_air_date": item.get("first_air_date"),
-                        "poster_path": item.get("poster_path"),
-                        "overview": item.get("overview", "")
-                    })
-            
-            # Log formatted results
-            print(f"Formatted {len(formatted_results)} results")
-            
-            # Save to cache
-            cache_key = f"search_{media_type}" if media_type else "search_multi"
-            self._save_to_cache(cache_key, query, formatted_results)
-            
-            return formatted_results
-        except requests.RequestException as e:
-            print(f"Error searching for media: {e}")
-            return []
+        if page > 1:
+            params["page"] = page
+        return endpoint, params
     
-    def get_movie_details(self, movie_id):
-        """Get detailed information about a movie from TMDB and OMDB"""
-        # Check if offline mode is enabled
-        if settings.is_offline_mode():
-            cached_details = self._load_from_cache("movie_details", str(movie_id))
-            if cached_details:
-                print(f"Using cached details for movie ID {movie_id}")
-                return cached_details
-            else:
-                print(f"No cached details for movie ID {movie_id} in offline mode")
-                return {}
-        
-        # Get basic details from TMDB
-        tmdb_api_key = settings.get("TMDB_API_KEY", "")
-        omdb_api_key = settings.get("OMDB_API_KEY", "")
-        
-        tmdb_endpoint = f"{self.tmdb_base_url}/movie/{movie_id}"
+    def _movie_request(self, movie_id, plan=None):
+        """Build the endpoint and query parameters for TMDB movie details"""
+        plan = plan or plan_movie()
+        endpoint = f"{self.tmdb_base_url}/movie/{movie_id}"
         params = {
-            "api_key": tmdb_api_key,
-            "append_to_response": "credits,release_dates"
+            "api_key": settings.get("TMDB_API_KEY", "")
         }
-        
-        try:
-            print(f"Fetching movie details for ID: {movie_id}")
-            tmdb_response = requests.get(tmdb_endpoint, params=params, timeout=10)
-            
-            # Check for API specific errors
-            if tmdb_response.status_code == 401:
-                print("TMDB API key invalid or expired")
-                return {}
-                
-            if tmdb_response.status_code == 404:
-                print("Movie not found")
-                return {}
-                
-            tmdb_response.raise_for_status()
-            tmdb_data = tmdb_response.json()
-            
-            # Extract IMDb ID to query OMDB
-            imdb_id = tmdb_data.get("imdb_id")
-            
-            if not imdb_id:
-                print("No IMDb ID found for this movie")
-            
-            # Get additional details from OMDB using IMDb ID
-            omdb_params = {
-                "apikey": omdb_api_key,
-                "i": imdb_id
-            }
-            
-            omdb_data = {}
-            if imdb_id:
-                try:
-                    print(f"Fetching OMDB data for IMDb ID: {imdb_id}")
-                    omdb_response = requests.get(self.omdb_base_url, params=omdb_params, timeout=10)
-                    
-                    if omdb_response.status_code == 401:
-                        print("OMDB API key invalid or expired")
-                    elif omdb_response.status_code == 404:
-                        print("Movie not found in OMDB")
-                    else:
-                        omdb_response.raise_for_status()
-                        omdb_data = omdb_response.json()
-                        
-                        # Check if there's an error in OMDB response
-                        if omdb_data.get("Response") == "False":
-                            print(f"OMDB Error: {omdb_data.get('Error', 'Unknown error')}")
-                            omdb_data = {}
-                except Exception as e:
-                    print(f"Error fetching from OMDB: {e}")
-                    omdb_data = {}
-            
-            # Format runtime as "1h 43m"
-            runtime_minutes = tmdb_data.get("runtime", 0)
-            hours = runtime_minutes // 60
-            minutes = runtime_minutes % 60
-            formatted_runtime = f"{hours}h {minutes}m"
+        if plan.appends:
+            params["append_to_response"] = plan.append_to_response
+        return endpoint, params
+    
+    def _series_request(self, tv_id, plan=None):
+        """Build the endpoint and query parameters for TMDB series details"""
+        plan = plan or plan_series()
+        endpoint = f"{self.tmdb_base_url}/tv/{tv_id}"
+        params = {
+            "api_key": settings.get("TMDB_API_KEY", "")
+        }
+        if plan.appends:
+            params["append_to_response"] = plan.append_to_response
+        return endpoint, params
+    
+    def _movie_trim(self, plan=None):
+        """Trim spec for movie details: the parts of credits _format_movie_details reads"""
+        if plan and "credits" not in plan.appends:
+            return None
+        return {
+            "credits.cast": 6,
+            "credits.crew": lambda person: person.get("job") == "Director"
+        }
+    
+    def _series_trim(self, plan=None):
+        """Trim spec for series details: the parts of credits _format_series_details reads"""
+        if plan and "aggregate_credits" not in plan.appends:
+            return None
+        return {
+            "aggregate_credits.cast": 8,
+            "aggregate_credits.crew": 0
+        }
+    
+    def _get_streamed(self, endpoint, params, headers=None):
+        """
+        GET a TMDB resource without buffering the body, so a large 200 can be
+        parsed with response_json as it arrives
+        """
+        response = self.http.get(endpoint, params=params, headers=headers, stream=True)
+        if response.status_code != 200:
+            # 304s and errors are small; reading them hands the connection back to the pool
+            response.content
+        return response
+    
+    def _omdb_params(self, imdb_id):
+        """Build the query parameters for an OMDB lookup by IMDb ID"""
+        return {
+            "apikey": settings.get("OMDB_API_KEY", ""),
+            "i": imdb_id
+        }
+    
+    def _check_omdb_data(self, omdb_data, imdb_id=None):
+        """Return the OMDB payload, or {} when OMDB reports an error in the body"""
+        if omdb_data.get("Response") == "False":
+            error = omdb_data.get('Error', 'Unknown error')
+            tracer.event(f"OMDB Error: {error}")
+            if imdb_id and any(reason in error.lower() for reason in _OMDB_NOT_FOUND_ERRORS):
+                self._remember_missing("omdb", imdb_id, error)
+            return {}
+        return omdb_data
+    
+    def _format_search_results(self, results, media_type=None):
+        """Format raw TMDB search results into the cards shown by the screens"""
+        formatted_results = []
+        for item in results:
+            # For multi search
+            media_type_value = item.get("media_type", media_type)
             
+            if media_type_value == "movie" or media_type == "movie":
+                formatted_results.append({
+                    "id": item.get("id"),
+                    "title": item.get("title"),
+                    "name": item.get("title"),  # Add name for consistency
+                    "type": "movie",
+                    "release_date": item.get("release_date"),
+                    "poster_path": item.get("poster_path"),
+                    "overview": item.get("overview", "")
+                })
+            elif media_type_value == "tv" or media_type == "tv":
+                formatted_results.append({
+                    "id": item.get("id"),
+                    "title": item.get("name"),  # Add title for consistency
+                    "name": item.get("name"),
+                    "type": "tv",
+                    "first_air_date": item.get("first_air_date"),
+                    "poster_path": item.get("poster_path"),
+                    "overview": item.get("overview", "")
+                })
+        
+        # Log formatted results
+        tracer.event(f"Formatted {len(formatted_results)} results")
+        return formatted_results
+    
+    def _format_movie_details(self, tmdb_data, omdb_data):
+        """Combine TMDB and OMDB payloads into the movie details dictionary"""
+        imdb_id = tmdb_data.get("imdb_id")
+        
+        # Format runtime as "1h 43m"
+        runtime_minutes = tmdb_data.get("runtime", 0)
+        hours = runtime_minutes // 60
+        minutes = runtime_minutes % 60
+        formatted_runtime = f"{hours}h {minutes}m"
+        
+        with tracer.span("format.dates"):
             # Format the release date in "Mar 12, 2025" format
             release_date = tmdb_data.get("release_date", "")
             if release_date:
@@ -235,19 +368,20 @@ class MovieFetcher:
                 formatted_release_date = date_obj.strftime("%b %d, %Y")
             else:
                 formatted_release_date = ""
-                
-            # Extract ratings
-            imdb_rating = omdb_data.get("imdbRating", "")
-            imdb_score = f"{imdb_rating}/10" if imdb_rating and imdb_rating != "N/A" else ""
-            
-            rt_rating = ""
-            for rating in omdb_data.get("Ratings", []):
-                if rating.get("Source") == "Rotten Tomatoes":
-                    rt_rating = rating.get("Value", "")
             
+        # Extract ratings
+        imdb_rating = omdb_data.get("imdbRating", "")
+        imdb_score = f"{imdb_rating}/10" if imdb_rating and imdb_rating != "N/A" else ""
+        
+        rt_rating = ""
+        for rating in omdb_data.get("Ratings", []):
+            if rating.get("Source") == "Rotten Tomatoes":
+                rt_rating = rating.get("Value", "")
+        
+        with tracer.span("format.genres"):
             # Format the genres - ensure at least 2 descriptors with fallbacks
             genre_list = [genre.get("name") for genre in tmdb_data.get("genres", [])]
-            
+        
             # If only one genre, use a fallback
             if len(genre_list) == 1:
                 # Try to get more specific subgenre from OMDB
@@ -270,11 +404,12 @@ class MovieFetcher:
                         genre_list.append("Action")
                     else:
                         genre_list.append("Drama")
-            
+        
             # Limit to 2 genres
             genre_list = genre_list[:2]
             genres = "/".join(genre_list)
-            
+        
+        with tracer.span("format.cast"):
             # Extract director information from credits
             director = ""
             if "credits" in tmdb_data and "crew" in tmdb_data["credits"]:
@@ -282,156 +417,55 @@ class MovieFetcher:
                            if person.get("job") == "Director"]
                 if directors:
                     director = ", ".join(directors[:2])  # Limit to 2 directors
-            
+        
             # If no director found in TMDB, try OMDB
             if not director and "Director" in omdb_data and omdb_data["Director"] != "N/A":
                 director = omdb_data["Director"]
-                
+            
             # Extract main cast (actors)
             cast = ""
             if "credits" in tmdb_data and "cast" in tmdb_data["credits"]:
                 actors = [person.get("name") for person in tmdb_data["credits"]["cast"][:6]]
                 if actors:
                     cast = ", ".join(actors)
-            
+        
             # If no cast found in TMDB, try OMDB
             if not cast and "Actors" in omdb_data and omdb_data["Actors"] != "N/A":
                 cast = omdb_data["Actors"]
-            
-            # Format title in title case
-            title = tmdb_data.get("title", "").title()
-            
-            # Build comprehensive detail dictionary
-            result = {
-                "title": title,
-                "runtime": runtime_minutes,
-                "duration": formatted_runtime,
-                "genres": genres,
-                "release_date": formatted_release_date,
-                "director": director,
-                "cast": cast,
-                "imdb_rating": imdb_score,
-                "rt_rating": rt_rating,
-                "combined_rating": f"{imdb_score} {rt_rating}",
-                "imdb_id": imdb_id,
-                "tagline": tmdb_data.get("tagline", "")
-            }
-            
-            # Add budget and revenue if available
-            if "budget" in tmdb_data and tmdb_data["budget"]:
-                result["budget"] = f"${tmdb_data['budget']:,}"
-            
-            if "revenue" in tmdb_data and tmdb_data["revenue"]:
-                result["revenue"] = f"${tmdb_data['revenue']:,}"
-            
-            # Save to cache
-            self._save_to_cache("movie_details", str(movie_id), result)
-                
-            return result
-            
-        except requests.RequestException as e:
-            print(f"Error fetching movie details: {e}")
-            return {}
-    
-    def get_omdb_details(self, imdb_id):
-        """Get detailed information from OMDB API using IMDb ID"""
-        if not settings.get("OMDB_API_KEY", "") or not imdb_id:
-            return {}
-            
-        # Get details from OMDB using IMDb ID
-        omdb_params = {
-            "apikey": settings.get("OMDB_API_KEY", ""),
-            "i": imdb_id
-        }
-        
-        try:
-            print(f"Fetching OMDB data for IMDb ID: {imdb_id}")
-            omdb_response = requests.get(self.omdb_base_url, params=omdb_params, timeout=10)
-            
-            if omdb_response.status_code == 401:
-                print("OMDB API key invalid or expired")
-                return {}
-            elif omdb_response.status_code == 404:
-                print("Item not found in OMDB")
-                return {}
-            else:
-                omdb_response.raise_for_status()
-                omdb_data = omdb_response.json()
-                
-                # Check if there's an error in OMDB response
-                if omdb_data.get("Response") == "False":
-                    print(f"OMDB Error: {omdb_data.get('Error', 'Unknown error')}")
-                    return {}
-                    
-                return omdb_data
-        except Exception as e:
-            print(f"Error fetching from OMDB: {e}")
-            return {}
-    
-    def get_series_details(self, tv_id, include_cast=False, include_external=False):
-        """
-        Get detailed information about a TV series
         
-        Args:
-            tv_id: The TMDB ID of the TV series
-            include_cast: Whether to include detailed cast information
-            include_external: Whether to include external API data like OMDB
+        # Format title in title case
+        title = tmdb_data.get("title", "").title()
         
-        Returns:
-            Dictionary with series details
-        """
-        # Check if offline mode is enabled
-        if settings.is_offline_mode():
-            cached_details = self._load_from_cache("series_details", str(tv_id))
-            if cached_details:
-                print(f"Using cached details for series ID {tv_id}")
-                return cached_details
-            else:
-                print(f"No cached details for series ID {tv_id} in offline mode")
-                return {}
-                
-        # Get basic details from TMDB
-        tmdb_endpoint = f"{self.tmdb_base_url}/tv/{tv_id}"
+        # Build comprehensive detail dictionary
+        result = {
+            "title": title,
+            "runtime": runtime_minutes,
+            "duration": formatted_runtime,
+            "genres": genres,
+            "release_date": formatted_release_date,
+            "director": director,
+            "cast": cast,
+            "imdb_rating": imdb_score,
+            "rt_rating": rt_rating,
+            "combined_rating": f"{imdb_score} {rt_rating}",
+            "imdb_id": imdb_id,
+            "tagline": tmdb_data.get("tagline", "")
+        }
         
-        # Build the append_to_response parameter based on what we need
-        append_to_response = ["external_ids", "next_episode_to_air", "last_episode_to_air"]
+        # Add budget and revenue if available
+        if "budget" in tmdb_data and tmdb_data["budget"]:
+            result["budget"] = f"${tmdb_data['budget']:,}"
         
-        if include_cast:
-            append_to_response.append("credits")
-            append_to_response.append("aggregate_credits")  # More complete cast list
+        if "revenue" in tmdb_data and tmdb_data["revenue"]:
+            result["revenue"] = f"${tmdb_data['revenue']:,}"
         
-        params = {
-            "api_key": settings.get("TMDB_API_KEY", ""),
-            "append_to_response": ",".join(append_to_response)
-        }
+        return result
+    
+    def _format_series_details(self, tmdb_data, omdb_data, include_cast=False):
+        """Combine TMDB and OMDB payloads into the series details dictionary"""
+        imdb_id = tmdb_data.get("external_ids", {}).get("imdb_id")
         
-        try:
-            print(f"Fetching TV series details for ID: {tv_id}")
-            tmdb_response = requests.get(tmdb_endpoint, params=params, timeout=10)
-            
-            # Check for API specific errors
-            if tmdb_response.status_code == 401:
-                print("TMDB API key invalid or expired")
-                return {}
-                
-            if tmdb_response.status_code == 404:
-                print("TV series not found")
-                return {}
-                
-            tmdb_response.raise_for_status()
-            tmdb_data = tmdb_response.json()
-            
-            # Extract IMDb ID
-            imdb_id = tmdb_data.get("external_ids", {}).get("imdb_id")
-            
-            if not imdb_id:
-                print("No IMDb ID found for this TV series")
-            
-            # Get additional details from OMDB if requested
-            omdb_data = {}
-            if include_external and imdb_id:
-                omdb_data = self.get_omdb_details(imdb_id)
-            
+        with tracer.span("format.dates"):
             # Format the first air date in "Mar 12, 2025" format
             first_air_date = tmdb_data.get("first_air_date", "")
             if first_air_date:
@@ -439,39 +473,41 @@ class MovieFetcher:
                 formatted_first_air_date = date_obj.strftime("%b %d, %Y")
             else:
                 formatted_first_air_date = ""
-                
-            # Extract ratings
-            imdb_rating = omdb_data.get("imdbRating", "")
-            imdb_score = f"{imdb_rating}/10" if imdb_rating and imdb_rating != "N/A" else ""
-            
-            rt_rating = ""
-            for rating in omdb_data.get("Ratings", []):
-                if rating.get("Source") == "Rotten Tomatoes":
-                    rt_rating = rating.get("Value", "")
             
+        # Extract ratings
+        imdb_rating = omdb_data.get("imdbRating", "")
+        imdb_score = f"{imdb_rating}/10" if imdb_rating and imdb_rating != "N/A" else ""
+        
+        rt_rating = ""
+        for rating in omdb_data.get("Ratings", []):
+            if rating.get("Source") == "Rotten Tomatoes":
+                rt_rating = rating.get("Value", "")
+        
+        with tracer.span("format.genres"):
             # Format the genres
             genre_list = [genre.get("name") for genre in tmdb_data.get("genres", [])]
-            
+        
             # If only one genre, try to get more from OMDB
             if len(genre_list) <= 1 and omdb_data:
                 omdb_genres = omdb_data.get("Genre", "").split(", ")
                 if len(omdb_genres) > 1 and omdb_genres[0] != "N/A":
                     # Use OMDB genres if available
                     genre_list = omdb_genres[:3]
-            
+        
             # Format genres as a string
             genres = "/".join(genre_list[:3])
-            
+        
+        with tracer.span("format.cast"):
             # Get series creator
             creator = ""
             if "created_by" in tmdb_data and tmdb_data["created_by"]:
                 creator_names = [person.get("name", "") for person in tmdb_data["created_by"]]
                 creator = ", ".join(creator_names)
-            
+        
             # Get director from OMDB if no creator found
             if not creator and "Director" in omdb_data and omdb_data["Director"] != "N/A":
                 creator = omdb_data["Director"]
-            
+        
             # Extract cast members
             cast = ""
             # Use aggregate_credits for a more complete cast list if available
@@ -485,77 +521,287 @@ class MovieFetcher:
             # If no cast found in TMDB, try OMDB
             elif omdb_data and "Actors" in omdb_data and omdb_data["Actors"] != "N/A":
                 cast = omdb_data["Actors"]
+            
+        # Get upcoming episode information if available
+        upcoming_info = ""
+        upcoming_date = ""
+        if "next_episode_to_air" in tmdb_data and tmdb_data["next_episode_to_air"]:
+            next_ep = tmdb_data["next_episode_to_air"]
+            if "air_date" in next_ep and next_ep["air_date"]:
+                try:
+                    date_obj = datetime.datetime.strptime(next_ep["air_date"], "%Y-%m-%d")
+                    upcoming_date = date_obj.strftime("%b %d, %Y")
+                except:
+                    upcoming_date = next_ep["air_date"]
+                    
+            season_num = next_ep.get("season_number", "?")
+            episode_num = next_ep.get("episode_number", "?")
+            episode_name = next_ep.get("name", "Upcoming Episode")
+            
+            upcoming_info = f"S{season_num}E{episode_num}: {episode_name}"
+            
+        # Get last aired episode information if available
+        last_episode_info = ""
+        if "last_episode_to_air" in tmdb_data and tmdb_data["last_episode_to_air"]:
+            last_ep = tmdb_data["last_episode_to_air"]
+            if "air_date" in last_ep and last_ep["air_date"]:
+                try:
+                    date_obj = datetime.datetime.strptime(last_ep["air_date"], "%Y-%m-%d")
+                    last_air_date = date_obj.strftime("%b %d, %Y")
+                except:
+                    last_air_date = last_ep["air_date"]
+                    
+            season_num = last_ep.get("season_number", "?")
+            episode_num = last_ep.get("episode_number", "?")
+            episode_name = last_ep.get("name", "Last Episode")
+            
+            last_episode_info = f"S{season_num}E{episode_num}: {episode_name} ({last_air_date})"
+        
+        # Check if the show is finished
+        status = tmdb_data.get("status", "Unknown")
+        is_finished = status.lower() == "ended" or status.lower() == "canceled"
+        
+        result = {
+            "title": tmdb_data.get("name", ""),
+            "name": tmdb_data.get("name", ""),
+            "number_of_seasons": tmdb_data.get("number_of_seasons", 0),
+            "number_of_episodes": tmdb_data.get("number_of_episodes", 0),
+            "genres": genres,
+            "creator": creator,
+            "cast": cast,
+            "first_air_date": formatted_first_air_date,
+            "imdb_rating": imdb_score,
+            "rt_rating": rt_rating,
+            "poster_path": tmdb_data.get("poster_path"),
+            "overview": tmdb_data.get("overview", ""),
+            "imdb_id": imdb_id,
+            "status": status,
+            "is_finished": is_finished,
+            "upcoming_episode": upcoming_info,
+            "upcoming_date": upcoming_date,
+            "last_episode": last_episode_info,
+            "network": ", ".join([network.get("name", "") for network in tmdb_data.get("networks", [])])
+        }
+        
+        return result
+    
+    def _format_upcoming_episodes(self, season_data, current_season):
+        """Summarise the episodes of a season that have not aired yet"""
+        # Find all episodes that haven't aired yet
+        today = datetime.datetime.now().date()
+        upcoming_episodes = []
+        
+        for episode in season_data.get("episodes", []):
+            if not episode.get("air_date"):
+                continue
                 
-            # Get upcoming episode information if available
-            upcoming_info = ""
-            upcoming_date = ""
-            if "next_episode_to_air" in tmdb_data and tmdb_data["next_episode_to_air"]:
-                next_ep = tmdb_data["next_episode_to_air"]
-                if "air_date" in next_ep and next_ep["air_date"]:
-                    try:
-                        date_obj = datetime.datetime.strptime(next_ep["air_date"], "%Y-%m-%d")
-                        upcoming_date = date_obj.strftime("%b %d, %Y")
-                    except:
-                        upcoming_date = next_ep["air_date"]
-                        
-                season_num = next_ep.get("season_number", "?")
-                episode_num = next_ep.get("episode_number", "?")
-                episode_name = next_ep.get("name", "Upcoming Episode")
-                
-                upcoming_info = f"S{season_num}E{episode_num}: {episode_name}"
-                
-            # Get last aired episode information if available
-            last_episode_info = ""
-            if "last_episode_to_air" in tmdb_data and tmdb_data["last_episode_to_air"]:
-                last_ep = tmdb_data["last_episode_to_air"]
-                if "air_date" in last_ep and last_ep["air_date"]:
-                    try:
-                        date_obj = datetime.datetime.strptime(last_ep["air_date"], "%Y-%m-%d")
-                        last_air_date = date_obj.strftime("%b %d, %Y")
-                    except:
-                        last_air_date = last_ep["air_date"]
-                        
-                season_num = last_ep.get("season_number", "?")
-                episode_num = last_ep.get("episode_number", "?")
-                episode_name = last_ep.get("name", "Last Episode")
+            try:
+                air_date = datetime.datetime.strptime(episode["air_date"], "%Y-%m-%d").date()
+                if air_date >= today:
+                    # Format for display
+                    formatted_date = air_date.strftime("%b %d, %Y")
+                    episode_num = episode.get("episode_number", "?")
+                    episode_name = episode.get("name", "Upcoming Episode")
+                    
+                    upcoming_episodes.append({
+                        "season": current_season,
+                        "episode": episode_num,
+                        "name": episode_name,
+                        "air_date": formatted_date,
+                        "days_until": (air_date - today).days
+                    })
+            except Exception as e:
+                tracer.event(f"Error processing episode date: {e}")
                 
-                last_episode_info = f"S{season_num}E{episode_num}: {episode_name} ({last_air_date})"
-            
-            # Check if the show is finished
-            status = tmdb_data.get("status", "Unknown")
-            is_finished = status.lower() == "ended" or status.lower() == "canceled"
-            
-            result = {
-                "title": tmdb_data.get("name", ""),
-                "name": tmdb_data.get("name", ""),
-                "number_of_seasons": tmdb_data.get("number_of_seasons", 0),
-                "number_of_episodes": tmdb_data.get("number_of_episodes", 0),
-                "genres": genres,
-                "creator": creator,
-                "cast": cast,
-                "first_air_date": formatted_first_air_date,
-                "imdb_rating": imdb_score,
-                "rt_rating": rt_rating,
-                "poster_path": tmdb_data.get("poster_path"),
-                "overview": tmdb_data.get("overview", ""),
-                "imdb_id": imdb_id,
-                "status": status,
-                "is_finished": is_finished,
+        # Sort by air date
+        upcoming_episodes.sort(key=lambda x: x.get("days_until", 999))
+        
+        # Return formatted details
+        if upcoming_episodes:
+            next_ep = upcoming_episodes[0]
+            
+            # Format the episode information
+            upcoming_info = f"S{next_ep['season']}E{next_ep['episode']}: {next_ep['name']}"
+            upcoming_date = next_ep["air_date"]
+            days_until = next_ep["days_until"]
+            
+            return {
                 "upcoming_episode": upcoming_info,
                 "upcoming_date": upcoming_date,
-                "last_episode": last_episode_info,
-                "network": ", ".join([network.get("name", "") for network in tmdb_data.get("networks", [])])
+                "days_until": days_until,
+                "future_episodes": len(upcoming_episodes),
+                "season_in_progress": current_season,
+                "upcoming_episodes": upcoming_episodes
             }
             
-            # Save to cache
-            self._save_to_cache("series_details", str(tv_id), result)
+        return {}
+    
+    def _flight_key(self, kind, *args):
+        """Key identifying an upstream call for request coalescing"""
+        return (kind, self.tmdb_base_url, self.omdb_base_url) + args
+    
+    def search_media(self, query, media_type=None, candidates=True, page=1):
+        """
+        Search for movies or TV shows based on query
+        media_type: 'movie', 'tv', or None (for both)
+        page: which page of TMDB results to return (see search_pages)
+        
+        Results are cached by normalized query (see search_cache), so case,
+        spacing and accents do not cause another call. A query extending a
+        cached one is answered with the cached results whose titles still
+        match, while the exact query is searched in the background for the
+        next call; pass candidates=False to wait for the exact results.
+        """
+        cache_type, key = search_cache_key(query, media_type, page)
+        with metrics.timer("fetcher.search", media_type or "multi"), \
+                tracer.span("search_media", query=key, media_type=media_type or "multi", page=page):
+            cached = self._cached_search(
+                cache_type, key, page, lambda: self._fetch_search_media(query, media_type, page)
+            )
+            if cached is not None:
+                return cached
             
-            return result
+            if candidates and page == 1:
+                found = search_index.candidates(cache_type, key)
+                if found:
+                    metrics.incr("search.index", label="prefix")
+                    tracer.set(source="prefix")
+                    _search_background.submit(self.search_media, query, media_type, False)
+                    return found
             
-        except requests.RequestException as e:
-            print(f"Error fetching TV details: {e}")
+            metrics.incr("search.index", label="miss")
+            tracer.set(source="network")
+            return singleflight.do(
+                self._flight_key("search", cache_type, key),
+                lambda: self._fetch_search_media(query, media_type, page)
+            )
+    
+    def search_pages(self, query, media_type=None, max_pages=None):
+        """
+        Yield the pages of a search's results one at a time
+        
+        A page is only fetched when the previous one has been handled, and
+        the page after the one being handled is fetched in the background
+        meanwhile. Stops after a short or empty page, TMDB's last page, or
+        max_pages pages.
+        """
+        last_page = min(max_pages or SEARCH_MAX_PAGE, SEARCH_MAX_PAGE)
+        page = 1
+        ahead = None
+        while True:
+            results = ahead.result() if ahead else self.search_media(query, media_type, False, page)
+            if not results:
+                return
+            ahead = None
+            if len(results) >= SEARCH_PAGE_SIZE and page < last_page:
+                ahead = _search_background.submit(self.search_media, query, media_type, False, page + 1)
+            yield results
+            if ahead is None:
+                return
+            page += 1
+    
+    def _cached_search(self, cache_type, key, page, revalidate):
+        """
+        Search results cached within SEARCH_CACHE_TTL, from memory or the
+        cache store, or stale ones while revalidate refreshes them
+        """
+        if settings.is_offline_mode():
+            # Offline searches go through _fetch_search_media, which ignores the TTL
+            return None
+        
+        results = search_index.get(cache_type, key, settings.get_search_cache_ttl())
+        if results is not None:
+            metrics.incr("search.index", label="memory")
+            tracer.set(source="memory")
+            return results
+        
+        entry = self._serve_cached(cache_type, key, self._flight_key("search", cache_type, key), revalidate)
+        if entry is None:
+            return None
+        if page == 1:
+            search_index.put(cache_type, key, entry["data"], self._entry_timestamp(entry))
+        metrics.incr("search.index", label="disk")
+        return entry["data"]
+    
+    def _save_search(self, cache_type, key, results, page=1):
+        """Cache search results on disk and, for a first page with results, in the shared search index"""
+        if results and page == 1:
+            search_index.put(cache_type, key, results)
+        self._save_to_cache(cache_type, key, results)
+    
+    def get_movie_details(self, movie_id, fields=None, use_cache=True):
+        """
+        Get detailed information about a movie from TMDB and OMDB
+        
+        Args:
+            movie_id: The TMDB ID of the movie
+            fields: Names of the details fields needed (see fetch_plan); only
+                the appends and calls those fields read are made. Defaults to
+                every field, and only such full fetches are cached
+            use_cache: Answer from the cache without waiting for TMDB while
+                the entry is fresh, or stale and refreshed in the background
+                (see _serve_cached); False always asks TMDB, and returns {}
+                rather than cached details when TMDB can't be reached
+        """
+        plan = plan_movie(fields)
+        # Fetches without the cache must not share a flight that falls back to it
+        flight_key = self._flight_key("movie_details", str(movie_id), plan.fields, use_cache)
+        fetch = lambda: self._fetch_movie_details(movie_id, plan, fallback=use_cache)
+        with tracer.span("get_movie_details", id=movie_id):
+            if use_cache and plan.covers(MOVIE_DETAIL_FIELDS):
+                cached = self._cached_details(
+                    "movie_details", movie_id, "movie", self._movie_request(movie_id, plan), flight_key, fetch
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and self._known_missing("movie", movie_id):
+                return {}
+            return singleflight.do(flight_key, fetch)
+    
+    def get_omdb_details(self, imdb_id):
+        """Get detailed information from OMDB API using IMDb ID"""
+        if not settings.get("OMDB_API_KEY", "") or not imdb_id:
             return {}
-            
+        
+        with tracer.span("get_omdb_details", imdb_id=imdb_id):
+            if self._known_missing("omdb", imdb_id):
+                return {}
+            return singleflight.do(
+                self._flight_key("omdb", imdb_id),
+                lambda: self._fetch_omdb_details(imdb_id)
+            )
+    
+    def get_series_details(self, tv_id, include_cast=False, include_external=False, fields=None, use_cache=True):
+        """
+        Get detailed information about a TV series
+        
+        Args:
+            tv_id: The TMDB ID of the TV series
+            include_cast: Whether to include detailed cast information
+            include_external: Whether to include external API data like OMDB
+            fields: Names of the details fields needed (see fetch_plan),
+                instead of the two flags. Such projected fetches are not cached
+            use_cache: Answer from a fresh or stale cache entry without
+                waiting for TMDB (see get_movie_details)
+        
+        Returns:
+            Dictionary with series details
+        """
+        plan = plan_series(series_fields(include_cast, include_external) if fields is None else fields)
+        flight_key = self._flight_key("series_details", str(tv_id), plan.fields, use_cache)
+        fetch = lambda: self._fetch_series_details(tv_id, plan, cache=fields is None, fallback=use_cache)
+        with tracer.span("get_series_details", id=tv_id):
+            if use_cache and fields is None:
+                cached = self._cached_details(
+                    "series_details", tv_id, f"series:{plan.omdb}", self._series_request(tv_id, plan),
+                    flight_key, fetch
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and self._known_missing("tv", tv_id):
+                return {}
+            return singleflight.do(flight_key, fetch)
+    
     def get_series_upcoming_episodes(self, tv_id):
         """
         Get more detailed information about upcoming episodes for a series
@@ -568,18 +814,306 @@ class MovieFetcher:
         """
         if not settings.get("TMDB_API_KEY", ""):
             return {}
+        
+        with tracer.span("get_series_upcoming_episodes", id=tv_id):
+            return singleflight.do(
+                self._flight_key("upcoming", str(tv_id)),
+                lambda: self._fetch_series_upcoming_episodes(tv_id)
+            )
+    
+    def get_series_detail_bundle(self, tv_id, include_cast=True, use_cache=True):
+        """
+        Get everything the series details view shows in as few calls as possible
+        
+        One TMDB /tv/{id} call supplies the details, the IMDb ID and the next
+        episode; OMDB is queried once for the ratings; and the season in
+        progress is fetched only when an episode is still to air.
+        
+        Args:
+            tv_id: The TMDB ID of the TV series
+            include_cast: Whether to include detailed cast information
+            use_cache: Answer from a fresh or stale cache entry without
+                waiting for TMDB (see get_movie_details)
+        
+        Returns:
+            Series details dictionary including OMDB ratings and, for running
+            shows, the upcoming episode fields and "upcoming_episodes" list
+        """
+        plan = plan_series(series_fields(include_cast, include_external=True, episodes=True))
+        flight_key = self._flight_key("series_bundle", str(tv_id), plan.fields, use_cache)
+        fetch = lambda: self._fetch_series_detail_bundle(tv_id, plan, fallback=use_cache)
+        with tracer.span("get_series_detail_bundle", id=tv_id):
+            if use_cache:
+                cached = self._cached_details(
+                    "series_details", tv_id, "series_bundle", self._series_request(tv_id, plan), flight_key, fetch
+                )
+                if cached is not None:
+                    return cached
+            if use_cache and self._known_missing("tv", tv_id):
+                return {}
+            return singleflight.do(flight_key, fetch)
+    
+    def _fetch_search_media(self, query, media_type=None, page=1):
+        """Search TMDB without coalescing (see search_media)"""
+        cache_type, key = search_cache_key(query, media_type, page)
+        
+        # Check if offline mode is enabled
+        if settings.is_offline_mode():
+            cached_results = self._load_from_cache(cache_type, key)
+            if cached_results:
+                tracer.event(f"Using cached results for '{query}'")
+                return cached_results
+            else:
+                tracer.event(f"No cached results for '{query}' in offline mode")
+                return []
+        
+        tmdb_api_key = settings.get("TMDB_API_KEY", "")
+        if not tmdb_api_key:
+            tracer.event("TMDB API key is missing")
+            return []
             
+        endpoint, params = self._search_request(query, media_type, page)
+        
+        try:
+            tracer.event(f"Searching for '{query}' using endpoint: {endpoint}")
+            response = self.http.get(endpoint, params=params)
+            
+            # Print response details for debugging
+            tracer.event(f"Response status: {response.status_code}")
+            
+            # Check for API specific errors
+            if response.status_code == 401:
+                tracer.event("API key invalid or expired")
+                return []
+                
+            if response.status_code == 404:
+                tracer.event("Resource not found")
+                return []
+            
+            response.raise_for_status()
+            
+            # Get and parse JSON response
+            response_data = response_json(response)
+            
+            # Check for API error messages
+            if 'success' in response_data and response_data['success'] is False:
+                error_message = response_data.get('status_message', 'Unknown API error')
+                tracer.event(f"API Error: {error_message}")
+                return []
+                
+            results = response_data.get("results", [])
+            
+            # Log search results for debugging
+            tracer.event(f"Search found {len(results)} results for '{query}'")
+            
+            # Format the results
+            with metrics.timer("fetcher.format", "search"), tracer.span("format", kind="search"):
+                formatted_results = self._format_search_results(results, media_type)
+            
+            # Save to cache
+            self._save_search(cache_type, key, formatted_results, page)
+            
+            return formatted_results
+        except requests.RequestException as e:
+            tracer.event(f"Error searching for media: {e}")
+            return self._load_fallback(cache_type, key, [])
+    
+    def _fetch_movie_details(self, movie_id, plan=None, fallback=True):
+        """Fetch movie details without coalescing (see get_movie_details)"""
+        plan = plan or plan_movie()
+        # A projection must not replace the full details in the cache
+        cache = plan.covers(MOVIE_DETAIL_FIELDS)
+        
+        # Check if offline mode is enabled
+        if settings.is_offline_mode():
+            cached_details = self._load_from_cache("movie_details", str(movie_id))
+            if cached_details:
+                tracer.event(f"Using cached details for movie ID {movie_id}")
+                return cached_details
+            else:
+                tracer.event(f"No cached details for movie ID {movie_id} in offline mode")
+                return {}
+        
+        # Get basic details from TMDB, revalidating any cached copy
+        tmdb_endpoint, params = self._movie_request(movie_id, plan)
+        validator_key = self._validator_key("movie", tmdb_endpoint, params)
+        cache_entry = self._load_cache_entry("movie_details", str(movie_id)) if cache else None
+        
+        try:
+            tracer.event(f"Fetching movie details for ID: {movie_id}")
+            tmdb_response = self._get_streamed(
+                tmdb_endpoint, params, self._conditional_headers(cache_entry, validator_key)
+            )
+            
+            if tmdb_response.status_code == 304:
+                return self._revalidated("movie_details", str(movie_id), cache_entry)
+            
+            # Check for API specific errors
+            if tmdb_response.status_code == 401:
+                tracer.event("TMDB API key invalid or expired")
+                return {}
+                
+            if tmdb_response.status_code == 404:
+                tracer.event("Movie not found")
+                self._remember_missing("movie", str(movie_id), "TMDB 404")
+                return {}
+                
+            tmdb_response.raise_for_status()
+            tmdb_data = response_json(tmdb_response, self._movie_trim(plan))
+            
+            # Extract IMDb ID to query OMDB
+            imdb_id = tmdb_data.get("imdb_id")
+            
+            if not imdb_id:
+                tracer.event("No IMDb ID found for this movie")
+            
+            # Get additional details from OMDB using IMDb ID
+            omdb_data = self.get_omdb_details(imdb_id) if imdb_id and plan.omdb else {}
+            
+            with metrics.timer("fetcher.format", "movie"), tracer.span("format", kind="movie"):
+                result = self._format_movie_details(tmdb_data, omdb_data)
+            
+            # Save to cache
+            if cache:
+                validators = self._response_validators(tmdb_response.headers, validator_key)
+                self._save_to_cache("movie_details", str(movie_id), result, validators)
+                
+            return result
+            
+        except requests.RequestException as e:
+            tracer.event(f"Error fetching movie details: {e}")
+            return self._load_fallback("movie_details", str(movie_id), {}, fallback)
+    
+    def _fetch_omdb_details(self, imdb_id):
+        """Fetch OMDB details without coalescing (see get_omdb_details)"""
+        # Get details from OMDB using IMDb ID
+        omdb_params = self._omdb_params(imdb_id)
+        
+        try:
+            tracer.event(f"Fetching OMDB data for IMDb ID: {imdb_id}")
+            omdb_response = self.http.get(self.omdb_base_url, params=omdb_params)
+            
+            if omdb_response.status_code == 401:
+                tracer.event("OMDB API key invalid or expired")
+                return {}
+            elif omdb_response.status_code == 404:
+                tracer.event("Item not found in OMDB")
+                self._remember_missing("omdb", imdb_id, "OMDB 404")
+                return {}
+            else:
+                omdb_response.raise_for_status()
+                
+                # Check if there's an error in OMDB response
+                return self._check_omdb_data(response_json(omdb_response), imdb_id)
+        except Exception as e:
+            tracer.event(f"Error fetching from OMDB: {e}")
+            return {}
+    
+    def _fetch_series_payload(self, tv_id, plan, variant="series", cache_entry=None):
+        """
+        Fetch the raw TMDB /tv/{id} payload, revalidating cache_entry if given
+        
+        Returns (status_code, payload, validators). The payload is None for
+        API errors and for 304 Not Modified; network errors raise
+        requests.RequestException
+        """
+        tmdb_endpoint, params = self._series_request(tv_id, plan)
+        validator_key = self._validator_key(variant, tmdb_endpoint, params)
+        
+        tracer.event(f"Fetching TV series details for ID: {tv_id}")
+        tmdb_response = self._get_streamed(
+            tmdb_endpoint, params, self._conditional_headers(cache_entry, validator_key)
+        )
+        
+        if tmdb_response.status_code == 304:
+            return 304, None, None
+        
+        # Check for API specific errors
+        if tmdb_response.status_code == 401:
+            tracer.event("TMDB API key invalid or expired")
+            return 401, None, None
+            
+        if tmdb_response.status_code == 404:
+            tracer.event("TV series not found")
+            self._remember_missing("tv", str(tv_id), "TMDB 404")
+            return 404, None, None
+            
+        tmdb_response.raise_for_status()
+        validators = self._response_validators(tmdb_response.headers, validator_key)
+        return tmdb_response.status_code, response_json(tmdb_response, self._series_trim(plan)), validators
+    
+    def _fetch_season_payload(self, tv_id, season_number):
+        """Fetch the raw TMDB /tv/{id}/season/{n} payload"""
+        season_endpoint = f"{self.tmdb_base_url}/tv/{tv_id}/season/{season_number}"
+        season_params = {
+            "api_key": settings.get("TMDB_API_KEY", "")
+        }
+        
+        season_response = self.http.get(season_endpoint, params=season_params)
+        season_response.raise_for_status()
+        return response_json(season_response)
+    
+    def _fetch_series_details(self, tv_id, plan=None, cache=True, fallback=True):
+        """Fetch series details without coalescing (see get_series_details)"""
+        plan = plan or plan_series(series_fields())
+        # Check if offline mode is enabled
+        if settings.is_offline_mode():
+            cached_details = self._load_from_cache("series_details", str(tv_id))
+            if cached_details:
+                tracer.event(f"Using cached details for series ID {tv_id}")
+                return cached_details
+            else:
+                tracer.event(f"No cached details for series ID {tv_id} in offline mode")
+                return {}
+                
+        try:
+            # Get basic details from TMDB, revalidating any cached copy
+            cache_entry = self._load_cache_entry("series_details", str(tv_id)) if cache else None
+            status, tmdb_data, validators = self._fetch_series_payload(
+                tv_id, plan, f"series:{plan.omdb}", cache_entry
+            )
+            if status == 304:
+                return self._revalidated("series_details", str(tv_id), cache_entry)
+            if tmdb_data is None:
+                return {}
+            
+            # Extract IMDb ID
+            imdb_id = tmdb_data.get("external_ids", {}).get("imdb_id")
+            
+            if not imdb_id:
+                tracer.event("No IMDb ID found for this TV series")
+            
+            # Get additional details from OMDB if requested
+            omdb_data = {}
+            if plan.omdb and imdb_id:
+                omdb_data = self.get_omdb_details(imdb_id)
+            
+            with metrics.timer("fetcher.format", "series"), tracer.span("format", kind="series"):
+                result = self._format_series_details(tmdb_data, omdb_data, "cast" in plan.fields)
+            
+            # Save to cache
+            if cache:
+                self._save_to_cache("series_details", str(tv_id), result, validators)
+            
+            return result
+            
+        except requests.RequestException as e:
+            tracer.event(f"Error fetching TV details: {e}")
+            return self._load_fallback("series_details", str(tv_id), {}, fallback)
+            
+    def _fetch_series_upcoming_episodes(self, tv_id):
+        """Fetch upcoming episodes without coalescing (see get_series_upcoming_episodes)"""
         try:
             # First get the current season number
             series_endpoint = f"{self.tmdb_base_url}/tv/{tv_id}"
+            # next_episode_to_air is part of the base resource
             params = {
-                "api_key": settings.get("TMDB_API_KEY", ""),
-                "append_to_response": "next_episode_to_air"
+                "api_key": settings.get("TMDB_API_KEY", "")
             }
             
-            series_response = requests.get(series_endpoint, params=params, timeout=10)
+            series_response = self.http.get(series_endpoint, params=params)
             series_response.raise_for_status()
-            series_data = series_response.json()
+            series_data = response_json(series_response)
             
             # Check if we have a next episode
             if "next_episode_to_air" not in series_data or not series_data["next_episode_to_air"]:
@@ -592,63 +1126,211 @@ class MovieFetcher:
                 return {}
                 
             # Get the full season details to see all upcoming episodes
-            season_endpoint = f"{self.tmdb_base_url}/tv/{tv_id}/season/{current_season}"
-            season_params = {
-                "api_key": settings.get("TMDB_API_KEY", "")
-            }
-            
-            season_response = requests.get(season_endpoint, params=season_params, timeout=10)
-            season_response.raise_for_status()
-            season_data = season_response.json()
+            season_data = self._fetch_season_payload(tv_id, current_season)
             
-            # Find all episodes that haven't aired yet
-            today = datetime.datetime.now().date()
-            upcoming_episodes = []
+            return self._format_upcoming_episodes(season_data, current_season)
             
-            for episode in season_data.get("episodes", []):
-                if not episode.get("air_date"):
-                    continue
-                    
-                try:
-                    air_date = datetime.datetime.strptime(episode["air_date"], "%Y-%m-%d").date()
-                    if air_date >= today:
-                        # Format for display
-                        formatted_date = air_date.strftime("%b %d, %Y")
-                        episode_num = episode.get("episode_number", "?")
-                        episode_name = episode.get("name", "Upcoming Episode")
-                        
-                        upcoming_episodes.append({
-                            "season": current_season,
-                            "episode": episode_num,
-                            "name": episode_name,
-                            "air_date": formatted_date,
-                            "days_until": (air_date - today).days
-                        })
-                except Exception as e:
-                    print(f"Error processing episode date: {e}")
-                    
-            # Sort by air date
-            upcoming_episodes.sort(key=lambda x: x.get("days_until", 999))
-            
-            # Return formatted details
-            if upcoming_episodes:
-                next_ep = upcoming_episodes[0]
-                
-                # Format the episode information
-                upcoming_info = f"S{next_ep['season']}E{next_ep['episode']}: {next_ep['name']}"
-                upcoming_date = next_ep["air_date"]
-                days_until = next_ep["days_until"]
-                
-                return {
-                    "upcoming_episode": upcoming_info,
-                    "upcoming_date": upcoming_date,
-                    "days_until": days_until,
-                    "future_episodes": len(upcoming_episodes),
-                    "season_in_progress": current_season
-                }
-                
+        except Exception as e:
+            tracer.event(f"Error fetching upcoming episodes: {e}")
             return {}
+    
+    def _fetch_series_detail_bundle(self, tv_id, plan=None, fallback=True):
+        """Fetch the series detail bundle without coalescing (see get_series_detail_bundle)"""
+        plan = plan or plan_series()
+        if settings.is_offline_mode():
+            return self._fetch_series_details(tv_id, plan)
+        
+        try:
+            cache_entry = self._load_cache_entry("series_details", str(tv_id))
+            status, tmdb_data, validators = self._fetch_series_payload(
+                tv_id, plan, "series_bundle", cache_entry
+            )
+            # The series payload carries the next episode too, so an unchanged
+            # payload means the cached bundle is still current
+            if status == 304:
+                return self._revalidated("series_details", str(tv_id), cache_entry)
+            if tmdb_data is None:
+                return {}
             
-        except Exception as e:
-            print(f"Error fetching upcoming episodes: {e}")
-            return {} 
\ No newline at end of file
+            imdb_id = tmdb_data.get("external_ids", {}).get("imdb_id")
+            omdb_data = self.get_omdb_details(imdb_id) if imdb_id and plan.omdb else {}
+            with metrics.timer("fetcher.format", "series"), tracer.span("format", kind="series"):
+                result = self._format_series_details(tmdb_data, omdb_data, "cast" in plan.fields)
+        except requests.RequestException as e:
+            tracer.event(f"Error fetching TV details: {e}")
+            return self._load_fallback("series_details", str(tv_id), {}, fallback)
+        
+        # The next episode came with the series payload, so only the season is left
+        next_episode = tmdb_data.get("next_episode_to_air") or {}
+        current_season = next_episode.get("season_number")
+        if current_season and plan.season:
+            try:
+                season_data = self._fetch_season_payload(tv_id, current_season)
+                result.update(self._format_upcoming_episodes(season_data, current_season))
+            except Exception as e:
+                tracer.event(f"Error fetching upcoming episodes: {e}")
+        
+        # Cache the full bundle so offline mode shows ratings and episodes too
+        self._save_to_cache("series_details", str(tv_id), result, validators)
+        return result
+    
+    def get_changed_ids(self, media_type, start_date, end_date=None):
+        """
+        Get the IDs TMDB reports as changed in a date range
+        
+        Args:
+            media_type: 'movie' or 'tv'
+            start_date: First day to include (TMDB allows at most 14 days)
+            end_date: Last day to include, defaults to today
+        
+        Returns:
+            Set of TMDB IDs. Raises requests.RequestException if any page
+            fails, so a caller never skips changes it did not see
+        """
+        endpoint = f"{self.tmdb_base_url}/{media_type}/changes"
+        params = {
+            "api_key": settings.get("TMDB_API_KEY", ""),
+            "start_date": start_date.isoformat(),
+            "end_date": (end_date or datetime.date.today()).isoformat(),
+            "page": 1
+        }
+        
+        changed_ids = set()
+        while True:
+            response = self.http.get(endpoint, params=params)
+            response.raise_for_status()
+            response_data = response_json(response)
+            changed_ids.update(item["id"] for item in response_data.get("results", []) if "id" in item)
+            
+            if params["page"] >= response_data.get("total_pages", 1):
+                return changed_ids
+            params["page"] += 1
+    
+    def get_movie_details_many(self, movie_ids, max_workers=None, ordered=True, use_cache=True):
+        """
+        Get details for many movies with bounded concurrency
+        
+        Args:
+            movie_ids: TMDB IDs of the movies
+            max_workers: Maximum number of concurrent lookups (defaults to the HTTP pool size)
+            ordered: Yield results in input order if True, otherwise as they complete
+            use_cache: Serve IDs that already have cached details without a network call
+        
+        Yields:
+            (movie_id, details, error) tuples; error is None on success
+        """
+        def fetch(movie_id):
+            return self.get_movie_details(movie_id, use_cache=use_cache)
+        
+        def serve(movie_id, entry):
+            # The checks get_movie_details makes on the entry it loads
+            plan = plan_movie()
+            return self._cached_details(
+                "movie_details", movie_id, "movie", self._movie_request(movie_id, plan),
+                self._flight_key("movie_details", str(movie_id), plan.fields, True),
+                lambda: self._fetch_movie_details(movie_id, plan), entry
+            )
+        
+        return self._get_details_many(
+            "movie_details", movie_ids, fetch, serve, max_workers, ordered, use_cache
+        )
+    
+    def get_series_details_many(self, tv_ids, include_cast=False, include_external=False,
+                                max_workers=None, ordered=True, use_cache=True, bundle=False):
+        """
+        Get details for many TV series with bounded concurrency
+        
+        Args:
+            tv_ids: TMDB IDs of the series
+            include_cast: Whether to include detailed cast information
+            include_external: Whether to include external API data like OMDB
+            max_workers: Maximum number of concurrent lookups (defaults to the HTTP pool size)
+            ordered: Yield results in input order if True, otherwise as they complete
+            use_cache: Serve IDs that already have cached details without a network call
+            bundle: Fetch the series detail bundle (see get_series_detail_bundle)
+                instead, as the series details view does
+        
+        Yields:
+            (tv_id, details, error) tuples; error is None on success
+        """
+        def fetch(tv_id):
+            if bundle:
+                return self.get_series_detail_bundle(tv_id, include_cast=include_cast, use_cache=use_cache)
+            return self.get_series_details(
+                tv_id, include_cast=include_cast, include_external=include_external, use_cache=use_cache
+            )
+        
+        def serve(tv_id, entry):
+            # The checks get_series_detail_bundle or get_series_details makes on the entry it loads
+            if bundle:
+                plan = plan_series(series_fields(include_cast, include_external=True, episodes=True))
+                kind = variant = "series_bundle"
+                refetch = lambda: self._fetch_series_detail_bundle(tv_id, plan)
+            else:
+                plan = plan_series(series_fields(include_cast, include_external))
+                kind, variant = "series_details", f"series:{plan.omdb}"
+                refetch = lambda: self._fetch_series_details(tv_id, plan, cache=True)
+            return self._cached_details(
+                "series_details", tv_id, variant, self._series_request(tv_id, plan),
+                self._flight_key(kind, str(tv_id), plan.fields, True), refetch, entry
+            )
+        
+        return self._get_details_many(
+            "series_details", tv_ids, fetch, serve, max_workers, ordered, use_cache
+        )
+    
+    def _load_many_from_cache(self, cache_type, queries):
+        """Load every cached entry with data for a batch of queries with one query"""
+        with tracer.span("cache.lookup", namespace=cache_type, batch=len(queries)):
+            try:
+                entries = self.cache.get_many(cache_type, queries)
+            except Exception as e:
+                tracer.event(f"Error loading from cache: {e}")
+                return {}
+            tracer.set(hits=len(entries))
+        return {query: entry for query, entry in entries.items() if entry.get("data")}
+    
+    def _get_details_many(self, cache_type, item_ids, fetch, serve, max_workers, ordered, use_cache):
+        """
+        Run fetch over item_ids on a bounded thread pool and stream the results
+        
+        The cache is read for the whole batch at once. Online, serve(item_id,
+        entry) decides whether a cached entry answers for its ID the way the
+        single lookup would (see _cached_details), and the IDs it turns down
+        are fetched; offline, every cached entry is used.
+        """
+        item_ids = list(item_ids)
+        if max_workers is None:
+            max_workers = settings.get_http_pool_settings()[1]
+        
+        offline = settings.is_offline_mode()
+        cached = {}
+        if use_cache or offline:
+            cached = self._load_many_from_cache(cache_type, [str(item_id) for item_id in item_ids])
+        
+        def run(item_id):
+            entry = cached.get(str(item_id))
+            if entry is not None:
+                cached_details = entry["data"] if offline else serve(item_id, entry)
+                if cached_details:
+                    return item_id, cached_details, None
+            try:
+                details = fetch(item_id)
+            except Exception as e:
+                return item_id, {}, str(e)
+            if not details:
+                return item_id, {}, "No details found"
+            return item_id, details, None
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        try:
+            futures = [executor.submit(run, item_id) for item_id in item_ids]
+            if ordered:
+                for future in futures:
+                    yield future.result()
+            else:
+                for future in as_completed(futures):
+                    yield future.result()
+        finally:
+            # Stop queued lookups if the caller stops consuming early
+            executor.shutdown(wait=False, cancel_futures=True)
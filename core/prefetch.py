@@ -0,0 +1,115 @@
+import asyncio
+import concurrent.futures
+import copy
+import threading
+from core.settings_handler import settings
+from core.async_movie_fetcher import background_fetcher
+from core.metrics import metrics
+
+# The BackgroundFetcher method that loads what a details dialog shows
+DETAILS_METHODS = {
+    "movie": "get_movie_details",
+    "tv": "get_series_detail_bundle"
+}
+
+class DetailsPrefetcher:
+    """
+    Speculative, low-priority details fetches for the top search results.
+
+    After a search the user nearly always opens one of the first few cards,
+    so their details are fetched in the background while the results are on
+    screen. Prefetches wait a moment before starting, so the search results
+    and posters go first, and run at most a couple at a time. A new search
+    drops every prefetch that has not started yet; one that already started
+    is left to finish, as another caller may be sharing its upstream call,
+    but its result is discarded.
+
+    get_details() hands out the prefetched result when there is one and
+    falls back to a normal fetch otherwise.
+    """
+
+    def __init__(self, kind, fetcher=None, top_n=None, delay=None, concurrency=2):
+        self.kind = kind
+        self.method = DETAILS_METHODS[kind]
+        self.background = fetcher or background_fetcher
+        default_top_n, default_delay = settings.get_prefetch_settings()
+        self.top_n = default_top_n if top_n is None else top_n
+        self.delay = default_delay if delay is None else delay
+        self.concurrency = concurrency
+
+        # item_id -> concurrent.futures.Future of the prefetch
+        self._futures = {}
+        self._started = set()
+        self._lock = threading.Lock()
+        self._semaphore = None
+
+    def prefetch(self, results):
+        """Start prefetching details for the top results of a search"""
+        wanted = [result.get("id") for result in results[:self.top_n] if result.get("id") is not None]
+        with self._lock:
+            # Keep what is already prefetched for these results, e.g. when
+            # the same results are shown again
+            self._drop_locked(keep=set(wanted))
+            for item_id in wanted:
+                if item_id not in self._futures:
+                    metrics.incr("prefetch.scheduled", label=self.kind)
+                    self._futures[item_id] = self.background.run(self._prefetch_one(item_id))
+
+    def cancel(self):
+        """Drop all prefetches, e.g. because a new search started"""
+        with self._lock:
+            self._drop_locked(keep=set())
+
+    def _drop_locked(self, keep):
+        for item_id in list(self._futures):
+            if item_id in keep:
+                continue
+            future = self._futures.pop(item_id)
+            if item_id not in self._started and future.cancel():
+                metrics.incr("prefetch.cancelled", label=self.kind)
+            self._started.discard(item_id)
+
+    async def _prefetch_one(self, item_id):
+        await asyncio.sleep(self.delay)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            with self._lock:
+                if item_id not in self._futures:
+                    raise asyncio.CancelledError()
+                self._started.add(item_id)
+            return await getattr(self.background.fetcher, self.method)(item_id)
+
+    def get_details(self, item_id):
+        """
+        Future for the details of one result: the prefetched one if it has
+        started or finished, otherwise a new fetch
+        """
+        with self._lock:
+            future = self._futures.get(item_id)
+            if future is not None and item_id not in self._started and not future.done():
+                # Still waiting its turn; the user is not going to wait with it
+                self._futures.pop(item_id)
+                future.cancel()
+                future = None
+
+        if future is None or future.cancelled() or (future.done() and future.exception() is not None):
+            metrics.incr("prefetch.misses", label=self.kind)
+            return self.background.submit(self.method, item_id)
+
+        metrics.incr("prefetch.hits", label=self.kind)
+        return self._copied(future)
+
+    @staticmethod
+    def _copied(future):
+        """A future resolving to a copy of future's result, so callers can edit it"""
+        copied = concurrent.futures.Future()
+
+        def resolve(done):
+            try:
+                copied.set_result(copy.deepcopy(done.result()))
+            except BaseException as e:
+                copied.set_exception(e)
+
+        future.add_done_callback(resolve)
+        return copied
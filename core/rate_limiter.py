@@ -0,0 +1,210 @@
+import datetime
+import email.utils
+import threading
+import time
+from urllib.parse import urlsplit
+from core.settings_handler import settings
+
+# Requests per second and burst size for each throttled upstream. TMDB allows
+# roughly 50 req/s per IP; OMDB's free tier is far stricter.
+DEFAULT_RATE_LIMITS = {
+    "api.themoviedb.org": {"rate": 40, "burst": 40, "max_concurrency": 20},
+    "www.omdbapi.com": {"rate": 5, "burst": 10, "max_concurrency": 4}
+}
+
+class RateLimiter:
+    """
+    Token bucket plus AIMD concurrency window for a single upstream host.
+
+    Tokens refill at the current rate up to the burst size. Every successful
+    response grows the concurrency window and the rate additively back
+    towards their ceilings, while a 429 halves both and pauses the bucket
+    for as long as Retry-After (or the rate-limit reset header) asks.
+    """
+
+    def __init__(self, host, rate, burst, max_concurrency, min_rate=0.5):
+        self.host = host
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = float(burst)
+        self.max_concurrency = max_concurrency
+
+        self.rate = self.max_rate
+        self.tokens = self.burst
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._decrease_hold_until = 0.0
+
+        # Monitoring counters
+        self.requests = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.throttles = 0
+
+        self._last_refill = time.monotonic()
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        """Add the tokens earned since the last refill"""
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def try_acquire_slot(self):
+        """Take a concurrency slot if one is free, without blocking"""
+        with self._condition:
+            if self.in_flight < int(self.concurrency_limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def reserve(self):
+        """
+        Reserve one token and return how many seconds the caller must wait
+        before sending. The bucket may go negative, so later callers queue
+        up behind earlier reservations.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            self.requests += 1
+
+            wait = max(0.0, self.paused_until - now)
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            if wait > 0:
+                self.waits += 1
+                self.wait_time += wait
+            return wait
+
+    def acquire(self):
+        """Block until a concurrency slot and a token are available"""
+        with self._condition:
+            while self.in_flight >= int(self.concurrency_limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self):
+        """Give back the concurrency slot taken by acquire()"""
+        with self._condition:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._condition.notify()
+
+    def record_response(self, status_code, headers):
+        """Adapt the rate and concurrency window to an upstream response"""
+        with self._condition:
+            now = time.monotonic()
+            pause = self._pause_from_headers(headers, status_code)
+            if pause > 0:
+                self.paused_until = max(self.paused_until, now + pause)
+
+            if status_code == 429:
+                self.throttles += 1
+                self.tokens = min(self.tokens, 0.0)
+                # Multiplicative decrease, once per congestion event rather
+                # than once for every in-flight request that got throttled
+                if now >= self._decrease_hold_until:
+                    self.concurrency_limit = max(1.0, self.concurrency_limit / 2)
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._decrease_hold_until = now + max(pause, 1.0)
+            elif status_code < 400:
+                # Additive increase, roughly one step per full window
+                self.concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self.concurrency_limit + 1.0 / self.concurrency_limit
+                )
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+            self._condition.notify_all()
+
+    def _pause_from_headers(self, headers, status_code):
+        """Seconds to stop sending, from Retry-After or rate-limit headers"""
+        retry_after = headers.get("Retry-After")
+        if retry_after and status_code in (429, 503):
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+            # An HTTP date; one that doesn't parse falls through to the rate-limit headers
+            try:
+                retry_date = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                retry_date = None
+            if retry_date is not None:
+                if retry_date.tzinfo is None:
+                    # HTTP dates are GMT; a "-0000" zone parses as naive
+                    retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+                return max(0.0, retry_date.timestamp() - time.time())
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                if int(remaining) <= 0:
+                    # Reset is an epoch timestamp
+                    return max(0.0, float(reset) - time.time())
+            except ValueError:
+                pass
+        return 0.0
+
+    def snapshot(self):
+        """Current limiter state for monitoring"""
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                "host": self.host,
+                "tokens": round(self.tokens, 2),
+                "rate": round(self.rate, 2),
+                "max_rate": self.max_rate,
+                "concurrency_limit": int(self.concurrency_limit),
+                "in_flight": self.in_flight,
+                "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+                "requests": self.requests,
+                "waits": self.waits,
+                "wait_time": round(self.wait_time, 3),
+                "throttles": self.throttles
+            }
+
+class RateLimiterRegistry:
+    """Process-wide rate limiters, one per throttled upstream host"""
+
+    def __init__(self):
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _limits(self):
+        limits = dict(DEFAULT_RATE_LIMITS)
+        limits.update(settings.get("RATE_LIMITS", {}))
+        return limits
+
+    def get(self, url):
+        """Get the limiter for the host of a URL, or None if it is not throttled"""
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                config = self._limits().get(host)
+                if config is None:
+                    return None
+                limiter = RateLimiter(
+                    host,
+                    rate=config.get("rate", 10),
+                    burst=config.get("burst", config.get("rate", 10)),
+                    max_concurrency=config.get("max_concurrency", 10)
+                )
+                self._limiters[host] = limiter
+            return limiter
+
+    def stats(self):
+        """Snapshot of every limiter created so far"""
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.host: limiter.snapshot() for limiter in limiters}
+
+# Shared by every fetcher in the process
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,89 @@
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# TMDB returns this many results per search page, and no pages after SEARCH_MAX_PAGE
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE = 500
+
+def normalize_query(query):
+    """
+    Fold a search query to the form it is cached under: compatibility forms
+    and accents folded, case folded and whitespace collapsed, so "Rush Hour",
+    "rush hour " and "RUSH HOUR" are one query
+    """
+    decomposed = unicodedata.normalize("NFKD", query or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+def search_cache_key(query, media_type=None, page=1):
+    """The (cache_type, query) a search's results are cached under"""
+    cache_type = f"search_{media_type}" if media_type else "search_multi"
+    normalized = normalize_query(query)
+    return cache_type, normalized if page == 1 else f"{normalized} page {page}"
+
+def matches(key, title):
+    """Whether every word of a normalized query starts a word of title"""
+    words = normalize_query(title).split()
+    return all(any(word.startswith(part) for word in words) for part in key.split())
+
+class SearchIndex:
+    """
+    The most recent search results in memory, by normalized query.
+
+    Besides exact lookups, answers a query nobody searched for yet from the
+    longest cached query it extends: after "rush", typing "rush h" can show
+    the results for "rush" whose titles still match straight away, while the
+    exact search runs. Only first pages are indexed, as later pages of a
+    prefix say little about a longer query.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        # (cache_type, key) -> (timestamp, results), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_type, key, max_age=None):
+        """Cached results for a normalized query, or None if missing or older than max_age seconds"""
+        with self._lock:
+            entry = self._entries.get((cache_type, key))
+            if entry is None:
+                return None
+            timestamp, results = entry
+            if max_age is not None and time.time() - timestamp > max_age:
+                return None
+            self._entries.move_to_end((cache_type, key))
+            return results
+
+    def put(self, cache_type, key, results, timestamp=None):
+        """Remember the results for a normalized query"""
+        with self._lock:
+            self._entries[(cache_type, key)] = (timestamp or time.time(), results)
+            self._entries.move_to_end((cache_type, key))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def candidates(self, cache_type, key):
+        """
+        Results of the longest cached query key extends whose titles still
+        match key, or None if no cached query is a prefix of key
+        """
+        with self._lock:
+            prefixes = [
+                cached for kind, cached in self._entries
+                if kind == cache_type and cached != key and key.startswith(cached)
+            ]
+            if not prefixes:
+                return None
+            _, results = self._entries[(cache_type, max(prefixes, key=len))]
+        return [result for result in results if matches(key, result.get("title") or result.get("name"))]
+
+    def clear(self):
+        """Forget every cached search"""
+        with self._lock:
+            self._entries.clear()
+
+# Shared by every fetcher and the search screens
+search_index = SearchIndex()
@@ -0,0 +1,70 @@
+import concurrent.futures
+import threading
+from core.async_movie_fetcher import background_fetcher
+from core.search_cache import SEARCH_MAX_PAGE, SEARCH_PAGE_SIZE
+from core.metrics import metrics
+
+class SearchPager:
+    """
+    The pages of one search, loaded on demand on the background loop.
+
+    Loading a page also starts fetching the page after it, so by the time a
+    list of results is scrolled to its end the next page is usually there.
+    Only the pages within keep of the last one asked for stay in memory;
+    others are loaded again when needed, normally from the search cache.
+
+    The last page is known once a page comes back short or empty.
+    """
+
+    def __init__(self, query, media_type, first_page, fetcher=None, keep=5):
+        self.query = query
+        self.media_type = media_type
+        self.background = fetcher or background_fetcher
+        self.keep = keep
+        self.last_page = SEARCH_MAX_PAGE
+
+        # page -> concurrent.futures.Future of its results
+        self._pages = {}
+        self._lock = threading.Lock()
+
+        first = concurrent.futures.Future()
+        first.set_result(first_page)
+        self._pages[1] = first
+        self._note(1, first_page)
+
+    def has_page(self, page):
+        """Whether page may have results"""
+        return 1 <= page <= self.last_page
+
+    def load(self, page):
+        """Future for the results of page, fetching the page after it ahead"""
+        with self._lock:
+            future = self._pages.get(page)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._pages[page] = self._fetch(page)
+            else:
+                metrics.incr("search.pages", label="ready" if future.done() else "waited")
+
+            if self.has_page(page + 1) and page + 1 not in self._pages:
+                metrics.incr("search.pages", label="ahead")
+                self._pages[page + 1] = self._fetch(page + 1)
+
+            for loaded in list(self._pages):
+                if abs(loaded - page) > self.keep:
+                    del self._pages[loaded]
+        return future
+
+    def _fetch(self, page):
+        future = self.background.submit("search_media", self.query, self.media_type, candidates=False, page=page)
+
+        def note(done):
+            if not done.cancelled() and done.exception() is None:
+                self._note(page, done.result())
+
+        future.add_done_callback(note)
+        return future
+
+    def _note(self, page, results):
+        if len(results) < SEARCH_PAGE_SIZE:
+            # An empty page means the previous one was the last
+            self.last_page = min(self.last_page, page if results else page - 1)
@@ -1,6 +1,7 @@
 import os
 import json
 from pathlib import Path
+from core.atomic_write import atomic_write_json
 import customtkinter as ctk
 
 # Table formatting settings (moved from config.py)
@@ -53,7 +54,44 @@ class SettingsHandler:
             "MOVIE_TABLE_INDEX": MOVIE_TABLE_INDEX,
             "SERIES_TABLE_INDEX": SERIES_TABLE_INDEX,
             "OFFLINE_MODE": False,
-            "OFFLINE_CACHE_SIZE": 200  # Number of items to cache
+            "OFFLINE_CACHE_SIZE": 200,  # Number of items to cache
+            "OFFLINE_CACHE_MAX_BYTES": 0,  # Size limit of the cached data, 0 for none
+            "OFFLINE_CACHE_POLICY": "lru",  # Evict the least recently used (lru), least used (lfu) or largest (size) first
+            "CACHE_DB": "data/cache/cache.db",  # SQLite file the offline cache is kept in
+            "CACHE_CODEC": "zstd",  # none, zlib, gzip, zstd or zstd-dict (zstd needs zstandard, else zlib is used)
+            "CACHE_COMPRESSION_LEVEL": 3,  # Compression level of cached values
+            "MEMORY_CACHE_ENTRIES": 500,  # Recently read cache entries also kept in memory
+            "MEMORY_CACHE_MAX_BYTES": 32 * 1024 * 1024,  # Approximate memory those entries may take
+            "HTTP_POOL_CONNECTIONS": 4,  # Number of hosts kept in each session's pool
+            "HTTP_POOL_MAXSIZE": 10,  # Keep-alive connections per host
+            "HTTP_CONNECT_TIMEOUT": 5,  # Seconds
+            "HTTP_READ_TIMEOUT": 10,  # Seconds
+            "HTTP_MAX_RETRIES": 2,  # Retries for failed GET requests
+            "HTTP_RETRY_BACKOFF": 0.5,  # Base backoff in seconds, doubled per retry
+            "HTTP_RETRY_BACKOFF_MAX": 8,  # Backoff ceiling in seconds
+            "CIRCUIT_FAILURE_THRESHOLD": 5,  # Consecutive failures before a host is skipped
+            "CIRCUIT_RESET_TIMEOUT": 30,  # Seconds before a skipped host is tried again
+            "HTTP_TRANSPORT": "live",  # live, record or replay (see core/transport.py)
+            "HTTP_FIXTURES_DIR": "data/fixtures",  # Recorded responses for record/replay
+            "REPLAY_LATENCY": 0.0,  # Seconds added to each replayed response
+            "REPLAY_JITTER": 0.0,  # Up to this many extra seconds per replayed response
+            "REPLAY_ERROR_RATE": 0.0,  # Share of replayed requests that fail
+            "PREFETCH_TOP_N": 3,  # Search results whose details are prefetched, 0 to disable
+            "PREFETCH_DELAY": 0.3,  # Seconds a prefetch waits so results and posters load first
+            "SEARCH_DEBOUNCE": 0.25,  # Seconds typing must pause before a search starts
+            "SEARCH_MIN_CHARS": 2,  # Shorter queries are only searched on Enter
+            "SEARCH_CACHE_TTL": 3600,  # Seconds cached search results are used without asking TMDB
+            "MOVIE_DETAILS_TTL": 7 * 86400,  # Seconds cached movie details are used without asking TMDB
+            "SERIES_DETAILS_TTL": 86400,  # The same for series details
+            "UPCOMING_EPISODES_TTL": 6 * 3600,  # ... and for series with an episode still to air
+            "CACHE_MAX_STALE": 30 * 86400,  # Seconds past its TTL an entry is still shown while it is refreshed
+            "NOT_FOUND_TTL": 6 * 3600,  # Seconds a title TMDB answered 404 for is not asked for again
+            "OMDB_NOT_FOUND_TTL": 86400,  # The same for IMDb IDs OMDB has no entry for
+            "SEARCH_PAGES_SHOWN": 5,  # Pages of search results kept on screen while scrolling
+            "TRACE_ENABLED": True,  # Write a trace of every fetcher call (see core/tracing.py)
+            "TRACE_FILE": "data/traces/trace.jsonl",
+            "TRACE_MAX_BYTES": 5 * 1024 * 1024,  # Size at which the trace file is rotated
+            "TRACE_BACKUPS": 3  # Rotated trace files kept
         }
         
         # Load settings from file or use defaults
@@ -98,8 +136,7 @@ class SettingsHandler:
             settings = self.settings
         
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(settings, f, indent=4)
+            atomic_write_json(self.config_file, settings, lock=True, indent=4)
             self.settings = settings
             return True
         except Exception as e:
@@ -182,6 +219,125 @@ class SettingsHandler:
         if isinstance(size, int) and size > 0:
             return self.set("OFFLINE_CACHE_SIZE", size)
         return False
+    
+    def get_cache_eviction_settings(self):
+        """Get the (policy, max bytes) used to keep the offline cache within its size"""
+        return (
+            self.get("OFFLINE_CACHE_POLICY", "lru"),
+            self.get("OFFLINE_CACHE_MAX_BYTES", 0)
+        )
+    
+    def get_memory_cache_settings(self):
+        """Get the (entries, approximate bytes) of the in-memory tier of the cache"""
+        return (
+            self.get("MEMORY_CACHE_ENTRIES", 500),
+            self.get("MEMORY_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        )
+    
+    def get_cache_compression(self):
+        """Get the (codec, level) cached values are compressed with"""
+        return (
+            self.get("CACHE_CODEC", "zstd"),
+            self.get("CACHE_COMPRESSION_LEVEL", 3)
+        )
+    
+    def get_cache_db_path(self):
+        """Get the SQLite file the offline cache is kept in"""
+        return self.get("CACHE_DB", "data/cache/cache.db")
+    
+    def get_http_pool_settings(self):
+        """Get the connection pool sizes used by the shared HTTP client"""
+        return (
+            self.get("HTTP_POOL_CONNECTIONS", 4),
+            self.get("HTTP_POOL_MAXSIZE", 10)
+        )
+    
+    def get_http_timeout(self):
+        """Get the (connect, read) timeout tuple used for HTTP requests"""
+        return (
+            self.get("HTTP_CONNECT_TIMEOUT", 5),
+            self.get("HTTP_READ_TIMEOUT", 10)
+        )
+    
+    def get_retry_settings(self):
+        """Get the (max retries, base backoff, max backoff) used for failed requests"""
+        return (
+            self.get("HTTP_MAX_RETRIES", 2),
+            self.get("HTTP_RETRY_BACKOFF", 0.5),
+            self.get("HTTP_RETRY_BACKOFF_MAX", 8)
+        )
+    
+    def get_circuit_breaker_settings(self):
+        """Get the (failure threshold, reset timeout) used by the circuit breakers"""
+        return (
+            self.get("CIRCUIT_FAILURE_THRESHOLD", 5),
+            self.get("CIRCUIT_RESET_TIMEOUT", 30)
+        )
+    
+    def get_transport_settings(self):
+        """Get the (mode, fixtures directory) of the HTTP transport"""
+        return (
+            self.get("HTTP_TRANSPORT", "live"),
+            self.get("HTTP_FIXTURES_DIR", "data/fixtures")
+        )
+    
+    def get_prefetch_settings(self):
+        """Get the (top N results, start delay) used when prefetching details"""
+        return (
+            self.get("PREFETCH_TOP_N", 3),
+            self.get("PREFETCH_DELAY", 0.3)
+        )
+    
+    def get_search_settings(self):
+        """Get the (debounce seconds, minimum characters) for search as you type"""
+        return (
+            self.get("SEARCH_DEBOUNCE", 0.25),
+            self.get("SEARCH_MIN_CHARS", 2)
+        )
+    
+    def get_search_cache_ttl(self):
+        """Get how many seconds cached search results are used without asking TMDB"""
+        return self.get("SEARCH_CACHE_TTL", 3600)
+    
+    def get_details_cache_ttls(self):
+        """Get the seconds cached (movie, series, series with an upcoming episode) details stay fresh"""
+        return (
+            self.get("MOVIE_DETAILS_TTL", 7 * 86400),
+            self.get("SERIES_DETAILS_TTL", 86400),
+            self.get("UPCOMING_EPISODES_TTL", 6 * 3600)
+        )
+    
+    def get_cache_max_stale(self):
+        """Get how many seconds past its TTL a cache entry is still shown while it is refreshed"""
+        return self.get("CACHE_MAX_STALE", 30 * 86400)
+    
+    def get_not_found_ttls(self):
+        """Get the seconds known misses are remembered, for (TMDB titles, OMDB IMDb IDs)"""
+        return (
+            self.get("NOT_FOUND_TTL", 6 * 3600),
+            self.get("OMDB_NOT_FOUND_TTL", 86400)
+        )
+    
+    def get_search_pages_shown(self):
+        """Get how many pages of search results are kept on screen while scrolling"""
+        return self.get("SEARCH_PAGES_SHOWN", 5)
+    
+    def get_trace_settings(self):
+        """Get the (enabled, file, max bytes, backups) for fetcher traces"""
+        return (
+            self.get("TRACE_ENABLED", True),
+            self.get("TRACE_FILE", "data/traces/trace.jsonl"),
+            self.get("TRACE_MAX_BYTES", 5 * 1024 * 1024),
+            self.get("TRACE_BACKUPS", 3)
+        )
+    
+    def get_replay_settings(self):
+        """Get the (latency, jitter, error rate) injected into replayed responses"""
+        return (
+            self.get("REPLAY_LATENCY", 0.0),
+            self.get("REPLAY_JITTER", 0.0),
+            self.get("REPLAY_ERROR_RATE", 0.0)
+        )
 
 # Create a singleton instance
 settings = SettingsHandler() 
\ No newline at end of file
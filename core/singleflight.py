@@ -0,0 +1,140 @@
+import asyncio
+import copy
+import threading
+import time
+
+class _Call:
+    """One in-flight (or just finished) upstream call and the callers sharing it"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self.async_waiters = []
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests into one upstream call.
+
+    The first caller for a key runs the call; every caller asking for the
+    same key while it is running waits for that result instead of issuing
+    its own request. Finished results linger for a short window so the
+    back-to-back repeats the screens make (details, then OMDB again for the
+    same IMDb ID) are shared too. Works for threads and coroutines alike,
+    so the sync and async fetchers coalesce with each other.
+
+    The leader gets the object its call returned; everyone else gets a deep
+    copy, so a screen that edits its details dict can't affect another.
+    """
+
+    def __init__(self, linger=2.0):
+        self.linger = linger
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        # Monitoring counters
+        self.upstream_calls = 0
+        self.shared_calls = 0
+
+    def _prune(self, now):
+        """Drop finished calls whose linger window has passed"""
+        expired = [
+            key for key, call in self._calls.items()
+            if call.finished_at is not None and now - call.finished_at >= self.linger
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def _join(self, key):
+        """Return (call, is_leader) for a key"""
+        with self._lock:
+            now = time.monotonic()
+            call = self._calls.get(key)
+            if call is not None and call.finished_at is not None and now - call.finished_at >= self.linger:
+                call = None
+
+            if call is None:
+                self._prune(now)
+                call = _Call()
+                self._calls[key] = call
+                self.upstream_calls += 1
+                return call, True
+
+            self.shared_calls += 1
+            return call, False
+
+    def _finish(self, key, call, result, error):
+        """Publish a call's outcome to everyone waiting on it"""
+        with self._lock:
+            call.result = copy.deepcopy(result) if error is None else None
+            call.error = error
+            call.finished_at = time.monotonic()
+            # Failures are never shared beyond the callers already waiting
+            if error is not None and self._calls.get(key) is call:
+                del self._calls[key]
+            waiters = call.async_waiters
+            call.async_waiters = []
+        call.event.set()
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(self._resolve_future, future)
+
+    @staticmethod
+    def _resolve_future(future):
+        if not future.done():
+            future.set_result(None)
+
+    def _shared_result(self, call):
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+
+    def do(self, key, fn):
+        """Run fn() once for all concurrent callers asking for the same key"""
+        call, leader = self._join(key)
+        if not leader:
+            call.event.wait()
+            return self._shared_result(call)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, None, e)
+            raise
+        self._finish(key, call, result, None)
+        return result
+
+    async def do_async(self, key, coroutine_fn):
+        """Coroutine version of do(); coroutine_fn() returns the awaitable to share"""
+        call, leader = self._join(key)
+        if not leader:
+            future = None
+            with self._lock:
+                if call.finished_at is None:
+                    loop = asyncio.get_running_loop()
+                    future = loop.create_future()
+                    call.async_waiters.append((loop, future))
+            if future is not None:
+                await future
+            return self._shared_result(call)
+
+        try:
+            result = await coroutine_fn()
+        except BaseException as e:
+            self._finish(key, call, None, e)
+            raise
+        self._finish(key, call, result, None)
+        return result
+
+    def stats(self):
+        """Upstream calls made versus calls served by sharing"""
+        with self._lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "shared_calls": self.shared_calls,
+                "in_flight": sum(1 for call in self._calls.values() if call.finished_at is None)
+            }
+
+# Shared by every fetcher in the process
+singleflight = SingleFlight()
@@ -0,0 +1,156 @@
+import contextvars
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from core.settings_handler import settings
+
+# The span the code running now belongs to; asyncio tasks and copied
+# contexts inherit it, new threads start without one
+_current = contextvars.ContextVar("trace_span", default=None)
+
+class Span:
+    """One timed stage of a fetcher call, with the stages it is made of"""
+
+    def __init__(self, name, attrs, parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.stages = []
+        self.events = []
+
+    def offset_ms(self, at):
+        """Milliseconds from the start of the root span to perf_counter() value at"""
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return round((at - root.start) * 1000, 3)
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "offset_ms": self.offset_ms(self.start),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3)
+        }
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if self.stages:
+            record["stages"] = [stage.to_dict() for stage in self.stages]
+        if self.events:
+            record["events"] = self.events
+        return record
+
+class Tracer:
+    """
+    Structured traces of fetcher calls, written to a rotating JSONL file.
+
+    A call opens a root span and everything it does opens nested spans: the
+    cache lookup, each HTTP request with its connect, TLS, time to headers
+    and transfer, JSON decoding and formatting. When the root span ends the
+    whole tree is written as one line, so tools/trace_summary.py can show
+    where the time of, say, a details view went. Messages the fetchers
+    used to print go into the span they happened in as events.
+
+    Controlled by TRACE_ENABLED, TRACE_FILE, TRACE_MAX_BYTES and
+    TRACE_BACKUPS; the file is opened on the first write.
+    """
+
+    def __init__(self):
+        self._logger = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the with block as a stage of the current span, or as a new root"""
+        if not settings.get_trace_settings()[0]:
+            yield None
+            return
+
+        parent = _current.get()
+        span = Span(name, attrs, parent)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current.reset(token)
+            if parent is not None:
+                parent.stages.append(span)
+            else:
+                self._write(span)
+
+    def stage(self, name, seconds, **attrs):
+        """Add a stage timed elsewhere, ending now, to the current span"""
+        parent = _current.get()
+        if parent is None:
+            return
+        span = Span(name, attrs, parent)
+        span.duration = seconds
+        span.start = time.perf_counter() - seconds
+        parent.stages.append(span)
+
+    def event(self, message, **attrs):
+        """Note something that happened; outside any span it is written on its own"""
+        if not settings.get_trace_settings()[0]:
+            return
+        span = _current.get()
+        if span is None:
+            record = {"name": "event", "started_at": self._timestamp(time.time()), "message": message}
+            record.update(attrs)
+            self._emit(record)
+            return
+        event = {"offset_ms": span.offset_ms(time.perf_counter()), "message": message}
+        event.update(attrs)
+        span.events.append(event)
+
+    def set(self, **attrs):
+        """Add attributes to the current span, e.g. where its result came from"""
+        span = _current.get()
+        if span is not None:
+            span.attrs.update(attrs)
+
+    def _write(self, span):
+        record = span.to_dict()
+        record["trace"] = uuid.uuid4().hex[:16]
+        record["started_at"] = self._timestamp(span.started_at)
+        del record["offset_ms"]
+        self._emit(record)
+
+    def _emit(self, record):
+        try:
+            self._get_logger().info(json.dumps(record, default=str))
+        except Exception as e:
+            # Tracing must never break a fetch
+            print(f"Error writing trace: {e}")
+
+    def _get_logger(self):
+        with self._lock:
+            if self._logger is None:
+                _, path, max_bytes, backups = settings.get_trace_settings()
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("movie_tracker.trace")
+                logger.handlers = [handler]
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                self._logger = logger
+            return self._logger
+
+    @staticmethod
+    def _timestamp(seconds):
+        return datetime.datetime.fromtimestamp(seconds).isoformat(timespec="milliseconds")
+
+# Shared by the fetchers, the HTTP transport and the JSON parser
+tracer = Tracer()
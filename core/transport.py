@@ -0,0 +1,343 @@
+"""
+Pluggable transports for the shared HTTP client.
+
+HttpClient mounts one requests adapter per host; the Transport decides which:
+
+    live    the pooled HTTPAdapter, talking to the real services
+    record  like live, but every response is also saved as a fixture
+    replay  responses are served from the fixtures without any network,
+            with optional latency and error injection
+
+Live and record adapters are metered: per host they count requests, the
+connections opened (the rest reused a pooled one), bytes on the wire and
+after decompression, and time connect, TLS, waiting for headers and the
+body transfer, all in core.metrics and as stages of the current trace span.
+
+Fixtures are JSON files keyed by method, URL and query parameters, with API
+keys left out so recordings can be shared. Injected latency and errors are
+derived from the seed, the fixture key and how often that key was requested,
+so a replay run behaves the same however its threads interleave.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from core.metrics import metrics
+from core.tracing import tracer
+from core.atomic_write import atomic_write_json
+
+MODES = ("live", "record", "replay")
+
+# Query parameters that carry credentials and never go into a fixture key
+SECRET_PARAMS = {"api_key", "apikey"}
+
+# Headers that describe the wire encoding rather than the stored body
+_WIRE_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+def fixture_key(method, url):
+    """Stable description of a request: method, URL and sorted non-secret params"""
+    parts = urlsplit(url)
+    params = sorted((key, value) for key, value in parse_qsl(parts.query) if key not in SECRET_PARAMS)
+    query = "&".join(f"{key}={value}" for key, value in params)
+    return f"{method} {parts.scheme}://{parts.netloc}{parts.path}" + (f"?{query}" if query else "")
+
+class FixtureStore:
+    """A directory of recorded responses, one JSON file per fixture key"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def path(self, key):
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}.json"
+
+    def save(self, key, response):
+        """Record a response with its body already read"""
+        body = response.content
+        try:
+            stored_body, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            stored_body, encoding = base64.b64encode(body).decode("ascii"), "base64"
+
+        fixture = {
+            "request": key,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                name: value for name, value in response.headers.items() if name.lower() not in _WIRE_HEADERS
+            },
+            "body": stored_body,
+            "body_encoding": encoding
+        }
+        atomic_write_json(self.path(key), fixture, indent=2)
+
+    def load(self, key):
+        """Get (status, reason, headers, body) for a key, or None if it was never recorded"""
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        if fixture.get("body_encoding") == "base64":
+            body = base64.b64decode(fixture["body"])
+        else:
+            body = fixture["body"].encode("utf-8")
+        return fixture["status"], fixture.get("reason", ""), fixture["headers"], body
+
+class _MeteredConnection:
+    """Connection mixin timing TCP connect (with DNS) and the TLS handshake"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            self._connect_seconds = time.perf_counter() - start
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - start
+        connect_seconds = getattr(self, "_connect_seconds", total)
+
+        metrics.incr("http.connections_opened", label=self.host)
+        metrics.observe("http.connect", connect_seconds, self.host)
+        tracer.stage("http.connect", connect_seconds)
+        if isinstance(self, HTTPSConnection):
+            metrics.observe("http.tls", total - connect_seconds, self.host)
+            tracer.stage("http.tls", total - connect_seconds)
+
+class _MeteredHTTPConnection(_MeteredConnection, HTTPConnection):
+    pass
+
+class _MeteredHTTPSConnection(_MeteredConnection, HTTPSConnection):
+    pass
+
+class _MeteredHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _MeteredHTTPConnection
+
+class _MeteredHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _MeteredHTTPSConnection
+
+class MeteredAdapter(HTTPAdapter):
+    """The pooled HTTPAdapter, reporting connections, bytes and timings to core.metrics"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _MeteredHTTPConnectionPool,
+            "https": _MeteredHTTPSConnectionPool
+        }
+
+    def send(self, request, **kwargs):
+        host = urlsplit(request.url).hostname or ""
+        metrics.incr("http.requests", label=host)
+        with tracer.span("http", host=host, path=urlsplit(request.url).path):
+            # Sending the request until the headers are in, including any connect
+            start = time.perf_counter()
+            response = super().send(request, **kwargs)
+            headers = time.perf_counter() - start
+            metrics.observe("http.headers", headers, host)
+            tracer.stage("http.headers", headers)
+            tracer.set(status=response.status_code)
+        self._meter_body(response, host)
+        return response
+
+    def _meter_body(self, response, host):
+        """Count wire and decoded bytes and transfer time as the body is read"""
+        raw = response.raw
+        stream = raw.stream
+
+        def metered_stream(*args, **kwargs):
+            wire_start = raw.tell()
+            decoded = 0
+            transfer = 0.0
+            chunks = stream(*args, **kwargs)
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        chunk = next(chunks)
+                    except StopIteration:
+                        return
+                    finally:
+                        transfer += time.perf_counter() - start
+                    decoded += len(chunk)
+                    yield chunk
+            finally:
+                # urllib3 does not track wire bytes for chunked bodies
+                wire = raw.tell() - wire_start or int(response.headers.get("Content-Length") or decoded)
+                metrics.incr("http.bytes_wire", wire, host)
+                metrics.incr("http.bytes_decoded", decoded, host)
+                metrics.observe("http.transfer", transfer, host)
+                # The body is read later, so this lands in whatever span reads it
+                tracer.stage("http.transfer", transfer, host=host, bytes=wire)
+
+        raw.stream = metered_stream
+
+class RecordingAdapter(MeteredAdapter):
+    """Metered adapter that saves every successful or client-error response as a fixture"""
+
+    def __init__(self, transport, **kwargs):
+        super().__init__(**kwargs)
+        self.transport = transport
+
+    def send(self, request, **kwargs):
+        # A fixture needs the full body, so never let the server answer 304
+        request.headers.pop("If-None-Match", None)
+        request.headers.pop("If-Modified-Since", None)
+        response = super().send(request, **kwargs)
+
+        # Failures and throttling are for replay's error injection to simulate
+        if response.status_code < 500 and response.status_code != 429:
+            self.transport.store.save(fixture_key(request.method, request.url), response)
+            self.transport.count("recorded")
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """Adapter that answers from recorded fixtures without touching the network"""
+
+    def __init__(self, transport):
+        super().__init__()
+        self.transport = transport
+
+    def _read_timeout(self, timeout):
+        if isinstance(timeout, tuple):
+            return timeout[1]
+        return timeout
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        with tracer.span("http", host=urlsplit(request.url).hostname or "", path=urlsplit(request.url).path,
+                         replayed=True):
+            response = self._replay(request, timeout)
+            tracer.set(status=response.status_code)
+            return response
+
+    def _replay(self, request, timeout):
+        key = fixture_key(request.method, request.url)
+        rng = self.transport.random_for(key)
+
+        delay = self.transport.latency + rng.uniform(0, self.transport.jitter)
+        read_timeout = self._read_timeout(timeout)
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            self.transport.count("timeouts")
+            raise requests.ReadTimeout(f"Replayed response for {key} took longer than {read_timeout}s", request=request)
+        if delay:
+            time.sleep(delay)
+
+        if rng.random() < self.transport.error_rate:
+            self.transport.count("injected_errors")
+            if self.transport.error_status is None:
+                raise requests.ConnectionError(f"Injected connection error for {key}", request=request)
+            return self._build_response(request, self.transport.error_status, "Injected error", {}, b"")
+
+        fixture = self.transport.store.load(key)
+        if fixture is None:
+            self.transport.count("missing")
+            tracer.event(f"No recorded fixture for {key}")
+            body = b'{"success": false, "status_message": "No recorded fixture"}'
+            return self._build_response(request, 404, "Not Found", {"Content-Type": "application/json"}, body)
+
+        status, reason, headers, body = fixture
+        self.transport.count("replayed")
+        etag = CaseInsensitiveDict(headers).get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return self._build_response(request, 304, "Not Modified", headers, b"")
+        return self._build_response(request, status, reason, headers, body)
+
+    def _build_response(self, request, status, reason, headers, body):
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.headers["Content-Length"] = str(len(body))
+        response.raw = io.BytesIO(body)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+class Transport:
+    """
+    Chooses the adapter HttpClient mounts for each host
+
+    Args:
+        mode: 'live', 'record' or 'replay'
+        fixtures_dir: Where record mode writes and replay mode reads fixtures
+        latency: Seconds added to every replayed response
+        jitter: Up to this many extra seconds, drawn per request
+        error_rate: Share of replayed requests that fail (0 to 1)
+        error_status: Status code the injected failures answer with, or
+            None to raise a connection error instead
+        seed: Seed for the latency and error draws
+    """
+
+    def __init__(self, mode="live", fixtures_dir=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=None, seed=0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown transport mode '{mode}', expected one of {', '.join(MODES)}")
+        self.mode = mode
+        self.store = FixtureStore(fixtures_dir or "data/fixtures")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self._requests_per_key = Counter()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Build the transport configured in the settings"""
+        mode, fixtures_dir = settings.get_transport_settings()
+        latency, jitter, error_rate = settings.get_replay_settings()
+        return cls(mode, fixtures_dir, latency, jitter, error_rate)
+
+    def create_adapter(self, pool_connections, pool_maxsize):
+        """Create the adapter mounted for one host"""
+        if self.mode == "replay":
+            return ReplayAdapter(self)
+        if self.mode == "record":
+            return RecordingAdapter(self, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        return MeteredAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def random_for(self, key):
+        """Random source for the nth request of a fixture key"""
+        with self._lock:
+            self._requests_per_key[key] += 1
+            attempt = self._requests_per_key[key]
+        return random.Random(f"{self.seed}:{key}:{attempt}")
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        """Counts of recorded, replayed, missing, injected and timed out requests"""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        """Forget the per-key request counts and stats, to replay a run from the start"""
+        with self._lock:
+            self._requests_per_key.clear()
+            self._counts.clear()
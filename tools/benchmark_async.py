@@ -0,0 +1,128 @@
+"""
+Throughput benchmark for AsyncMovieFetcher.
+
+Fetches movie details (TMDB then OMDB) for a batch of titles from the local
+fake API server in three ways: sequentially with MovieFetcher, with one
+thread per title like the screens used to, and concurrently on one event
+loop with AsyncMovieFetcher, and counts the requests each way made. For
+the event loop, also reports how long it was held up at a time, which
+blocking work in coroutines shows up in. Also checks the sync facade
+returns the same details as MovieFetcher.
+
+Usage: python tools/benchmark_async.py [titles] [latency_ms]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.cache_store import cache_store
+from core.movie_fetcher import MovieFetcher
+from core.async_movie_fetcher import AsyncMovieFetcher, BackgroundFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+
+def report(label, titles, elapsed, requests):
+    print(f"{label:<28} {titles / elapsed:>8.1f} titles/s   total {elapsed:>6.2f} s   {requests:>5} requests")
+
+
+def requests_made(server):
+    """
+    Requests the server answered since the last call; empties the cache so
+    the next way of fetching doesn't just revalidate what this one stored
+    """
+    count = sum(server.request_counts.values())
+    server.request_counts.clear()
+    cache_store.clear()
+    return count
+
+
+def main():
+    titles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+
+    server = start_fake_server(latency=latency)
+    urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    movie_ids = list(range(1, titles + 1))
+
+    # MovieFetcher writes to data/cache relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({
+        # Every way of fetching must reach the server, not the cache the previous one filled
+        "MOVIE_DETAILS_TTL": 0,
+        "SERIES_DETAILS_TTL": 0,
+        "UPCOMING_EPISODES_TTL": 0,
+        "CACHE_MAX_STALE": 0
+    })
+    # Otherwise a later run is handed the results an earlier one just fetched
+    singleflight.linger = 0
+    print(f"{titles} titles, {latency * 1000:.0f} ms server latency\n")
+
+    sync_fetcher = MovieFetcher(**urls)
+    async_fetcher = AsyncMovieFetcher(**urls, max_concurrency=32)
+
+    # Keep the fetchers' progress prints out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        sequential = [sync_fetcher.get_movie_details(movie_id) for movie_id in movie_ids]
+        sequential_elapsed = time.perf_counter() - start
+        sequential_requests = requests_made(server)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=sync_fetcher.get_movie_details, args=(movie_id,)) for movie_id in movie_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        threaded_elapsed = time.perf_counter() - start
+        threaded_requests = requests_made(server)
+
+        async def watch_loop(stalls):
+            """Record how late a 1 ms sleep wakes up, i.e. how long something held the loop"""
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                stalls.append(time.perf_counter() - start - 0.001)
+
+        async def run_async(stalls):
+            watcher = asyncio.ensure_future(watch_loop(stalls))
+            try:
+                return await async_fetcher.gather_movie_details(movie_ids)
+            finally:
+                watcher.cancel()
+                await async_fetcher.close()
+
+        start = time.perf_counter()
+        stalls = []
+        concurrent = asyncio.run(run_async(stalls))
+        async_elapsed = time.perf_counter() - start
+        async_requests = requests_made(server)
+
+        facade = BackgroundFetcher(AsyncMovieFetcher(**urls))
+        facade_result = facade.get_movie_details(movie_ids[0])
+        facade.shutdown()
+
+    report("sequential MovieFetcher", titles, sequential_elapsed, sequential_requests)
+    report("thread per title", titles, threaded_elapsed, threaded_requests)
+    report("AsyncMovieFetcher (gather)", titles, async_elapsed, async_requests)
+    stalls.sort()
+    print(f"\nEvent loop stalls during gather: p50 {stalls[len(stalls) // 2] * 1000:.2f} ms, "
+          f"p99 {stalls[int(len(stalls) * 0.99)] * 1000:.2f} ms, max {stalls[-1] * 1000:.2f} ms")
+
+    assert concurrent == sequential, "async results differ from MovieFetcher"
+    assert facade_result == sequential[0], "sync facade result differs from MovieFetcher"
+    print("\nAsync and facade results match MovieFetcher")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare the offline cache eviction policies on a skewed workload.
+
+Replays the same sequence of details lookups against a cache limited to a
+number of items, for each policy: a lookup that misses saves the details,
+as the fetchers do after downloading them. Popularity follows a Zipf
+distribution and payload sizes vary, and the titles of a small collection
+are pinned. Prints the hit ratio, the entries evicted and the time per
+lookup, and checks that no pinned entry was evicted.
+
+Usage: python tools/benchmark_cache_eviction.py [lookups] [titles] [cache_size]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache_store import CacheStore
+from core.metrics import metrics
+
+
+def workload(lookups, titles, seed=1):
+    """Title IDs to look up, the popular ones far more often"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(titles)]
+    ids = list(range(titles))
+    rng.shuffle(ids)
+    return [str(movie_id) for movie_id in rng.choices(ids, weights, k=lookups)]
+
+
+def details(movie_id):
+    # Series with long casts are several times the size of a small movie
+    cast = int(movie_id) % 40
+    return {"id": movie_id, "overview": "x" * 300, "cast": [{"name": f"Actor {i}"} for i in range(cast)]}
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    titles = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    cache_size = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+
+    sequence = workload(lookups, titles)
+    collection = [str(movie_id) for movie_id in range(0, titles, titles // 20)]
+    print(f"{lookups} lookups over {titles} titles, cache of {cache_size} items, {len(collection)} pinned")
+    print(f"{'policy':<8} {'hit ratio':>10} {'evicted':>8} {'KiB kept':>9} {'us/lookup':>10}  pins kept")
+
+    for policy in ("lru", "lfu", "size"):
+        metrics.reset()
+        cache = CacheStore(f"{policy}/cache.db", max_entries=cache_size, policy=policy)
+        cache.set_pinned("movie_details", collection)
+        for movie_id in collection:
+            cache.put("movie_details", movie_id, details(movie_id))
+
+        start = time.perf_counter()
+        for movie_id in sequence:
+            if cache.get("movie_details", movie_id) is None:
+                cache.put("movie_details", movie_id, details(movie_id))
+        elapsed = time.perf_counter() - start
+
+        counters = metrics.stats()["counters"]
+        # Lookups answered by the memory tier never reach the database
+        hits = counters.get("cache.hits", {}).get("movie_details", 0) + counters.get("cache.memory", {}).get("hit", 0)
+        evicted = counters.get("cache.evictions", {}).get(policy, 0)
+        pins_kept = len(cache.present("movie_details", collection)) == len(collection)
+        print(
+            f"{policy:<8} {100 * hits / lookups:>9.1f}% {evicted:>8} {cache.totals()[1] / 1024:>9.1f} "
+            f"{elapsed / lookups * 1e6:>10.1f}  {'yes' if pins_kept else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
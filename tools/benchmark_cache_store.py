@@ -0,0 +1,106 @@
+"""
+Compare the SQLite cache store with the file-per-key JSON cache it replaced.
+
+Fills both with the same number of details entries, then times saving them,
+random single lookups (hits and misses), a batch lookup of a whole
+collection, the same lookups from several threads at once, and counting
+and sizing the whole cache.
+
+Usage: python tools/benchmark_cache_store.py [entries] [threads]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache_store import CacheStore
+
+
+class FileCache:
+    """The old cache: one JSON file per key"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, namespace, key):
+        safe_key = "".join(c if c.isalnum() else "_" for c in key)
+        return self.cache_dir / f"{namespace}_{safe_key}.json"
+
+    def put(self, namespace, key, data):
+        with open(self._path(namespace, key), 'w', encoding='utf-8') as f:
+            json.dump({"timestamp": "2024-01-01T00:00:00", "data": data}, f)
+
+    def get(self, namespace, key):
+        path = self._path(namespace, key)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def get_many(self, namespace, keys):
+        wanted = {self._path(namespace, key).name: key for key in keys}
+        with os.scandir(self.cache_dir) as entries:
+            present = [entry.name for entry in entries if entry.name in wanted]
+        return {wanted[name]: self.get(namespace, wanted[name]) for name in present}
+
+    def stats(self):
+        with os.scandir(self.cache_dir) as entries:
+            sizes = [entry.stat().st_size for entry in entries]
+        return {"entries": len(sizes), "bytes": sum(sizes)}
+
+
+def details(movie_id):
+    return {
+        "id": movie_id,
+        "title": f"Movie {movie_id}",
+        "overview": "A movie. " * 40,
+        "genres": ["Drama", "Comedy"],
+        "cast": [{"name": f"Actor {i}", "character": f"Role {i}"} for i in range(15)]
+    }
+
+
+def timed(label, count, run):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms {elapsed / count * 1e6:9.1f} us/op")
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+
+    keys = [str(movie_id) for movie_id in range(entries)]
+    lookups = [str(random.randrange(entries * 2)) for _ in range(2000)]
+    collection = random.sample(keys, min(500, entries))
+    payloads = {key: details(int(key)) for key in keys}
+
+    for name, cache in (("file per key", FileCache("files")), ("sqlite store", CacheStore("store/cache.db", max_entries=entries))):
+        print(f"\n{name}, {entries} entries")
+        timed("save", entries, lambda: [cache.put("movie_details", key, payloads[key]) for key in keys])
+        timed("single lookups", len(lookups), lambda: [cache.get("movie_details", key) for key in lookups])
+        timed("batch lookup", len(collection), lambda: cache.get_many("movie_details", collection))
+
+        def lookup_chunk(chunk):
+            for key in chunk:
+                cache.get("movie_details", key)
+
+        chunks = [lookups[i::threads] for i in range(threads)]
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            # Start the threads, and open their database connections, before timing
+            list(pool.map(lookup_chunk, [lookups[:1]] * threads))
+            timed(f"lookups on {threads} threads", len(lookups), lambda: list(pool.map(lookup_chunk, chunks)))
+        timed("count and size", 1, cache.stats)
+
+
+if __name__ == "__main__":
+    main()
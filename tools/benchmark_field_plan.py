@@ -0,0 +1,102 @@
+"""
+Compare the planned append_to_response sets with the ones used before.
+
+For each details view, requests the TMDB details resource of a batch of
+titles from the local fake API server twice: with the old fixed appends and
+with the appends fetch_plan derives from the fields the view shows. Prints
+the bytes the server sent per title, the median time to parse and format
+one body, and the calls the plan makes in total.
+
+Usage: python tools/benchmark_field_plan.py [titles] [cast_size]
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.http_client import http_client
+from core.movie_fetcher import MovieFetcher
+from core.fetch_plan import plan_movie, plan_series, series_fields
+from tools.fake_api_server import start_fake_server
+
+# append_to_response as sent before the planner
+LEGACY_MOVIE_APPENDS = "credits,release_dates"
+LEGACY_SERIES_APPENDS = "external_ids,next_episode_to_air,last_episode_to_air"
+LEGACY_SERIES_CAST_APPENDS = LEGACY_SERIES_APPENDS + ",credits,aggregate_credits"
+
+
+def download(server, endpoint, params):
+    """GET one resource; returns (body, bytes the server sent)"""
+    server.bytes_sent = 0
+    response = http_client.get(endpoint, params=params)
+    response.raise_for_status()
+    return response.content, server.bytes_sent
+
+
+def run_view(server, fetcher, label, ids, request, format_details, legacy_appends, plan):
+    sent = {"before": 0, "planned": 0}
+    timings = {"before": [], "planned": []}
+    for item_id in ids:
+        endpoint, params = request(item_id, plan)
+        planned_params = dict(params)
+        legacy_params = dict(params, append_to_response=legacy_appends)
+
+        results = {}
+        for key, query in (("before", legacy_params), ("planned", planned_params)):
+            body, sent_bytes = download(server, endpoint, query)
+            sent[key] += sent_bytes
+            start = time.perf_counter()
+            results[key] = format_details(json.loads(body))
+            timings[key].append(time.perf_counter() - start)
+
+        shown = {field: results["before"].get(field) for field in plan.fields if field in results["before"]}
+        assert shown == {field: results["planned"].get(field) for field in shown}, f"{label} {item_id}: fields differ"
+
+    before, planned = sent["before"] / len(ids), sent["planned"] / len(ids)
+    print(
+        f"{label:<24} {before / 1024:>8.1f} {planned / 1024:>8.1f} KiB  {100 * (1 - planned / before):>4.0f}% "
+        f"{statistics.median(timings['before']) * 1000:>8.2f} {statistics.median(timings['planned']) * 1000:>8.2f} ms"
+        f"  {'+'.join(plan.endpoints())} [{plan.append_to_response}]"
+    )
+
+
+def main():
+    titles = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cast_size = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+
+    server = start_fake_server()
+    server.cast_size = cast_size
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": ""})
+    fetcher = MovieFetcher(tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url)
+    ids = list(range(1, titles + 1))
+
+    print(f"{titles} titles per view, cast size {cast_size}; per title: bytes sent, median parse + format")
+    print(f"{'view':<24} {'before':>8} {'planned':>8}  {'saved':>9} {'before':>8} {'planned':>8}     calls")
+
+    views = (
+        ("movie details", fetcher._movie_request, lambda data: fetcher._format_movie_details(data, {}),
+         LEGACY_MOVIE_APPENDS, plan_movie()),
+        ("movie runtime + genres", fetcher._movie_request, lambda data: fetcher._format_movie_details(data, {}),
+         LEGACY_MOVIE_APPENDS, plan_movie({"title", "runtime", "duration", "genres"})),
+        ("series details", fetcher._series_request,
+         lambda data: fetcher._format_series_details(data, {}, True),
+         LEGACY_SERIES_CAST_APPENDS, plan_series(series_fields(include_cast=True, include_external=True, episodes=True))),
+        ("series without cast", fetcher._series_request,
+         lambda data: fetcher._format_series_details(data, {}, False),
+         LEGACY_SERIES_APPENDS, plan_series(series_fields()))
+    )
+    for label, request, format_details, legacy_appends, plan in views:
+        run_view(server, fetcher, label, ids, request, format_details, legacy_appends, plan)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark bare requests.get against the pooled HttpClient.
+
+Runs the same GET workload and the same MovieFetcher.get_movie_details
+workload against the local fake API server, once opening a new connection
+per request and once through the shared keep-alive pools, and prints
+requests/second with p50/p99 latency for each.
+
+Usage: python tools/benchmark_http.py [requests] [threads]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from core.http_client import HttpClient
+from core.movie_fetcher import MovieFetcher
+from tools.fake_api_server import start_fake_server
+
+
+class UnpooledClient:
+    """The old behaviour: every call opens its own connection"""
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        return requests.get(url, params=params, timeout=timeout or 10, **kwargs)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(label, call, count, threads):
+    """Time count calls spread over threads and print a summary line"""
+    latencies = []
+
+    def timed(i):
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<34} {count / elapsed:>9.1f} req/s   "
+        f"p50 {percentile(latencies, 50) * 1000:>7.2f} ms   "
+        f"p99 {percentile(latencies, 99) * 1000:>7.2f} ms   "
+        f"mean {statistics.mean(latencies) * 1000:>7.2f} ms"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    server = start_fake_server()
+    url = f"{server.tmdb_base_url}/movie/550"
+
+    # MovieFetcher writes to data/cache relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+
+    unpooled = UnpooledClient()
+    pooled = HttpClient()
+    print(f"{count} requests, {threads} threads, server {server.base_url}\n")
+
+    run("GET  before (requests.get)", lambda i: unpooled.get(url), count, threads)
+    run("GET  after  (pooled HttpClient)", lambda i: pooled.get(url), count, threads)
+
+    fetchers = {
+        "details before": MovieFetcher(http=unpooled, tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url),
+        "details after": MovieFetcher(http=pooled, tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url)
+    }
+    for label, fetcher in fetchers.items():
+        # Keep MovieFetcher's progress prints out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            latencies = []
+            for i in range(count // 2):
+                call_start = time.perf_counter()
+                fetcher.get_movie_details(i + 1)
+                latencies.append(time.perf_counter() - call_start)
+            elapsed = time.perf_counter() - start
+        print(
+            f"{label:<34} {len(latencies) / elapsed:>9.1f} calls/s "
+            f"p50 {percentile(latencies, 50) * 1000:>7.2f} ms   "
+            f"p99 {percentile(latencies, 99) * 1000:>7.2f} ms"
+        )
+
+    pooled.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
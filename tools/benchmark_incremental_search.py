@@ -0,0 +1,137 @@
+"""
+Measure search as you type against the local fake API server.
+
+Types a few queries one character at a time, as a user would, into an
+IncrementalSearch driven by a small stand-in for the Tk event loop, once
+searching on every keystroke and once with the default debounce. Prints the
+upstream searches made, how many results were dropped as superseded, the
+renders, and the keystroke-to-render times per source of results. The
+queries share prefixes and differ in case, so later ones are first
+answered from the search index.
+
+Usage: python tools/benchmark_incremental_search.py [latency_ms] [keystroke_ms]
+"""
+
+import contextlib
+import heapq
+import io
+import itertools
+import os
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.async_movie_fetcher import AsyncMovieFetcher, BackgroundFetcher
+from core.incremental_search import IncrementalSearch
+from core.metrics import metrics
+from core.search_cache import search_index
+from core.cache_store import cache_store
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+QUERIES = ["the office", "The Office", "the offer", "alien", "aliens"]
+
+
+class EventLoop:
+    """Just enough of Tk's after() to drive IncrementalSearch from one thread"""
+
+    def __init__(self):
+        self._timers = []
+        self._cancelled = set()
+        self._calls = queue.Queue()
+        self._ids = itertools.count()
+
+    def after(self, ms, callback):
+        if ms == 0:
+            # Called from other threads, as Tk allows
+            self._calls.put(callback)
+            return None
+        timer_id = next(self._ids)
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, timer_id, callback))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def run_for(self, seconds):
+        deadline = time.perf_counter() + seconds
+        while True:
+            now = time.perf_counter()
+            while self._timers and self._timers[0][0] <= now:
+                _, timer_id, callback = heapq.heappop(self._timers)
+                if timer_id not in self._cancelled:
+                    callback()
+            if now >= deadline:
+                return
+            wait = deadline - now
+            if self._timers:
+                wait = min(wait, max(self._timers[0][0] - now, 0))
+            try:
+                self._calls.get(timeout=wait)()
+            except queue.Empty:
+                pass
+
+
+def type_queries(background, debounce, keystroke, latency):
+    """Type every query and wait for its results; returns the number of renders"""
+    loop = EventLoop()
+    text = [""]
+    renders = []
+    search = IncrementalSearch(
+        loop, lambda: text[0], "movie",
+        on_results=lambda results, query: renders.append(query),
+        on_error=lambda error: None,
+        fetcher=background, debounce=debounce, min_chars=1
+    )
+    for query in QUERIES:
+        text[0] = ""
+        for char in query:
+            text[0] += char
+            search.on_key()
+            loop.run_for(keystroke)
+        loop.run_for(debounce + latency * 3)
+    return len(renders)
+
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 150) / 1000
+    keystroke = (float(sys.argv[2]) if len(sys.argv) > 2 else 120) / 1000
+
+    server = start_fake_server(latency=latency)
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench"})
+    singleflight.linger = 0
+    debounce, _ = settings.get_search_settings()
+
+    print(f"{latency * 1000:.0f} ms per request, {keystroke * 1000:.0f} ms between keystrokes")
+    try:
+        for label, wait in (("every keystroke", 0.0), (f"debounce {debounce * 1000:.0f} ms", debounce)):
+            # An empty cache, so every search goes upstream
+            os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+            search_index.clear()
+            cache_store.clear()
+            background = BackgroundFetcher(AsyncMovieFetcher(
+                tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url
+            ))
+            metrics.reset()
+            server.request_counts.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                renders = type_queries(background, wait, keystroke, latency)
+            background.shutdown()
+
+            stats = metrics.stats()
+            superseded = stats["counters"].get("search.superseded", {}).get("movie", 0)
+            print(f"\n{label}: {sum(server.request_counts.values())} upstream searches, "
+                  f"{superseded} superseded, {renders} renders")
+            for source, timing in sorted(stats["timings"].get("search.to_render", {}).items()):
+                print(f"  {source:<16} {timing['count']:>4} renders  p50 {timing['p50_ms']:>6.0f} ms"
+                      f"  p95 {timing['p95_ms']:>6.0f} ms")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
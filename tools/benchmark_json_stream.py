@@ -0,0 +1,159 @@
+"""
+Compare full and streaming JSON parsing of large TMDB credits payloads.
+
+Records series and movie details responses with credits appended from the
+local fake API server at several cast sizes, then parses each recording both
+ways: json.loads over the whole body, and json_stream.load_trimmed over 64 KiB
+chunks with the trim spec MovieFetcher uses. Reports median parse-and-format
+time and peak traced memory, checks both produce the same details, and
+finally times get_series_details end to end with streaming on and off.
+
+Usage: python tools/benchmark_json_stream.py [cast_size ...]
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TOOLS_DIR))
+
+from core.settings_handler import settings
+from core.http_client import http_client
+from core.movie_fetcher import MovieFetcher
+from core.fetch_plan import plan_series, series_fields
+from core.singleflight import singleflight
+from core import json_stream
+from tools.fake_api_server import start_fake_server
+
+REPEATS = 5
+
+SERIES_PLAN = plan_series(series_fields(include_cast=True))
+
+
+def record(fetcher, kind, item_id, path):
+    """Save the raw response body for one details request"""
+    if kind == "series":
+        endpoint, params = fetcher._series_request(item_id, SERIES_PLAN)
+    else:
+        endpoint, params = fetcher._movie_request(item_id)
+    response = http_client.get(endpoint, params=params)
+    response.raise_for_status()
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+
+def parse_full(path):
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def parse_streamed(path, trim):
+    with open(path, "rb") as f:
+        return json_stream.load_trimmed(iter(lambda: f.read(json_stream.CHUNK_SIZE), b""), trim)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def measure(action):
+    """Median seconds over REPEATS runs, and peak traced bytes of one more run"""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = action()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    action()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, statistics.median(timings), peak
+
+
+def main():
+    cast_sizes = [int(arg) for arg in sys.argv[1:]] or [400, 2000, 8000]
+    if json_stream.ijson is None:
+        print("ijson is not installed; streaming falls back to full parsing")
+        return
+
+    server = start_fake_server()
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": ""})
+    singleflight.linger = 0
+    fetcher = MovieFetcher(tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url)
+
+    print(f"{'payload':<22} {'size':>9}  {'full ms':>8} {'full MiB':>9}  {'stream ms':>9} {'stream MiB':>10}")
+    for cast_size in cast_sizes:
+        server.cast_size = cast_size
+        for kind, format_details, trim in (
+            ("series", lambda data: fetcher._format_series_details(data, {}, True), fetcher._series_trim(SERIES_PLAN)),
+            ("movie", lambda data: fetcher._format_movie_details(data, {}), fetcher._movie_trim())
+        ):
+            path = f"{kind}_{cast_size}.json"
+            record(fetcher, kind, cast_size, path)
+
+            full, full_time, full_peak = measure(lambda: format_details(parse_full(path)))
+            streamed, stream_time, stream_peak = measure(lambda: format_details(parse_streamed(path, trim)))
+            assert full == streamed, f"{path}: streamed details differ"
+
+            print(
+                f"{kind + ' cast ' + str(cast_size):<22} {os.path.getsize(path) / 1024:>7.0f}KiB"
+                f"  {full_time * 1000:>8.1f} {full_peak / 2 ** 20:>9.2f}"
+                f"  {stream_time * 1000:>9.1f} {stream_peak / 2 ** 20:>10.2f}"
+            )
+
+    server.shutdown()
+
+    # End to end through the fetcher, with the server in its own process so
+    # its allocations don't show up in the traced peak
+    port = free_port()
+    server_process = subprocess.Popen(
+        [sys.executable, os.path.join(TOOLS_DIR, "fake_api_server.py"), str(port), str(cast_sizes[-1])],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        fetcher = MovieFetcher(tmdb_base_url=f"http://127.0.0.1:{port}/3", omdb_base_url=f"http://127.0.0.1:{port}/omdb/")
+        print()
+        for label, threshold in (("fetch, full parse", float("inf")), ("fetch, streamed", json_stream.STREAM_THRESHOLD)):
+            json_stream.STREAM_THRESHOLD = threshold
+
+            def fetch():
+                # A cached copy would be revalidated with a 304 instead of downloaded
+                fetcher.cache.delete("series_details", "1")
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return fetcher._fetch_series_details(1, SERIES_PLAN)
+
+            _, elapsed, peak = measure(fetch)
+            print(f"{label:<22} cast {cast_sizes[-1]}: {elapsed * 1000:8.1f} ms {peak / 2 ** 20:8.2f} MiB peak")
+    finally:
+        server_process.terminate()
+        server_process.wait()
+
+
+if __name__ == "__main__":
+    main()
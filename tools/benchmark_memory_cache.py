@@ -0,0 +1,89 @@
+"""
+Measure the in-memory tier in front of the offline cache.
+
+Fills a cache store with details entries, then replays lookups of a skewed
+working set, the way the screens open the same few details again and
+again, once with the memory tier and once with every lookup going to
+SQLite. Prints the time per lookup and each tier's hit ratio, and checks
+that saving and deleting an entry reach the memory tier too.
+
+Usage: python tools/benchmark_memory_cache.py [entries] [lookups] [memory_entries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cache_store import CacheStore
+from core.memory_cache import MemoryCache
+from core.metrics import metrics
+
+
+def details(movie_id):
+    return {
+        "id": movie_id,
+        "title": f"Movie {movie_id}",
+        "overview": "A movie. " * 40,
+        "genres": ["Drama", "Comedy"],
+        "cast": [{"name": f"Actor {i}", "character": f"Role {i}"} for i in range(15)]
+    }
+
+
+def workload(lookups, entries, seed=1):
+    """Keys to look up, the popular ones far more often"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(entries)]
+    return [str(movie_id) for movie_id in rng.choices(range(entries), weights, k=lookups)]
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    memory_entries = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+
+    sequence = workload(lookups, entries)
+    print(f"{lookups} lookups over {entries} cached entries, {memory_entries} kept in memory")
+    print(f"{'':<16} {'us/lookup':>10} {'memory hits':>12} {'disk hits':>10}")
+
+    # A one-byte memory tier keeps nothing, so every lookup reads SQLite
+    for label, memory in (
+        ("sqlite only", MemoryCache(max_entries=1, max_bytes=1)),
+        ("memory + sqlite", MemoryCache(max_entries=memory_entries))
+    ):
+        cache = CacheStore(f"{label.replace(' ', '_')}/cache.db", max_entries=entries, memory=memory)
+        for movie_id in range(entries):
+            cache.put("movie_details", str(movie_id), details(movie_id))
+        memory.clear()
+        metrics.reset()
+
+        start = time.perf_counter()
+        for key in sequence:
+            cache.get("movie_details", key)
+        elapsed = time.perf_counter() - start
+
+        counters = metrics.stats()["counters"]
+        memory_hits = counters.get("cache.memory", {}).get("hit", 0)
+        disk_hits = counters.get("cache.hits", {}).get("movie_details", 0)
+        print(
+            f"{label:<16} {elapsed / lookups * 1e6:>10.1f} {100 * memory_hits / lookups:>11.1f}% "
+            f"{100 * disk_hits / lookups:>9.1f}%"
+        )
+
+    # Writes go through and deletes invalidate
+    hot = sequence[0]
+    cache.get("movie_details", hot)["data"]["title"] = "changed by a caller"
+    assert cache.get("movie_details", hot)["data"]["title"] == f"Movie {hot}", "memory copy was shared"
+    cache.put("movie_details", hot, {"id": hot, "title": "saved"})
+    assert cache.get("movie_details", hot)["data"]["title"] == "saved", "save did not reach memory"
+    cache.delete("movie_details", hot)
+    assert cache.get("movie_details", hot) is None, "delete did not reach memory"
+    print("write-through and invalidation: ok")
+
+
+if __name__ == "__main__":
+    main()
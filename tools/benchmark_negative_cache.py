@@ -0,0 +1,83 @@
+"""
+Count the upstream calls saved by remembering lookups that found nothing.
+
+Against the local fake API server, where some movie and series IDs answer
+404 and some IMDb IDs are unknown to OMDB, opens the details of a mix of
+titles several times over, the way browsing back and forth does. Details
+TTLs are off and every title changes between rounds, so each open of a
+title that exists downloads it from TMDB again and asks OMDB for its
+ratings. Runs with known misses forgotten at once and with the default
+NOT_FOUND_TTL / OMDB_NOT_FOUND_TTL, and prints the requests made per
+endpoint and the calls the cache.negative counters saved.
+
+Usage: python tools/benchmark_negative_cache.py [titles] [rounds]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.cache_store import cache_store
+from core.metrics import metrics
+from core.movie_fetcher import MovieFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+
+def main():
+    titles = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    server = start_fake_server()
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({
+        "TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench",
+        "MOVIE_DETAILS_TTL": 0, "SERIES_DETAILS_TTL": 0, "UPCOMING_EPISODES_TTL": 0, "CACHE_MAX_STALE": 0
+    })
+    singleflight.linger = 0
+    fetcher = MovieFetcher(tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url)
+
+    # A quarter of the titles are gone from TMDB, another quarter are missing from OMDB
+    ids = list(range(1, titles + 1))
+    server.missing["movie"] = set(ids[::4])
+    server.missing["tv"] = set(ids[::4])
+    server.omdb_missing = {f"tt{item_id:07d}" for item_id in ids[1::4]}
+
+    print(f"{titles} movies and {titles} series opened {rounds} times, "
+          f"{len(server.missing['movie'])} of each not on TMDB, {len(server.omdb_missing)} not on OMDB")
+    print(f"{'':<22} {'tmdb':>6} {'omdb':>6} {'saved tmdb':>11} {'saved omdb':>11}")
+    try:
+        for label, ttls in (("misses forgotten", {"NOT_FOUND_TTL": 0, "OMDB_NOT_FOUND_TTL": 0}), ("misses remembered", {})):
+            for name in ("NOT_FOUND_TTL", "OMDB_NOT_FOUND_TTL"):
+                settings.settings.pop(name, None)
+            settings.settings.update(ttls)
+            cache_store.clear()
+            server.request_counts.clear()
+            metrics.reset()
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(rounds):
+                    for item_id in ids:
+                        server.touch(f"/3/movie/{item_id}")
+                        server.touch(f"/3/tv/{item_id}")
+                        fetcher.get_movie_details(item_id)
+                        fetcher.get_series_detail_bundle(item_id)
+
+            omdb = server.request_counts["/omdb/"]
+            tmdb = sum(server.request_counts.values()) - omdb
+            saved = metrics.stats()["counters"].get("cache.negative", {})
+            print(
+                f"{label:<22} {tmdb:>6} {omdb:>6} {saved.get('movie', 0) + saved.get('tv', 0):>11} "
+                f"{saved.get('omdb', 0):>11}"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
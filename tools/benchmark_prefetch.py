@@ -0,0 +1,94 @@
+"""
+Measure what prefetching the top search results saves when opening details.
+
+Against the local fake API server with added latency, runs a search, waits
+a short "reading" time as a user would, then opens one of the first cards
+the way the screens do, with and without DetailsPrefetcher. Prints the time
+from click to details for each, and the upstream requests made, including
+a run where a second search starts before the prefetches of the first.
+
+Usage: python tools/benchmark_prefetch.py [latency_ms] [think_ms]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.async_movie_fetcher import AsyncMovieFetcher, BackgroundFetcher
+from core.prefetch import DetailsPrefetcher
+from core.cache_store import cache_store
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+SEARCHES = 6
+
+
+def open_after_search(server, background, kind, query, prefetch, think, clicked):
+    """Search, wait think seconds, open result number clicked; returns seconds to details"""
+    # An empty cache, as for a title never opened before
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    cache_store.clear()
+    prefetcher = DetailsPrefetcher(kind, fetcher=background, top_n=3 if prefetch else 0, delay=0.05)
+    results = background.submit("search_media", query, kind).result()
+    prefetcher.prefetch(results)
+    time.sleep(think)
+
+    start = time.perf_counter()
+    details = prefetcher.get_details(results[clicked]["id"]).result()
+    elapsed = time.perf_counter() - start
+    assert details, f"no details for {query}"
+    return elapsed
+
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 300) / 1000
+    think = (float(sys.argv[2]) if len(sys.argv) > 2 else 1500) / 1000
+
+    server = start_fake_server(latency=latency)
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench"})
+    singleflight.linger = 0
+    background = BackgroundFetcher(AsyncMovieFetcher(
+        tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url
+    ))
+
+    print(f"{latency * 1000:.0f} ms per request, {think * 1000:.0f} ms between results and click")
+    print(f"{'':<24} {'median open':>12} {'requests':>9}")
+    try:
+        for label, kind, prefetch in (
+            ("movie, no prefetch", "movie", False),
+            ("movie, prefetch top 3", "movie", True),
+            ("series, no prefetch", "tv", False),
+            ("series, prefetch top 3", "tv", True)
+        ):
+            server.request_counts.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings = [
+                    open_after_search(server, background, kind, f"{label} {n}", prefetch, think, n % 3)
+                    for n in range(SEARCHES)
+                ]
+            print(f"{label:<24} {statistics.median(timings) * 1000:>9.0f} ms {sum(server.request_counts.values()):>9}")
+
+        # A new search before the prefetches start drops them
+        server.request_counts.clear()
+        os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+        cache_store.clear()
+        prefetcher = DetailsPrefetcher("movie", fetcher=background, top_n=3, delay=0.5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            prefetcher.prefetch(background.submit("search_media", "first", "movie").result())
+            prefetcher.cancel()
+            time.sleep(1)
+        print(f"{'cancelled by new search':<24} {'':>12} {sum(server.request_counts.values()):>9}")
+    finally:
+        background.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Load-test MovieFetcher offline against recorded fixtures.
+
+Records the search and details views for a set of queries from the local
+fake API server (or uses a directory from record_fixtures.py --fake with
+the default queries), stops the server, then replays the same views
+through the replay transport with increasing latency and injected
+connection errors. Each scenario runs twice from an
+empty cache to check the replay is deterministic, and prints wall time,
+replayed and injected request counts and how many titles came back empty.
+
+Usage: python tools/benchmark_replay.py [fixtures_dir]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.http_client import HttpClient
+from core.movie_fetcher import MovieFetcher
+from core.singleflight import singleflight
+from core.transport import Transport
+from tools.fake_api_server import start_fake_server
+from tools.record_fixtures import DEFAULT_QUERIES, FAKE_PORT, open_views
+
+# (label, latency, jitter, error_rate)
+SCENARIOS = [
+    ("no latency", 0.0, 0.0, 0.0),
+    ("20 ms + 0-10 ms", 0.02, 0.01, 0.0),
+    ("20 ms, 5% errors", 0.02, 0.0, 0.05),
+    ("20 ms, 20% errors", 0.02, 0.0, 0.2)
+]
+
+
+def run(fixtures_dir, urls, latency, jitter, error_rate):
+    """Replay the views once from an empty cache; returns (seconds, stats, loaded)"""
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    transport = Transport("replay", fixtures_dir, latency, jitter, error_rate)
+    fetcher = MovieFetcher(http=HttpClient(transport=transport, backoff=0.01), **urls)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = open_views(fetcher, DEFAULT_QUERIES)
+    return time.perf_counter() - start, transport.stats(), loaded
+
+
+def main():
+    settings.settings.update({
+        "TMDB_API_KEY": "bench",
+        "OMDB_API_KEY": "bench",
+        # Keep the breakers out of the way so every scenario sees every request
+        "CIRCUIT_FAILURE_THRESHOLD": 10 ** 6,
+        # Every scenario must replay its requests rather than read the cache
+        "MOVIE_DETAILS_TTL": 0,
+        "SERIES_DETAILS_TTL": 0,
+        "UPCOMING_EPISODES_TTL": 0,
+        "CACHE_MAX_STALE": 0
+    })
+    singleflight.linger = 0
+
+    fixtures_dir = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else None
+    server = start_fake_server(FAKE_PORT)
+    urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    if fixtures_dir is None:
+        fixtures_dir = tempfile.mkdtemp(prefix="movie_fixtures_")
+        os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+        transport = Transport("record", fixtures_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            open_views(MovieFetcher(http=HttpClient(transport=transport), **urls), DEFAULT_QUERIES)
+        print(f"Recorded {transport.stats()['recorded']} responses to {fixtures_dir}")
+    server.shutdown()
+    server.server_close()
+
+    print(f"{'scenario':<20} {'time':>8} {'replayed':>9} {'injected':>9} {'empty':>6}  repeatable")
+    for label, latency, jitter, error_rate in SCENARIOS:
+        elapsed, stats, loaded = run(fixtures_dir, urls, latency, jitter, error_rate)
+        _, repeat_stats, repeat_loaded = run(fixtures_dir, urls, latency, jitter, error_rate)
+        empty = sum(1 for details in loaded.values() if not details)
+        print(
+            f"{label:<20} {elapsed:>7.2f}s {stats.get('replayed', 0):>9} {stats.get('injected_errors', 0):>9} "
+            f"{empty:>6}  {'yes' if (stats, loaded) == (repeat_stats, repeat_loaded) else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
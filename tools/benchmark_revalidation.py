@@ -0,0 +1,123 @@
+"""
+Measure what conditional requests save when refreshing a collection.
+
+Fills the cache for a collection of movies and series from the local fake
+API server, marks a share of them as changed upstream, then refreshes the
+whole collection twice: once with the stored ETags stripped (a full
+download) and once revalidating with If-None-Match. Prints the bytes the
+server sent and the 304s it answered for each run, for the sync and async
+fetchers.
+
+Usage: python tools/benchmark_revalidation.py [titles] [changed_fraction]
+"""
+
+import asyncio
+import contextlib
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.movie_fetcher import MovieFetcher
+from core.async_movie_fetcher import AsyncMovieFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+
+def strip_validators(cache):
+    """Drop stored validators so the next refresh downloads everything"""
+    for namespace, key, entry in list(cache.entries()):
+        timestamp = datetime.datetime.fromisoformat(entry["timestamp"]).timestamp()
+        cache.put(namespace, key, entry["data"], timestamp=timestamp)
+
+
+def refresh_sync(fetcher, movie_ids, tv_ids):
+    for movie_id in movie_ids:
+        fetcher.get_movie_details(movie_id)
+    for tv_id in tv_ids:
+        fetcher.get_series_detail_bundle(tv_id)
+
+
+def refresh_async(urls, movie_ids, tv_ids):
+    async def run():
+        fetcher = AsyncMovieFetcher(**urls)
+        try:
+            await fetcher.gather_movie_details(movie_ids)
+            await asyncio.gather(*(fetcher.get_series_detail_bundle(tv_id) for tv_id in tv_ids))
+        finally:
+            await fetcher.close()
+    asyncio.run(run())
+
+
+def measure(server, label, action):
+    server.bytes_sent = 0
+    server.not_modified = 0
+    server.request_counts.clear()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        action()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<26} {sum(server.request_counts.values()):>5} requests  "
+        f"{server.not_modified:>5} x 304  {server.bytes_sent / 1024:>9.1f} KiB  {elapsed:6.2f}s"
+    )
+    return server.bytes_sent
+
+
+def main():
+    titles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    changed_fraction = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+
+    server = start_fake_server()
+    urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({
+        "TMDB_API_KEY": "bench",
+        "OMDB_API_KEY": "bench",
+        # Every refresh must revalidate rather than use a fresh cache entry
+        "MOVIE_DETAILS_TTL": 0,
+        "SERIES_DETAILS_TTL": 0,
+        "UPCOMING_EPISODES_TTL": 0,
+        "CACHE_MAX_STALE": 0
+    })
+    # Every refresh must reach the server rather than a coalesced result
+    singleflight.linger = 0
+
+    fetcher = MovieFetcher(**urls)
+    movie_ids = list(range(1, titles // 2 + 1))
+    tv_ids = list(range(1, titles - len(movie_ids) + 1))
+    changed = int(titles * changed_fraction)
+
+    print(f"{titles} titles, {changed} changed upstream between refreshes")
+    measure(server, "initial fill", lambda: refresh_sync(fetcher, movie_ids, tv_ids))
+
+    for label, refresh in (
+        ("sync", lambda: refresh_sync(fetcher, movie_ids, tv_ids)),
+        ("async", lambda: refresh_async(urls, movie_ids, tv_ids))
+    ):
+        for movie_id in movie_ids[:changed // 2]:
+            server.touch(f"/3/movie/{movie_id}")
+        for tv_id in tv_ids[:changed - changed // 2]:
+            server.touch(f"/3/tv/{tv_id}")
+
+        strip_validators(fetcher.cache)
+        full = measure(server, f"{label} full refresh", refresh)
+
+        for movie_id in movie_ids[:changed // 2]:
+            server.touch(f"/3/movie/{movie_id}")
+        for tv_id in tv_ids[:changed - changed // 2]:
+            server.touch(f"/3/tv/{tv_id}")
+
+        conditional = measure(server, f"{label} conditional refresh", refresh)
+        print(f"{'':<26} {100 * (1 - conditional / full):.0f}% fewer bytes")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
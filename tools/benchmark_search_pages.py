@@ -0,0 +1,84 @@
+"""
+Measure what fetching the next page ahead saves when scrolling search results.
+
+Against the local fake API server with added latency, pages through a
+search the way the results list does, pausing between pages as a user
+reading the cards would: once loading each page only when it is reached,
+and once through SearchPager, which fetches the page after the one shown.
+Prints the median wait for a page, the upstream requests and the most
+pages SearchPager held in memory at once.
+
+Usage: python tools/benchmark_search_pages.py [latency_ms] [read_ms]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.async_movie_fetcher import AsyncMovieFetcher, BackgroundFetcher
+from core.search_cache import search_index
+from core.search_pager import SearchPager
+from core.singleflight import singleflight
+from tools.fake_api_server import TOTAL_PAGES, start_fake_server
+
+
+def page_through(background, query, read, ahead):
+    """Show every page of query, reading each for read seconds; returns (waits, most pages kept)"""
+    # An empty cache, so every page is fetched
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    search_index.clear()
+    first = background.submit("search_media", query, "movie").result()
+    pager = SearchPager(query, "movie", first, fetcher=background, keep=2)
+    waits = []
+    kept = 1
+    page = 2
+    while pager.has_page(page):
+        time.sleep(read)
+        start = time.perf_counter()
+        if ahead:
+            results = pager.load(page).result()
+        else:
+            results = background.submit("search_media", query, "movie", candidates=False, page=page).result()
+        waits.append(time.perf_counter() - start)
+        kept = max(kept, len(pager._pages))
+        if not results:
+            break
+        page += 1
+    return waits, kept
+
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 300) / 1000
+    read = (float(sys.argv[2]) if len(sys.argv) > 2 else 1000) / 1000
+
+    server = start_fake_server(latency=latency)
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench"})
+    singleflight.linger = 0
+    background = BackgroundFetcher(AsyncMovieFetcher(
+        tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url
+    ))
+
+    print(f"{latency * 1000:.0f} ms per request, {read * 1000:.0f} ms reading each page, {TOTAL_PAGES} pages")
+    print(f"{'':<20} {'median wait':>12} {'requests':>9} {'pages kept':>11}")
+    try:
+        for label, ahead in (("page when reached", False), ("next page ahead", True)):
+            server.request_counts.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                waits, kept = page_through(background, label, read, ahead)
+            kept = kept if ahead else "-"
+            print(f"{label:<20} {statistics.median(waits) * 1000:>9.0f} ms "
+                  f"{sum(server.request_counts.values()):>9} {kept:>11}")
+    finally:
+        background.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
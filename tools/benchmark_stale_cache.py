@@ -0,0 +1,93 @@
+"""
+Measure opening cached details with TTLs and stale-while-revalidate.
+
+Against the local fake API server with added latency, fills the cache with
+the details views of a few movies and series, then opens them all again the
+way the screens do, three ways: with TTLs off, so every open revalidates
+with TMDB first; with the entries fresh; and with the entries stale, so
+they are shown at once and refreshed in the background. Prints the median
+time to details and the requests made while opening and afterwards.
+
+Usage: python tools/benchmark_stale_cache.py [latency_ms] [titles]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.async_movie_fetcher import AsyncMovieFetcher, BackgroundFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+TTLS = ("MOVIE_DETAILS_TTL", "SERIES_DETAILS_TTL", "UPCOMING_EPISODES_TTL")
+
+
+def open_all(background, movie_ids, tv_ids):
+    """Open every details view in turn; returns the seconds each took"""
+    timings = []
+    for method, item_ids in (("get_movie_details", movie_ids), ("get_series_detail_bundle", tv_ids)):
+        for item_id in item_ids:
+            start = time.perf_counter()
+            details = background.submit(method, item_id).result()
+            timings.append(time.perf_counter() - start)
+            assert details, f"no details for {method} {item_id}"
+    return timings
+
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 300) / 1000
+    titles = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    server = start_fake_server(latency=latency)
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench"})
+    singleflight.linger = 0
+    background = BackgroundFetcher(AsyncMovieFetcher(
+        tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url
+    ))
+    movie_ids = list(range(1, titles + 1))
+    tv_ids = list(range(1, titles + 1))
+
+    print(f"{latency * 1000:.0f} ms per request, {titles} movies and {titles} series already cached")
+    print(f"{'':<30} {'median open':>12} {'requests':>9} {'after':>6}")
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            open_all(background, movie_ids, tv_ids)
+
+        for label, ttl, max_stale in (
+            ("TTLs off (always revalidate)", 0, 0),
+            ("fresh", None, None),
+            ("stale, refreshed behind", 0, None)
+        ):
+            for name in TTLS + ("CACHE_MAX_STALE",):
+                settings.settings.pop(name, None)
+            if ttl is not None:
+                settings.settings.update({name: ttl for name in TTLS})
+            if max_stale is not None:
+                settings.settings["CACHE_MAX_STALE"] = max_stale
+
+            server.request_counts.clear()
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings = open_all(background, movie_ids, tv_ids)
+                opening = sum(server.request_counts.values())
+                # Let background refreshes finish
+                seen = -1
+                while seen != sum(server.request_counts.values()):
+                    seen = sum(server.request_counts.values())
+                    time.sleep(latency * 2 + 0.2)
+            after = sum(server.request_counts.values()) - opening
+            print(f"{label:<30} {statistics.median(timings) * 1000:>9.1f} ms {opening:>9} {after:>6}")
+    finally:
+        background.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Report how much room the offline cache takes and what compression buys.
+
+For the cache database (the one in config.json by default), prints per
+namespace the entries, the bytes stored, the bytes of the JSON they hold,
+the compression ratio, the time to decode an entry and the codecs the
+entries were written with, and the size of the database files. Then
+compresses the same entries with every available codec at the configured
+level and prints what each would store and take to encode and decode;
+zstd-dict is trained on the entries it is measured on, so it does a bit
+better there than on entries written later.
+
+--train trains a new zstd dictionary for every namespace, and --recompress
+writes every entry again with the configured codec, e.g. after changing
+CACHE_CODEC.
+
+Usage: python tools/cache_stats.py [--train] [--recompress] [cache.db]
+"""
+
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.cache_codec import CODECS, CacheCodec, zstandard
+from core.cache_store import DICT_SIZE, CacheStore
+
+
+def measure(codec, values):
+    """(bytes stored, seconds to encode, seconds to decode) for values (decoded data) with codec"""
+    start = time.perf_counter()
+    stored = [codec.encode(data, 1 if codec.dictionaries else None) for data in values]
+    encoded = time.perf_counter()
+    for value in stored:
+        codec.decode(value)
+    return sum(CacheCodec.size(value) for value in stored), encoded - start, time.perf_counter() - encoded
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    store = CacheStore(args[0] if args else None)
+    if not os.path.exists(store.path):
+        print(f"No cache at {store.path}")
+        return
+    codec, level = settings.get_cache_compression()
+
+    if "--train" in sys.argv:
+        for namespace in store.stats():
+            dictionary_id = store.train_dictionary(namespace)
+            print(f"Trained dictionary {dictionary_id} for {namespace}" if dictionary_id
+                  else f"Too few entries to train a dictionary for {namespace}")
+    if "--recompress" in sys.argv:
+        count, before, after = store.recompress()
+        print(f"Recompressed {count} entries with {store.codec.codec}: {before / 1024:.1f} KiB -> {after / 1024:.1f} KiB")
+
+    files = [store.path + suffix for suffix in ("", "-wal") if os.path.exists(store.path + suffix)]
+    print(f"{store.path}: {sum(os.path.getsize(path) for path in files) / 1024:.1f} KiB on disk")
+    print(f"Writing with {store.codec.codec} at level {level}" + (
+        f" (zstandard is not installed, {codec} falls back to zlib)" if codec.startswith("zstd") and zstandard is None else ""
+    ))
+
+    values = defaultdict(list)
+    raws = defaultdict(list)
+    stored_bytes = Counter()
+    json_bytes = Counter()
+    decode_time = Counter()
+    codecs = defaultdict(Counter)
+    unreadable = 0
+    for namespace, key, stored in store.stored():
+        start = time.perf_counter()
+        try:
+            raw = store.codec.decode_raw(stored)
+            data = json.loads(raw)
+        except Exception:
+            unreadable += 1
+            continue
+        decode_time[namespace] += time.perf_counter() - start
+        values[namespace].append(data)
+        raws[namespace].append(raw)
+        stored_bytes[namespace] += CacheCodec.size(stored)
+        json_bytes[namespace] += len(raw)
+        codecs[namespace][CacheCodec.codec_of(stored)] += 1
+
+    print(f"\n{'namespace':<20} {'entries':>8} {'stored KiB':>11} {'JSON KiB':>9} {'ratio':>6} {'decode us':>10}  codecs")
+    for namespace in sorted(values):
+        count = len(values[namespace])
+        print(
+            f"{namespace:<20} {count:>8} {stored_bytes[namespace] / 1024:>11.1f} {json_bytes[namespace] / 1024:>9.1f} "
+            f"{json_bytes[namespace] / max(stored_bytes[namespace], 1):>5.1f}x "
+            f"{decode_time[namespace] / count * 1e6:>10.1f}  "
+            + ", ".join(f"{name} {n}" for name, n in codecs[namespace].most_common())
+        )
+    if unreadable:
+        print(f"{unreadable} entries could not be decoded")
+    total_json = sum(json_bytes.values())
+    if not total_json:
+        return
+
+    print(f"\nEvery entry compressed with each codec at level {level}")
+    print(f"{'codec':<10} {'stored KiB':>11} {'ratio':>6} {'encode us':>10} {'decode us':>10}")
+    count = sum(len(namespace_values) for namespace_values in values.values())
+    for name in CODECS:
+        if name.startswith("zstd") and zstandard is None:
+            continue
+        total = encode = decode = 0
+        for namespace, namespace_values in values.items():
+            candidate = CacheCodec(name, level)
+            if name == "zstd-dict":
+                dictionary = candidate.train(raws[namespace], DICT_SIZE)
+                if dictionary is not None:
+                    candidate.dictionaries[1] = dictionary
+            size, encode_seconds, decode_seconds = measure(candidate, namespace_values)
+            total += size
+            encode += encode_seconds
+            decode += decode_seconds
+        print(
+            f"{name:<10} {total / 1024:>11.1f} {total_json / max(total, 1):>5.1f}x "
+            f"{encode / count * 1e6:>10.1f} {decode / count * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Check that a corrupt response body falls back to the cache.
+
+Against the local fake API server, caches the details of a movie and a
+series, then has the server answer with truncated JSON and looks them up
+again with MovieFetcher and AsyncMovieFetcher, with the bodies streamed
+through json_stream and parsed in one go. Fails if a lookup raises or
+doesn't return the cached details.
+
+Usage: python tools/check_corrupt_body.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import json_stream
+from core.settings_handler import settings
+from core.movie_fetcher import MovieFetcher
+from core.async_movie_fetcher import AsyncMovieFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+TTLS = ("MOVIE_DETAILS_TTL", "SERIES_DETAILS_TTL", "UPCOMING_EPISODES_TTL")
+
+
+def main():
+    server = start_fake_server()
+    urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    settings.settings.update({"TMDB_API_KEY": "check", "OMDB_API_KEY": "check"})
+    singleflight.linger = 0
+    fetcher = MovieFetcher(**urls)
+    async_fetcher = AsyncMovieFetcher(**urls)
+
+    async def run_async(lookup, item_id):
+        try:
+            return await lookup(item_id)
+        finally:
+            await async_fetcher.close()
+
+    # (fetcher, kind, lookup of an ID)
+    lookups = [
+        ("MovieFetcher", "movie", lambda item_id: fetcher.get_movie_details(item_id)),
+        ("MovieFetcher", "tv", lambda item_id: fetcher.get_series_details(item_id, include_cast=True)),
+        ("AsyncMovieFetcher", "movie", lambda item_id: asyncio.run(run_async(async_fetcher.get_movie_details, item_id))),
+        ("AsyncMovieFetcher", "tv", lambda item_id: asyncio.run(run_async(
+            lambda tv_id: async_fetcher.get_series_details(tv_id, include_cast=True), item_id
+        )))
+    ]
+
+    item_id = 0
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Every trimmed body streams however small, or none does
+            for mode, threshold in (("streamed", 0), ("buffered", float("inf"))):
+                json_stream.STREAM_THRESHOLD = threshold
+                for name, kind, lookup in lookups:
+                    item_id += 1
+                    path = f"/3/{kind}/{item_id}"
+                    settings.settings.update(dict.fromkeys(TTLS, 3600))
+                    cached = lookup(item_id)
+                    assert cached, f"{name} found no {kind} details to cache"
+
+                    # Past its TTL, changed upstream and answered with a truncated body
+                    settings.settings.update(dict.fromkeys(TTLS, 0), CACHE_MAX_STALE=0)
+                    server.touch(path)
+                    server.corrupt.add(path)
+                    server.request_counts.clear()
+                    details = lookup(item_id)
+                    assert server.request_counts[path] >= 1, f"{name} did not ask for {path} again"
+                    assert details == cached, f"{name} did not fall back to the cached {kind} details ({mode})"
+    finally:
+        server.shutdown()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
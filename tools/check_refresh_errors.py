@@ -0,0 +1,73 @@
+"""
+Check that a cache refresh that fails is reported on the settings screen.
+
+Runs App._refresh_cache on a stand-in for the window, with a
+CollectionRefresher whose refresh() raises, then runs the callbacks it
+scheduled on the Tk loop the way after() would. Fails if they raise or
+don't show the refresh error.
+
+Usage: python tools/check_refresh_errors.py
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+from core.settings_handler import settings
+
+
+class FailingRefresher:
+    def refresh(self):
+        raise RuntimeError("TMDB is unreachable")
+
+
+class Label:
+    def __init__(self):
+        self.text = None
+
+    def configure(self, text=None, **kwargs):
+        self.text = text
+
+
+class Window:
+    """Just what App._refresh_cache and the callbacks it schedules use"""
+
+    _show_refresh_error = app.App._show_refresh_error
+    _show_refresh_summary = app.App._show_refresh_summary
+
+    def __init__(self):
+        self.cache_status = Label()
+        self.statuses = []
+        self.scheduled = []
+        self.done = threading.Event()
+
+    def show_status(self, message, kind):
+        self.statuses.append((message, kind))
+
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+        self.done.set()
+
+
+def main():
+    settings.settings["OFFLINE_MODE"] = False
+    app.CollectionRefresher = FailingRefresher
+    window = Window()
+    app.App._refresh_cache(window)
+    assert window.done.wait(10), "the refresh thread scheduled nothing"
+
+    # after() runs these on the Tk loop, once run_refresh has returned
+    for callback in window.scheduled:
+        callback()
+
+    expected = ("Error refreshing cache: TMDB is unreachable", "error")
+    assert window.statuses == [expected], f"unexpected statuses: {window.statuses}"
+    assert window.cache_status.text == expected[0], f"unexpected cache status: {window.cache_status.text}"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
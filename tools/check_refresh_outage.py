@@ -0,0 +1,62 @@
+"""
+Check that a collection refresh during an outage keeps its watermark.
+
+Against the local fake API server, refreshes a small collection once, then
+again with no watermark while every request fails. The fetchers must not
+count the cached details they could fall back to as refreshed, so every
+title fails and the refresh state is left as it was.
+
+Usage: python tools/check_refresh_outage.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.cache_store import cache_store
+from core.collection_refresh import CollectionRefresher
+from core.movie_fetcher import MovieFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+
+def main():
+    server = start_fake_server()
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    os.makedirs("data")
+    with open("data/movies.json", "w") as f:
+        json.dump([{"tmdb_id": 1}, {"tmdb_id": 2}], f)
+    with open("data/series.json", "w") as f:
+        json.dump([{"tmdb_id": 3}], f)
+    settings.settings.update({"TMDB_API_KEY": "bench", "OMDB_API_KEY": "bench"})
+    singleflight.linger = 0
+    cache_store.clear()
+    refresher = CollectionRefresher(
+        MovieFetcher(tmdb_base_url=server.tmdb_base_url, omdb_base_url=server.omdb_base_url)
+    )
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            refresher.refresh()
+            # Without a watermark every tracked title is fetched again
+            os.remove(refresher.state_path)
+            server.error_rate = 1.0
+            summary = refresher.refresh()
+    finally:
+        server.shutdown()
+
+    for media_type, tracked in (("movie", 2), ("tv", 1)):
+        counts = summary[media_type]
+        assert counts["refreshed"] == 0 and counts["failed"] == tracked, f"{media_type}: {counts}"
+    assert refresher._load_state() == {}, f"watermark moved: {refresher._load_state()}"
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
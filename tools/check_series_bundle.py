@@ -0,0 +1,75 @@
+"""
+Count the upstream requests behind one series details view.
+
+Replays the old SeriesScreen flow (series details with OMDB, OMDB again,
+then upcoming episodes) and the series detail bundle against the local fake
+API server, prints the requests each one made and fails if the bundle makes
+more than one TMDB series call, one OMDB call and one season call.
+
+Usage: python tools/check_series_bundle.py
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.movie_fetcher import MovieFetcher
+from core.async_movie_fetcher import AsyncMovieFetcher
+from core.singleflight import singleflight
+from tools.fake_api_server import start_fake_server
+
+
+def count_requests(server, action):
+    """Run action and return the requests it made, per path"""
+    server.request_counts.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        action()
+    return dict(server.request_counts)
+
+
+def main():
+    server = start_fake_server()
+    urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    os.chdir(tempfile.mkdtemp(prefix="movie_bench_"))
+    fetcher = MovieFetcher(**urls)
+
+    def legacy_flow():
+        details = fetcher.get_series_details(101, include_cast=True, include_external=True)
+        fetcher.get_omdb_details(details["imdb_id"])
+        fetcher.get_series_upcoming_episodes(101)
+
+    async def async_bundle():
+        async_fetcher = AsyncMovieFetcher(**urls)
+        try:
+            return await async_fetcher.get_series_detail_bundle(103)
+        finally:
+            await async_fetcher.close()
+
+    # Without coalescing, to show what the old flow cost on its own
+    singleflight.linger = 0
+    legacy = count_requests(server, legacy_flow)
+    bundle = count_requests(server, lambda: fetcher.get_series_detail_bundle(102))
+    async_counts = count_requests(server, lambda: asyncio.run(async_bundle()))
+
+    expected = {"/3/tv/{id}": 1, "/omdb/": 1, "/3/tv/{id}/season/3": 1}
+    failed = False
+    for label, counts in (("legacy flow", legacy), ("bundle", bundle), ("async bundle", async_counts)):
+        normalised = {path.replace("/101", "/{id}").replace("/102", "/{id}").replace("/103", "/{id}"): n for path, n in counts.items()}
+        print(f"{label:<14} {sum(counts.values())} requests  {normalised}")
+        if label != "legacy flow" and normalised != expected:
+            failed = True
+
+    server.shutdown()
+    if failed:
+        print(f"FAIL: expected {expected}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Local stand-in for the TMDB and OMDB APIs.
+
+Serves deterministic payloads over HTTP/1.1 keep-alive so MovieFetcher can be
+benchmarked without touching the real services. TMDB resources carry an ETag
+and Last-Modified and answer conditional requests with 304; call
+server.touch(path) to make one look changed and list it under /changes.
+With compress=True bodies are compressed for clients that accept it, with
+brotli when it is installed and gzip otherwise. Latency
+and a share of 503 answers can be injected, the latter drawn from a
+seeded random source so runs are repeatable, and paths listed in
+server.corrupt answer with truncated JSON.
+Run it directly to keep a server up (python tools/fake_api_server.py
+[port] [cast_size]), or call start_fake_server() from a benchmark script.
+"""
+
+import email.utils
+import gzip
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESULTS_PER_PAGE = 20
+TOTAL_PAGES = 5
+CHANGES_PER_PAGE = 100
+
+
+def _movie_payload(movie_id, append, cast_size=40):
+    """Build a TMDB /movie/{id} payload"""
+    data = {
+        "id": movie_id,
+        "title": f"fake movie {movie_id}",
+        "imdb_id": f"tt{movie_id:07d}",
+        "runtime": 90 + movie_id % 60,
+        "release_date": "2020-03-12",
+        "genres": [{"id": 28, "name": "Action"}, {"id": 53, "name": "Thriller"}],
+        "tagline": "A stand-in movie",
+        "budget": 1000000 * (movie_id % 50),
+        "revenue": 3000000 * (movie_id % 50),
+        "overview": "Lorem ipsum " * 20,
+        "poster_path": f"/poster{movie_id}.jpg"
+    }
+    if "credits" in append:
+        data["credits"] = {
+            "cast": [{"name": f"Actor {i}", "character": f"Role {i}"} for i in range(cast_size)],
+            "crew": [{"name": f"Crew {i}", "job": "Director" if i == 0 else "Grip"} for i in range(cast_size * 3 // 2)]
+        }
+    if "release_dates" in append:
+        data["release_dates"] = {
+            "results": [{"iso_3166_1": f"C{i}", "release_dates": [{"certification": "PG-13"}]} for i in range(30)]
+        }
+    return data
+
+
+def _series_payload(tv_id, append, cast_size=400):
+    """Build a TMDB /tv/{id} payload"""
+    data = {
+        "id": tv_id,
+        "name": f"Fake Series {tv_id}",
+        "number_of_seasons": 3,
+        "number_of_episodes": 30,
+        "first_air_date": "2019-01-01",
+        "genres": [{"id": 18, "name": "Drama"}],
+        "created_by": [{"name": "Creator One"}],
+        "poster_path": f"/series{tv_id}.jpg",
+        "overview": "Lorem ipsum " * 20,
+        "status": "Returning Series",
+        "in_production": True,
+        "networks": [{"name": "Fake Network"}],
+        "next_episode_to_air": {"air_date": "2099-01-01", "season_number": 3, "episode_number": 5, "name": "Next"},
+        "last_episode_to_air": {"air_date": "2020-01-01", "season_number": 3, "episode_number": 4, "name": "Last"}
+    }
+    if "external_ids" in append:
+        data["external_ids"] = {"imdb_id": f"tt{tv_id:07d}"}
+    if "credits" in append:
+        data["credits"] = {"cast": [{"name": f"Actor {i}"} for i in range(min(cast_size, 40))]}
+    if "aggregate_credits" in append:
+        # Shaped like TMDB's, where long-running shows list thousands of people
+        data["aggregate_credits"] = {
+            "cast": [_aggregate_person(i, "Acting", "roles", "character") for i in range(cast_size)],
+            "crew": [_aggregate_person(i, "Writing", "jobs", "job") for i in range(cast_size // 2)]
+        }
+    return data
+
+
+def _aggregate_person(index, department, credits_key, credit_field):
+    """Build one aggregate_credits cast or crew entry"""
+    return {
+        "adult": False,
+        "gender": index % 3,
+        "id": 1000000 + index,
+        "known_for_department": department,
+        "name": f"Person Name {index}",
+        "original_name": f"Person Name {index}",
+        "popularity": round(1 + index % 97 / 7, 3),
+        "profile_path": f"/profile{index}.jpg",
+        credits_key: [
+            {"credit_id": f"52571af{index:06d}{n}", credit_field: f"Credit {index}.{n}", "episode_count": 1 + n}
+            for n in range(1 + index % 3)
+        ],
+        "total_episode_count": 3 + index % 40,
+        "order": index
+    }
+
+
+def _season_payload(tv_id, season_number):
+    """Build a TMDB /tv/{id}/season/{n} payload"""
+    return {
+        "season_number": season_number,
+        "episodes": [
+            {
+                "episode_number": i + 1,
+                "name": f"Episode {i + 1}",
+                "air_date": "2020-01-01" if i < 4 else f"2099-01-{i + 1:02d}"
+            }
+            for i in range(10)
+        ]
+    }
+
+
+def _search_payload(query, page):
+    """Build a TMDB /search/* payload"""
+    results = []
+    # Like TMDB, pages after the last one are empty
+    for i in range(RESULTS_PER_PAGE if page <= TOTAL_PAGES else 0):
+        item_id = (page - 1) * RESULTS_PER_PAGE + i + 1
+        results.append({
+            "id": item_id,
+            "title": f"{query} {item_id}",
+            "name": f"{query} {item_id}",
+            "media_type": "movie" if i % 2 == 0 else "tv",
+            "release_date": "2020-01-01",
+            "first_air_date": "2019-01-01",
+            "poster_path": None,
+            "overview": "Lorem ipsum"
+        })
+    return {"page": page, "results": results, "total_pages": TOTAL_PAGES, "total_results": TOTAL_PAGES * RESULTS_PER_PAGE}
+
+
+def _omdb_payload(imdb_id):
+    """Build an OMDB ?i= payload"""
+    return {
+        "Response": "True",
+        "imdbID": imdb_id,
+        "imdbRating": "7.4",
+        "Genre": "Action, Thriller",
+        "Director": "Someone",
+        "Actors": "A, B, C",
+        "Ratings": [
+            {"Source": "Internet Movie Database", "Value": "7.4/10"},
+            {"Source": "Rotten Tomatoes", "Value": "81%"}
+        ]
+    }
+
+
+class FakeApiHandler(BaseHTTPRequestHandler):
+    """Request handler routing TMDB-style and OMDB-style paths"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        if status == 200 and urlsplit(self.path).path in self.server.corrupt:
+            body = body[:len(body) // 2]
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        accepted = self.headers.get("Accept-Encoding", "") if self.server.compress else ""
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=5)
+            self.send_header("Content-Encoding", "br")
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        # Count before writing, so a client that has the body sees it counted
+        self.server.record_bytes(len(body))
+        self.wfile.write(body)
+
+    def _send_resource(self, path, payload):
+        """Send a TMDB resource with validators, or 304 if the client's copy is current"""
+        revision = self.server.revisions[path]
+        body = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.sha1(body + str(revision).encode()).hexdigest()[:16] + '"'
+        validators = {"ETag": etag, "Last-Modified": self.server.last_modified(path)}
+
+        if self.headers.get("If-None-Match") == etag:
+            self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            for name, value in validators.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+        self._send_json(200, payload, validators)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        append = query.get("append_to_response", "").split(",")
+
+        self.server.record(parts.path)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if self.server.inject_error():
+            return self._send_json(503, {"success": False, "status_message": "Injected error"})
+
+        if not self.server.allow_request():
+            self.server.throttled += 1
+            body = b'{"status_code": 25, "status_message": "Rate limit exceeded"}'
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Type", "application/json;charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        match = re.fullmatch(r"/3/(movie|tv)/changes", parts.path)
+        if match:
+            return self._send_json(200, self.server.changes_page(match.group(1), int(query.get("page", 1))))
+
+        match = re.fullmatch(r"/3/(movie|tv)/(\d+)(/season/\d+)?", parts.path)
+        if match and int(match.group(2)) in self.server.missing[match.group(1)]:
+            return self._send_json(404, {"success": False, "status_code": 34, "status_message": "Not found"})
+
+        match = re.fullmatch(r"/3/movie/(\d+)", parts.path)
+        if match:
+            return self._send_resource(parts.path, _movie_payload(int(match.group(1)), append, self.server.cast_size // 10))
+
+        match = re.fullmatch(r"/3/tv/(\d+)", parts.path)
+        if match:
+            return self._send_resource(parts.path, _series_payload(int(match.group(1)), append, self.server.cast_size))
+
+        match = re.fullmatch(r"/3/tv/(\d+)/season/(\d+)", parts.path)
+        if match:
+            return self._send_resource(parts.path, _season_payload(int(match.group(1)), int(match.group(2))))
+
+        if re.fullmatch(r"/3/search/(movie|tv|multi)", parts.path):
+            return self._send_json(200, _search_payload(query.get("query", ""), int(query.get("page", 1))))
+
+        if parts.path == "/omdb/":
+            if query.get("i", "") in self.server.omdb_missing:
+                return self._send_json(200, {"Response": "False", "Error": "Incorrect IMDb ID."})
+            return self._send_json(200, _omdb_payload(query.get("i", "")))
+
+        self._send_json(404, {"success": False, "status_message": "Not found"})
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server that counts requests per path"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, rate_limit=None, cast_size=400, error_rate=0.0, seed=0,
+                 compress=False):
+        super().__init__(address, FakeApiHandler)
+        self.latency = latency
+        self.compress = compress
+        # Share of requests answered with 503
+        self.error_rate = error_rate
+        self.injected_errors = 0
+        self._random = random.Random(seed)
+        # People in a series' aggregate credits (movies get a tenth of that)
+        self.cast_size = cast_size
+        self.request_counts = Counter()
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self._count_lock = threading.Lock()
+
+        # Bumped by touch() to make a resource look changed
+        self.revisions = Counter()
+        self.changed = {"movie": set(), "tv": set()}
+        # TMDB IDs answered 404, and IMDb IDs OMDB has no entry for
+        self.missing = {"movie": set(), "tv": set()}
+        self.omdb_missing = set()
+        # Paths whose 200 answers are cut off halfway, so the JSON is truncated
+        self.corrupt = set()
+        self._modified_at = {}
+        self._started_at = time.time()
+
+        # Optional requests-per-second cap answered with 429 + Retry-After
+        self.rate_limit = rate_limit
+        self.throttled = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def allow_request(self):
+        if not self.rate_limit:
+            return True
+        with self._count_lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count <= self.rate_limit
+
+    def inject_error(self):
+        if not self.error_rate:
+            return False
+        with self._count_lock:
+            failed = self._random.random() < self.error_rate
+            self.injected_errors += failed
+            return failed
+
+    def record(self, path):
+        with self._count_lock:
+            self.request_counts[path] += 1
+
+    def record_bytes(self, count):
+        with self._count_lock:
+            self.bytes_sent += count
+
+    def touch(self, path):
+        """Mark a resource as changed so its ETag no longer matches and /changes lists it"""
+        with self._count_lock:
+            self.revisions[path] += 1
+            self._modified_at[path] = time.time()
+            match = re.fullmatch(r"/3/(movie|tv)/(\d+)", path)
+            if match:
+                self.changed[match.group(1)].add(int(match.group(2)))
+
+    def changes_page(self, media_type, page):
+        """Build a TMDB /{media_type}/changes payload from the touched IDs"""
+        with self._count_lock:
+            ids = sorted(self.changed[media_type])
+        total_pages = max(1, -(-len(ids) // CHANGES_PER_PAGE))
+        start = (page - 1) * CHANGES_PER_PAGE
+        results = [{"id": item_id, "adult": False} for item_id in ids[start:start + CHANGES_PER_PAGE]]
+        return {"results": results, "page": page, "total_pages": total_pages, "total_results": len(ids)}
+
+    def last_modified(self, path):
+        return email.utils.formatdate(self._modified_at.get(path, self._started_at), usegmt=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def tmdb_base_url(self):
+        return f"{self.base_url}/3"
+
+    @property
+    def omdb_base_url(self):
+        return f"{self.base_url}/omdb/"
+
+
+def start_fake_server(port=0, latency=0.0, rate_limit=None, cast_size=400, error_rate=0.0, seed=0,
+                      compress=False):
+    """Start a FakeApiServer on a background thread and return it"""
+    server = FakeApiServer(
+        ("127.0.0.1", port), latency=latency, rate_limit=rate_limit, cast_size=cast_size,
+        error_rate=error_rate, seed=seed, compress=compress
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    cast_size = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    server = start_fake_server(port, cast_size=cast_size)
+    print(f"Fake TMDB at {server.tmdb_base_url}, fake OMDB at {server.omdb_base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,88 @@
+"""
+Record TMDB and OMDB responses as fixtures for the replay transport.
+
+Runs searches and opens the details view of the top results through a
+MovieFetcher whose transport is in record mode, starting from an empty
+cache so every response is fetched and saved. Uses the API keys and base
+URLs from the settings, or the local fake API server with --fake.
+
+Afterwards set HTTP_TRANSPORT to "replay" and HTTP_FIXTURES_DIR to the
+fixtures directory to run the app or any benchmark against the recording.
+
+Usage: python tools/record_fixtures.py [--fake] fixtures_dir [query ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+from core.http_client import HttpClient
+from core.movie_fetcher import MovieFetcher
+from core.transport import Transport
+
+DEFAULT_QUERIES = ["alien", "the office", "dune", "breaking bad", "heat"]
+TOP_RESULTS = 5
+
+# Fixtures are keyed by URL, so the fake server always records from one port
+FAKE_PORT = 8799
+
+
+def open_views(fetcher, queries, top=TOP_RESULTS):
+    """
+    Search for each query and load the details of its top results, as the
+    search screens do; returns {(kind, id): details} for everything loaded
+    """
+    loaded = {}
+    for query in queries:
+        results = fetcher.search_media(query)
+        for result in results[:top]:
+            item_id = result.get("id")
+            if result.get("type") == "tv":
+                loaded[("tv", item_id)] = fetcher.get_series_detail_bundle(item_id)
+            else:
+                loaded[("movie", item_id)] = fetcher.get_movie_details(item_id)
+    return loaded
+
+
+def main():
+    args = sys.argv[1:]
+    use_fake = "--fake" in args
+    args = [arg for arg in args if arg != "--fake"]
+    if not args:
+        print(__doc__)
+        return
+    fixtures_dir = os.path.abspath(args[0])
+    queries = args[1:] or DEFAULT_QUERIES
+
+    urls = {}
+    server = None
+    if use_fake:
+        from tools.fake_api_server import start_fake_server
+        server = start_fake_server(FAKE_PORT)
+        settings.settings.update({"TMDB_API_KEY": "fake", "OMDB_API_KEY": "fake"})
+        urls = {"tmdb_base_url": server.tmdb_base_url, "omdb_base_url": server.omdb_base_url}
+    elif not settings.get("TMDB_API_KEY", ""):
+        print("TMDB API key is missing; set it in the app or use --fake")
+        return
+
+    # An empty cache, so nothing is served without being recorded
+    os.chdir(tempfile.mkdtemp(prefix="movie_record_"))
+    transport = Transport("record", fixtures_dir)
+    fetcher = MovieFetcher(http=HttpClient(transport=transport), **urls)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        loaded = open_views(fetcher, queries)
+
+    print(f"Loaded {len(loaded)} titles for {len(queries)} searches")
+    print(f"Recorded {transport.stats().get('recorded', 0)} responses to {fixtures_dir}")
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
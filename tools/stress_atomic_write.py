@@ -0,0 +1,129 @@
+"""
+Stress the data file writes with concurrent writers that get killed.
+
+Starts several writer processes, each saving a collection-sized JSON file
+from two threads in a loop, and kills a random writer every few
+milliseconds (SIGKILL on POSIX, TerminateProcess on Windows), usually in
+the middle of a write, starting another in its place. Meanwhile the file
+is read back and checked the way the screens load it. Runs once writing
+in place, as the screens used to, and once with atomic_write_json.
+Prints the reads that found a truncated or mixed file, whether the file
+left at the end loads, and the temporary files left behind by the kills.
+
+Usage: python tools/stress_atomic_write.py [seconds] [writers]
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.atomic_write import atomic_write_json
+
+ITEMS = 2000
+
+
+def document(writer, seq):
+    """A collection-like document that can tell when it was cut short or mixed"""
+    items = [
+        {"tmdb_id": i, "name": f"Title {i}", "watch_date": "2024-01-01", "note": f"{writer}-{seq}" * 4}
+        for i in range(ITEMS)
+    ]
+    return {"writer": writer, "seq": seq, "count": len(items), "items": items}
+
+
+def check(path):
+    """None if path loads as a whole document, else what is wrong with it"""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        return type(e).__name__
+    if data["count"] != len(data["items"]):
+        return "count mismatch"
+    if any(item["note"] != f"{data['writer']}-{data['seq']}" * 4 for item in data["items"]):
+        return "mixed writers"
+    return None
+
+
+def write_forever(path, mode, writer):
+    """Writer process: save the document over and over from two threads"""
+    def loop(thread):
+        seq = 0
+        while True:
+            seq += 1
+            data = document(f"{writer}.{thread}", seq)
+            if mode == "atomic":
+                atomic_write_json(path, data, lock=True, indent=2)
+            else:
+                with open(path, "w") as f:
+                    json.dump(data, f, indent=2)
+
+    threads = [threading.Thread(target=loop, args=(thread,), daemon=True) for thread in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run(mode, seconds, writers):
+    directory = tempfile.mkdtemp(prefix="movie_bench_")
+    path = os.path.join(directory, "movies.json")
+
+    def spawn(writer):
+        return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--writer", path, mode, str(writer)])
+
+    processes = [spawn(writer) for writer in range(writers)]
+    kills = reads = 0
+    problems = {}
+    rng = random.Random(1)
+    deadline = time.monotonic() + seconds
+    next_kill = time.monotonic()
+    try:
+        while time.monotonic() < deadline:
+            problem = check(path)
+            reads += 1
+            if problem:
+                problems[problem] = problems.get(problem, 0) + 1
+            if time.monotonic() >= next_kill:
+                victim = rng.randrange(writers)
+                processes[victim].kill()
+                processes[victim].wait()
+                processes[victim] = spawn(writers + kills)
+                kills += 1
+                next_kill = time.monotonic() + rng.uniform(0.005, 0.05)
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+    final = check(path) or "loads"
+    leftovers = [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    bad = sum(problems.values())
+    detail = ", ".join(f"{count} {problem}" for problem, count in sorted(problems.items())) or "-"
+    print(f"{mode:<9} {kills:>6} {reads:>6} {bad:>5}  {final:<14} {len(leftovers):>5}  {detail}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--writer":
+        write_forever(sys.argv[2], sys.argv[3], sys.argv[4])
+        return
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{writers} writer processes x 2 threads for {seconds:.0f} s each, {ITEMS} items per save")
+    print(f"{'mode':<9} {'kills':>6} {'reads':>6} {'bad':>5}  {'final file':<14} {'.tmp':>5}  bad reads")
+    for mode in ("in place", "atomic"):
+        run(mode, seconds, writers)
+
+
+if __name__ == "__main__":
+    main()
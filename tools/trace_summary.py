@@ -0,0 +1,91 @@
+"""
+Summarize the fetcher traces written by core.tracing.
+
+Reads the trace file and its rotated backups and prints, per kind of call
+(get_movie_details, search_media, ...), the p50/p95/p99 of the whole call
+and of every stage inside it: cache lookups, HTTP requests with their
+connect, TLS, time to headers (which includes any connect) and transfer,
+JSON decoding and formatting. A stage that ran more than once in a call
+counts once with its total time. Calls whose work was shared with an
+identical call already in flight have no stages of their own.
+
+Usage: python tools/trace_summary.py [trace_file] [--call name]
+"""
+
+import glob
+import json
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.settings_handler import settings
+
+
+def read_traces(path):
+    """Every call traced in path and its rotated backups, oldest file first"""
+    files = sorted(glob.glob(f"{glob.escape(path)}.*"), key=lambda name: -int(name.rsplit(".", 1)[1]))
+    for name in files + [path]:
+        if not os.path.exists(name):
+            continue
+        with open(name, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "stages" in record or "duration_ms" in record:
+                    yield record
+
+
+def stage_totals(stages, totals, prefix=""):
+    """Add up the time of each stage path (e.g. "http > http.headers") in one call"""
+    for stage in stages:
+        path = f"{prefix}{stage['name']}"
+        totals[path] += stage["duration_ms"]
+        stage_totals(stage.get("stages", []), totals, f"{path} > ")
+    return totals
+
+
+def percentile(ordered, share):
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def main():
+    args = sys.argv[1:]
+    call = None
+    if "--call" in args:
+        index = args.index("--call")
+        call = args[index + 1]
+        del args[index:index + 2]
+    path = args[0] if args else settings.get_trace_settings()[1]
+
+    # call name -> stage path -> [ms per call]
+    timings = defaultdict(lambda: defaultdict(list))
+    for record in read_traces(path):
+        if call and record["name"] != call:
+            continue
+        stages = timings[record["name"]]
+        stages[""].append(record["duration_ms"])
+        for stage, total in stage_totals(record.get("stages", []), defaultdict(float)).items():
+            stages[stage].append(total)
+
+    if not timings:
+        print(f"No traces in {path}")
+        return
+
+    for name, stages in sorted(timings.items()):
+        calls = len(stages[""])
+        print(f"\n{name} ({calls} calls)")
+        print(f"  {'stage':<44} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for stage, values in sorted(stages.items()):
+            ordered = sorted(values)
+            print(
+                f"  {stage or 'total':<44} {len(values):>6} {percentile(ordered, 0.5):>8.1f} "
+                f"{percentile(ordered, 0.95):>8.1f} {percentile(ordered, 0.99):>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
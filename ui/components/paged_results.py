@@ -0,0 +1,165 @@
+import customtkinter as ctk
+from core.settings_handler import settings
+from core.search_cache import SEARCH_PAGE_SIZE
+from core.search_pager import SearchPager
+
+class PagedResults:
+    """
+    Search result cards that load page by page as the list is scrolled.
+
+    The cards of each page live in their own frame inside the results grid.
+    When the scrollable frame is scrolled near its end, the next page is
+    appended; SearchPager has usually fetched it already. At most max_pages
+    pages of cards exist at once: past that, the first page shown is
+    destroyed and a button at the top brings it back, so the number of
+    widgets stays the same however far the list is scrolled.
+    """
+
+    def __init__(self, scroll_frame, grid, pager, create_card, on_count=None, max_pages=None, poll_ms=200):
+        self.scroll_frame = scroll_frame
+        self.grid = grid
+        self.pager = pager
+        self.create_card = create_card
+        self.on_count = on_count
+        self.max_pages = max_pages or settings.get_search_pages_shown()
+        self.poll_ms = poll_ms
+
+        # (page number, frame) of the pages shown, top to bottom
+        self._shown = []
+        self._loading = False
+        self._closed = False
+        # page number -> results on it, for the count of results found
+        self._page_sizes = {}
+        self._earlier_button = None
+        self._status_label = None
+
+    @classmethod
+    def for_search(cls, scroll_frame, grid, query, media_type, first_page, create_card, on_count=None):
+        """Show the first page of a search and page through the rest on scroll"""
+        view = cls(scroll_frame, grid, SearchPager(query, media_type, first_page), create_card, on_count)
+        view._append(1, first_page)
+        view._poll()
+        return view
+
+    def close(self):
+        """Stop loading pages, e.g. because the results are replaced"""
+        self._closed = True
+
+    def _poll(self):
+        """Load the next page when the list is scrolled near its end"""
+        if self._closed or not self.grid.winfo_exists():
+            return
+        # Hidden while a details view is shown
+        if self.grid.winfo_ismapped() and not self._loading:
+            next_page = self._shown[-1][0] + 1 if self._shown else 1
+            if self.pager.has_page(next_page) and self._near_end():
+                self._load(next_page, self._append)
+        self.grid.after(self.poll_ms, self._poll)
+
+    def _near_end(self):
+        _, bottom = self.scroll_frame._parent_canvas.yview()
+        return bottom >= 0.9
+
+    def _load(self, page, show):
+        self._loading = True
+        self._set_status("Loading more results...")
+
+        def done(future):
+            self.grid.after(0, lambda: self._loaded_page(page, future, show))
+
+        self.pager.load(page).add_done_callback(done)
+
+    def _loaded_page(self, page, future, show):
+        self._loading = False
+        self._set_status(None)
+        if self._closed or not self.grid.winfo_exists():
+            return
+        try:
+            results = future.result()
+        except Exception as e:
+            print(f"Error loading search results page {page}: {e}")
+            return
+        show(page, results)
+
+    def _page_frame(self, page, results):
+        frame = ctk.CTkFrame(self.grid, fg_color="transparent")
+        for i, item in enumerate(results):
+            self.create_card(frame, item, (page - 1) * SEARCH_PAGE_SIZE + i)
+        return frame
+
+    def _append(self, page, results):
+        """Show page below the pages shown, dropping the first one past max_pages"""
+        if not results:
+            return
+        frame = self._page_frame(page, results)
+        frame.pack(fill="x")
+        self._shown.append((page, frame))
+        self._count(page, results)
+
+        if len(self._shown) > self.max_pages:
+            _, first = self._shown.pop(0)
+            self._keep_scroll_position(first)
+            self._show_earlier_button()
+
+    def _prepend(self, page, results):
+        """Show page above the pages shown, dropping the last one past max_pages"""
+        if not results:
+            return
+        frame = self._page_frame(page, results)
+        frame.pack(fill="x", before=self._shown[0][1])
+        self._shown.insert(0, (page, frame))
+        if len(self._shown) > self.max_pages:
+            _, last = self._shown.pop()
+            last.destroy()
+        self._show_earlier_button()
+
+    def _show_earlier(self):
+        if not self._loading and self._shown:
+            self._load(self._shown[0][0] - 1, self._prepend)
+
+    def _show_earlier_button(self):
+        """Offer the pages above the first one shown, if there are any"""
+        first_page = self._shown[0][0]
+        if first_page == 1:
+            if self._earlier_button is not None:
+                self._earlier_button.destroy()
+                self._earlier_button = None
+            return
+        if self._earlier_button is None:
+            self._earlier_button = ctk.CTkButton(
+                self.grid,
+                text="",
+                command=self._show_earlier,
+                fg_color="transparent",
+                border_width=1,
+                text_color=("gray20", "gray80")
+            )
+        self._earlier_button.configure(text=f"↑ Show page {first_page - 1} of the results")
+        self._earlier_button.pack(fill="x", padx=10, pady=5, before=self._shown[0][1])
+
+    def _keep_scroll_position(self, removed):
+        """Destroy the frame at the top without the cards below it jumping up"""
+        canvas = self.scroll_frame._parent_canvas
+        top, _ = canvas.yview()
+        total = canvas.bbox("all")[3]
+        height = removed.winfo_height()
+        removed.destroy()
+        canvas.update_idletasks()
+        remaining = total - height
+        if remaining > 0:
+            canvas.yview_moveto(max(0.0, (top * total - height) / remaining))
+
+    def _set_status(self, text):
+        if text is None:
+            if self._status_label is not None:
+                self._status_label.destroy()
+                self._status_label = None
+            return
+        if self._status_label is None:
+            self._status_label = ctk.CTkLabel(self.grid, text=text, text_color="gray70")
+        self._status_label.pack(pady=10)
+
+    def _count(self, page, results):
+        self._page_sizes[page] = len(results)
+        if self.on_count is not None:
+            self.on_count(sum(self._page_sizes.values()))
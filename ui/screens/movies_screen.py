@@ -4,12 +4,17 @@ import os
 import json
 from pathlib import Path
 import threading
-import requests
 from PIL import Image, ImageTk
 from io import BytesIO
 import datetime
 import webbrowser
 from core.movie_fetcher import MovieFetcher
+from core.http_client import http_client
+from core.cache_store import cache_store
+from core.atomic_write import atomic_write_json
+from core.prefetch import DetailsPrefetcher
+from core.incremental_search import IncrementalSearch
+from ui.components.paged_results import PagedResults
 from core.word_handler import WordHandler
 from tkcalendar import Calendar, DateEntry
 
@@ -25,6 +30,15 @@ class MoviesScreen(ctk.CTkFrame):
         # Initialize variables
         self.movies_data = []
         self.movie_fetcher = MovieFetcher()
+        self.prefetcher = DetailsPrefetcher("movie")
+        self.results_view = None
+        # Searches as the user types; the search box is created by _create_ui
+        self.search = IncrementalSearch(
+            self, lambda: self.search_entry.get(), "movie",
+            on_results=self._display_search_results,
+            on_error=self._show_search_error,
+            on_searching=self._show_searching
+        )
         self.word_handler = WordHandler()
         self.current_details_frame = None
         
@@ -79,6 +93,7 @@ class MoviesScreen(ctk.CTkFrame):
         )
         self.search_entry.pack(side="left", padx=5, pady=5, fill="x", expand=True)
         self.search_entry.bind("<Return>", self._on_search)
+        self.search_entry.bind("<KeyRelease>", self.search.on_key)
         
         # Content frame with search results
         self.content_frame = ctk.CTkScrollableFrame(self)
@@ -105,7 +120,7 @@ class MoviesScreen(ctk.CTkFrame):
         
         instruction_text = ctk.CTkLabel(
             self.welcome_frame,
-            text="Type a movie name in the search box and press Enter",
+            text="Type a movie name in the search box; results appear as you type",
             font=ctk.CTkFont(size=14),
             text_color="gray70"
         )
@@ -133,32 +148,42 @@ class MoviesScreen(ctk.CTkFrame):
                 with open(self.data_file, "r") as f:
                     self.movies_data = json.load(f)
             else:
-                # Create directory if it doesn't exist
-                self.data_file.parent.mkdir(parents=True, exist_ok=True)
                 # Create empty file
-                with open(self.data_file, "w") as f:
-                    json.dump([], f)
+                atomic_write_json(self.data_file, [], lock=True)
                 self.movies_data = []
         except Exception as e:
             print(f"Error loading movies: {e}")
             self.movies_data = []
+        self._pin_collection()
     
     def _save_movies(self):
         """Save movies to the data file"""
         try:
-            # Create directory if it doesn't exist
-            self.data_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.data_file, "w") as f:
-                json.dump(self.movies_data, f, indent=2)
+            # Written to a temporary file and renamed over the old one, so a
+            # crash mid-save can't leave a truncated file behind
+            atomic_write_json(self.data_file, self.movies_data, lock=True, indent=2)
         except Exception as e:
             print(f"Error saving movies: {e}")
+        self._pin_collection()
+    
+    def _pin_collection(self):
+        """Keep the cached details of the movies in the collection from being evicted"""
+        try:
+            cache_store.set_pinned(
+                "movie_details",
+                [str(item["tmdb_id"]) for item in self.movies_data if item.get("tmdb_id") is not None]
+            )
+        except Exception as e:
+            print(f"Error pinning cached movies: {e}")
     
     def _on_search(self, event):
-        """Handle search when Enter is pressed"""
-        search_text = self.search_entry.get().strip()
-        if not search_text:
-            return
+        """Handle search when Enter is pressed or the search button clicked"""
+        self.search.submit()
+    
+    def _show_searching(self, search_text):
+        """Show the loading indicator while a search is in flight"""
+        # Details prefetched for the previous results are no longer wanted
+        self.prefetcher.cancel()
             
         # Clear previous content
         for widget in self.content_frame.winfo_children():
@@ -174,24 +199,14 @@ class MoviesScreen(ctk.CTkFrame):
             font=ctk.CTkFont(size=18, weight="bold")
         )
         loading_label.pack(pady=10)
-        
-        # Search online
-        def search_movies():
-            try:
-                # Search online
-                api_results = self.movie_fetcher.search_media(search_text, "movie")
-                
-                # Process and display results
-                self.after(0, lambda: self._display_search_results(api_results, search_text))
-            except Exception as e:
-                print(f"Error searching online: {e}")
-                self.after(0, lambda: self._show_search_error(str(e)))
-                
-        # Start the search in a separate thread
-        threading.Thread(target=search_movies).start()
     
     def _display_search_results(self, results, search_query):
         """Display search results with thumbnails"""
+        # The previous results stop loading pages
+        if self.results_view is not None:
+            self.results_view.close()
+            self.results_view = None
+        
         # Clear previous content
         for widget in self.content_frame.winfo_children():
             widget.destroy()
@@ -229,9 +244,14 @@ class MoviesScreen(ctk.CTkFrame):
         results_grid = ctk.CTkFrame(self.content_frame, fg_color="transparent")
         results_grid.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Create a movie card for each result
-        for i, movie in enumerate(results):
-            self._create_movie_result_card(results_grid, movie, i)
+        # Create a movie card for each result, and more pages as the list is scrolled
+        self.results_view = PagedResults.for_search(
+            self.content_frame, results_grid, search_query, "movie", results, self._create_movie_result_card,
+            on_count=lambda count: results_label.configure(text=f"Search Results ({count} found):")
+        )
+        
+        # The first cards are the likely clicks; load their details ahead
+        self.prefetcher.prefetch(results)
     
     def _create_movie_result_card(self, parent, movie, index):
         """Create a card for a movie search result"""
@@ -346,7 +366,7 @@ class MoviesScreen(ctk.CTkFrame):
         
         def load_image():
             try:
-                response = requests.get(url, timeout=10)
+                response = http_client.get(url)
                 img_data = BytesIO(response.content)
                 img = Image.open(img_data)
                 img = img.resize(size, Image.LANCZOS)
@@ -423,16 +443,16 @@ class MoviesScreen(ctk.CTkFrame):
         )
         loading_label.pack(expand=True, fill="both", padx=20, pady=20)
         
-        def fetch_details():
+        def on_details_fetched(future):
             try:
-                details = self.movie_fetcher.get_movie_details(movie_id)
+                details = future.result()
                 self.after(0, lambda: self._display_movie_details(loading_dialog, movie, details))
             except Exception as e:
                 self.after(0, lambda: self._show_error(f"Error fetching movie details: {e}"))
                 self.after(0, loading_dialog.destroy)
         
-        # Start the fetch in a separate thread
-        threading.Thread(target=fetch_details).start()
+        # Run the TMDB -> OMDB pipeline on the shared background event loop
+        self.prefetcher.get_details(movie_id).add_done_callback(on_details_fetched)
     
     def _display_movie_details(self, loading_dialog, movie, details):
         """Display detailed movie information in the main content area"""
@@ -783,7 +803,7 @@ class MoviesScreen(ctk.CTkFrame):
         
         instruction_text = ctk.CTkLabel(
             self.welcome_frame,
-            text="Type a movie name in the search box and press Enter",
+            text="Type a movie name in the search box; results appear as you type",
             font=ctk.CTkFont(size=14),
             text_color="gray70"
         )
@@ -799,6 +819,9 @@ class MoviesScreen(ctk.CTkFrame):
         
         # If movie was added, refresh the view
         if hasattr(dialog, "result") and dialog.result:
+            # Keep the TMDB ID so the cache refresh can track this title
+            dialog.result["tmdb_id"] = movie.get("id")
+            
             # Add the movie to data
             self.movies_data.append(dialog.result)
             self._save_movies()
@@ -844,6 +867,7 @@ class MoviesScreen(ctk.CTkFrame):
         )
         self.search_entry.pack(fill="x", padx=10, pady=(0, 10))
         self.search_entry.bind("<Return>", self._on_search)
+        self.search_entry.bind("<KeyRelease>", self.search.on_key)
         
         search_button = ctk.CTkButton(
             search_frame,
@@ -1235,7 +1259,7 @@ class MovieAddDialog(ctk.CTkToplevel):
         
         def load_image():
             try:
-                response = requests.get(url, timeout=10)
+                response = http_client.get(url)
                 img_data = BytesIO(response.content)
                 img = Image.open(img_data)
                 img = img.resize((240, 360), Image.LANCZOS)
@@ -4,12 +4,17 @@ import os
 import json
 from pathlib import Path
 import threading
-import requests
 from PIL import Image, ImageTk
 from io import BytesIO
 import datetime
 import webbrowser
 from core.movie_fetcher import MovieFetcher
+from core.http_client import http_client
+from core.cache_store import cache_store
+from core.atomic_write import atomic_write_json
+from core.prefetch import DetailsPrefetcher
+from core.incremental_search import IncrementalSearch
+from ui.components.paged_results import PagedResults
 from core.word_handler import WordHandler
 from tkcalendar import Calendar, DateEntry
 from tkinter import ttk
@@ -28,6 +33,15 @@ class SeriesScreen(ctk.CTkFrame):
         # Initialize variables
         self.series_data = []
         self.movie_fetcher = MovieFetcher()
+        self.prefetcher = DetailsPrefetcher("tv")
+        self.results_view = None
+        # Searches as the user types; the search box is created by _create_ui
+        self.search = IncrementalSearch(
+            self, lambda: self.search_entry.get(), "tv",
+            on_results=self._display_search_results,
+            on_error=self._show_search_error,
+            on_searching=self._show_searching
+        )
         self.word_handler = WordHandler()
         
         # Load series data
@@ -81,6 +95,7 @@ class SeriesScreen(ctk.CTkFrame):
         )
         self.search_entry.pack(side="left", padx=5, pady=5, fill="x", expand=True)
         self.search_entry.bind("<Return>", self._on_search)
+        self.search_entry.bind("<KeyRelease>", self.search.on_key)
         
         # Content frame with search results
         self.content_frame = ctk.CTkScrollableFrame(self)
@@ -107,7 +122,7 @@ class SeriesScreen(ctk.CTkFrame):
         
         instruction_text = ctk.CTkLabel(
             self.welcome_frame,
-            text="Type a series name in the search box and press Enter",
+            text="Type a series name in the search box; results appear as you type",
             font=ctk.CTkFont(size=14),
             text_color="gray70"
         )
@@ -120,32 +135,42 @@ class SeriesScreen(ctk.CTkFrame):
                 with open(self.data_file, "r") as f:
                     self.series_data = json.load(f)
             else:
-                # Create directory if it doesn't exist
-                self.data_file.parent.mkdir(parents=True, exist_ok=True)
                 # Create empty file
-                with open(self.data_file, "w") as f:
-                    json.dump([], f)
+                atomic_write_json(self.data_file, [], lock=True)
                 self.series_data = []
         except Exception as e:
             print(f"Error loading series data: {e}")
             self.series_data = []
+        self._pin_collection()
     
     def _save_series(self):
         """Save series to the data file"""
         try:
-            # Create directory if it doesn't exist
-            self.data_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.data_file, "w") as f:
-                json.dump(self.series_data, f, indent=2)
+            # Written to a temporary file and renamed over the old one, so a
+            # crash mid-save can't leave a truncated file behind
+            atomic_write_json(self.data_file, self.series_data, lock=True, indent=2)
         except Exception as e:
             print(f"Error saving series data: {e}")
+        self._pin_collection()
+    
+    def _pin_collection(self):
+        """Keep the cached details of the series in the collection from being evicted"""
+        try:
+            cache_store.set_pinned(
+                "series_details",
+                [str(item["tmdb_id"]) for item in self.series_data if item.get("tmdb_id") is not None]
+            )
+        except Exception as e:
+            print(f"Error pinning cached series: {e}")
     
     def _on_search(self, event):
-        """Handle search when Enter is pressed"""
-        search_text = self.search_entry.get().strip()
-        if not search_text:
-            return
+        """Handle search when Enter is pressed or the search button clicked"""
+        self.search.submit()
+    
+    def _show_searching(self, search_text):
+        """Show the loading indicator while a search is in flight"""
+        # Details prefetched for the previous results are no longer wanted
+        self.prefetcher.cancel()
             
         # Clear previous content
         for widget in self.content_frame.winfo_children():
@@ -161,24 +186,14 @@ class SeriesScreen(ctk.CTkFrame):
             font=ctk.CTkFont(size=18, weight="bold")
         )
         loading_label.pack(pady=10)
-        
-        # Search online
-        def search_series():
-            try:
-                # Search online
-                api_results = self.movie_fetcher.search_media(search_text, "tv")
-                
-                # Process and display results
-                self.after(0, lambda: self._display_search_results(api_results, search_text))
-            except Exception as e:
-                print(f"Error searching online: {e}")
-                self.after(0, lambda: self._show_search_error(str(e)))
-                
-        # Start the search in a separate thread
-        threading.Thread(target=search_series).start()
     
     def _display_search_results(self, results, search_query):
         """Display search results with thumbnails"""
+        # The previous results stop loading pages
+        if self.results_view is not None:
+            self.results_view.close()
+            self.results_view = None
+        
         # Clear previous content
         for widget in self.content_frame.winfo_children():
             widget.destroy()
@@ -216,9 +231,14 @@ class SeriesScreen(ctk.CTkFrame):
         results_grid = ctk.CTkFrame(self.content_frame, fg_color="transparent")
         results_grid.pack(fill="both", expand=True, padx=10, pady=10)
         
-        # Create a series card for each result
-        for i, series in enumerate(results):
-            self._create_series_result_card(results_grid, series, i)
+        # Create a series card for each result, and more pages as the list is scrolled
+        self.results_view = PagedResults.for_search(
+            self.content_frame, results_grid, search_query, "tv", results, self._create_series_result_card,
+            on_count=lambda count: results_label.configure(text=f"Search Results ({count} found):")
+        )
+        
+        # The first cards are the likely clicks; load their details ahead
+        self.prefetcher.prefetch(results)
     
     def _create_series_result_card(self, parent, series, index):
         """Create a card for a series search result"""
@@ -333,7 +353,7 @@ class SeriesScreen(ctk.CTkFrame):
         
         def load_image():
             try:
-                response = requests.get(url, timeout=10)
+                response = http_client.get(url)
                 img_data = BytesIO(response.content)
                 img = Image.open(img_data)
                 img = img.resize(size, Image.LANCZOS)
@@ -410,39 +430,17 @@ class SeriesScreen(ctk.CTkFrame):
         )
         loading_label.pack(expand=True, fill="both", padx=20, pady=20)
         
-        def fetch_details():
+        def on_details_fetched(future):
             try:
-                # Fetch comprehensive details from both TMDB and OMDB APIs
-                details = self.movie_fetcher.get_series_details(series_id, include_cast=True, include_external=True)
-                
-                # Additionally fetch IMDb and RT ratings if available
-                if "imdb_id" in details and details["imdb_id"]:
-                    omdb_details = self.movie_fetcher.get_omdb_details(details["imdb_id"])
-                    if omdb_details:
-                        # Add OMDB specific details
-                        details["imdb_rating"] = omdb_details.get("imdbRating", "")
-                        details["rt_rating"] = omdb_details.get("Ratings", [])
-                        # Extract RT rating if available
-                        for rating in details["rt_rating"]:
-                            if rating.get("Source") == "Rotten Tomatoes":
-                                details["rt_rating"] = rating.get("Value", "")
-                                break
-                        if isinstance(details["rt_rating"], list):
-                            details["rt_rating"] = ""
-                
-                # Get information about upcoming episodes
-                if series.get("in_production", False):
-                    upcoming_details = self.movie_fetcher.get_series_upcoming_episodes(series_id)
-                    if upcoming_details:
-                        details.update(upcoming_details)
-                
+                # TMDB details, OMDB ratings and upcoming episodes in one bundle
+                details = future.result()
                 self.after(0, lambda: self._display_series_details(loading_dialog, series, details))
             except Exception as e:
                 self.after(0, lambda: self._show_error(f"Error fetching series details: {e}"))
                 self.after(0, loading_dialog.destroy)
         
-        # Start the fetch in a separate thread
-        threading.Thread(target=fetch_details).start()
+        # Run the fetch pipeline on the shared background event loop
+        self.prefetcher.get_details(series_id).add_done_callback(on_details_fetched)
     
     def _display_series_details(self, loading_dialog, series, details):
         """Display detailed series information in the main content area"""
@@ -977,6 +975,9 @@ class SeriesScreen(ctk.CTkFrame):
         
         # If series was added, refresh the view
         if hasattr(dialog, "result") and dialog.result:
+            # Keep the TMDB ID so the cache refresh can track this title
+            dialog.result["tmdb_id"] = series.get("id")
+            
             # Add the series to data
             self.series_data.append(dialog.result)
             self._save_series()
@@ -1027,7 +1028,7 @@ class SeriesScreen(ctk.CTkFrame):
         
         instruction_text = ctk.CTkLabel(
             self.welcome_frame,
-            text="Type a series name in the search box and press Enter",
+            text="Type a series name in the search box; results appear as you type",
             font=ctk.CTkFont(size=14),
             text_color="gray70"
         )
@@ -1623,7 +1624,7 @@ class SeriesAddDialog(ctk.CTkToplevel):
             
         try:
             img_url = f"https://image.tmdb.org/t/p/w500{poster_path}"
-            response = requests.get(img_url)
+            response = http_client.get(img_url)
             img_data = response.content
             img = Image.open(BytesIO(img_data))
             